@@ -240,18 +240,29 @@ def show():
     # Streamlit app content
     st.title("Authentication Methods Exploration")
 
-    st.sidebar.title("Select an Authentication Method")
-    option = st.sidebar.selectbox(
-        "Choose an option:",
-        ["Session-based Authentication", "Token-based Authentication", "OAuth", "Password Hashing",
-         "Security Best Practices"]
-    )
-
-    if option == "Session-based Authentication":
-        display_session_based_authentication()
-    elif option == "Token-based Authentication":
-        display_token_based_authentication()
-    elif option == "OAuth":
-        display_oauth()
-    elif option == "Password Hashing":
-        display_password_hash
+    # Only this part reruns when another method is picked
+    @st.fragment
+    def display_selected_method():
+        st.subheader("Select an Authentication Method")
+        option = st.selectbox(
+            "Choose an option:",
+            ["Session-based Authentication", "Token-based Authentication", "OAuth", "Password Hashing",
+             "Security Best Practices"]
+        )
+
+        if option == "Session-based Authentication":
+            display_session_based_authentication()
+        elif option == "Token-based Authentication":
+            display_token_based_authentication()
+        elif option == "OAuth":
+            display_oauth()
+        elif option == "Password Hashing":
+            display_password_hashing()
+        elif option == "Security Best Practices":
+            display_security_best_practices()
+
+    display_selected_method()
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
@@ -193,3 +193,7 @@ def show():
     4. What are the benefits of using middleware for handling errors in Express.js?  
     5. How does Express.js serve static files, and why is it essential for many web applications?
     """)
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
@@ -0,0 +1,131 @@
+import collections
+import threading
+import time
+
+import metrics
+import settings
+
+# Buckets kept per limiter. Full, idle buckets are dropped first when it is exceeded.
+MAX_BUCKETS = 10000
+
+# Notice shown for a rerun that was turned away. Load tests look for it to tell those
+# reruns apart from completed ones.
+BUSY_MESSAGE = "Lots of readers right now, your page will load in a moment."
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Function to take one token; returns 0 on success, else the seconds until one is available
+    def take(self, now):
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+# One token bucket per key (session id, client address), `rate` reruns per second
+# with bursts of up to `burst`
+class RateLimiter:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = collections.OrderedDict()
+
+    def take(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+    # Function to drop refilled buckets (a new bucket starts full, so nothing is lost),
+    # then the least recently used ones if that was not enough
+    def _prune(self, now):
+        for key in [key for key, bucket in self._buckets.items() if bucket.full(now)]:
+            del self._buckets[key]
+        while len(self._buckets) >= MAX_BUCKETS:
+            self._buckets.popitem(last=False)
+
+    def forget(self, key):
+        self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# What enter() decided for a rerun
+Decision = collections.namedtuple("Decision", "admitted reason retry_after")
+
+
+# Admission control in front of script runs: a per-session and a per-address token
+# bucket, and a cap on how many runs render at once. A rerun that is turned away is
+# not queued. The session shows a busy state and retries later with whatever widget
+# state it has by then, so a burst of clicks collapses into one run of the latest one.
+class Gate:
+    def __init__(self, session_rate=None, session_burst=None, address_rate=None, address_burst=None,
+                 max_in_flight=None, clock=time.monotonic):
+        self.clock = clock
+        self.sessions = RateLimiter(settings.RERUN_RATE if session_rate is None else session_rate,
+                                    settings.RERUN_BURST if session_burst is None else session_burst)
+        self.addresses = RateLimiter(settings.ADDRESS_RERUN_RATE if address_rate is None else address_rate,
+                                     settings.ADDRESS_RERUN_BURST if address_burst is None else address_burst)
+        self.max_in_flight = settings.MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.in_flight = 0
+        self._pending = set()  # sessions turned away that have not been served since
+        self._lock = threading.Lock()
+
+    # Function to decide whether a rerun may render now. `retry` marks the automatic
+    # retry of a rerun that was turned away, which is not a new request.
+    def enter(self, session_id, address=None, retry=False):
+        with self._lock:
+            now = self.clock()
+            reason = None
+            retry_after = self.sessions.take(session_id, now)
+            if retry_after:
+                reason = "session"
+            elif address is not None:
+                retry_after = self.addresses.take(address, now)
+                reason = "address" if retry_after else None
+            if reason is None and self.max_in_flight and self.in_flight >= self.max_in_flight:
+                reason, retry_after = "capacity", settings.BUSY_RETRY
+            if reason is None:
+                self.in_flight += 1
+                self._pending.discard(session_id)
+                return Decision(True, None, 0.0)
+            coalesced = session_id in self._pending and not retry
+            self._pending.add(session_id)
+        if coalesced:
+            # Only the latest widget state of this session will be rendered
+            metrics.increment("reruns_coalesced_total")
+        metrics.increment("reruns_rejected_total", reason=reason)
+        return Decision(False, reason, retry_after)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def forget(self, session_id):
+        with self._lock:
+            self.sessions.forget(session_id)
+            self._pending.discard(session_id)
+
+    def snapshot(self):
+        with self._lock:
+            return {"in_flight": self.in_flight, "max_in_flight": self.max_in_flight, "pending": len(self._pending),
+                    "session_buckets": len(self.sessions), "address_buckets": len(self.addresses)}
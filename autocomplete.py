@@ -0,0 +1,81 @@
+import re
+from collections import Counter
+
+import content
+import pages
+
+# Suggestions kept per trie node
+TOP_K = 8
+
+# Section titles rank above code identifiers that occur just as often
+TITLE_WEIGHT = 5
+
+FENCED_CODE = re.compile(r"```[\w+-]*\n(.*?)(?:```|$)", re.S)
+IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+|[a-z_$][\w$]*[A-Z][\w$]*")
+NUMBERING = re.compile(r"^\d+\.\s*")
+
+
+# Function to list (suggestion, link, weight) for every title and code identifier
+def entries(compiled):
+    counts = Counter()
+    links = {}
+    for label in pages.PAGE_LABELS:
+        page = compiled[label]
+        for section in page.sections:
+            title = NUMBERING.sub("", section.title)
+            counts[title] += TITLE_WEIGHT
+            links.setdefault(title, pages.link(label, section.title))
+            code = [e.code for e in section.examples] + FENCED_CODE.findall(section.explanation)
+            for name in IDENTIFIER.findall("\n".join(code)):
+                counts[name] += 1
+                links.setdefault(name, pages.link(label, section.title))
+    return [(text, links[text], weight) for text, weight in counts.items()]
+
+
+# Function to list the keys a suggestion is reachable from: the whole text, and the
+# start of every later word or dotted member ("Buffers", "verify" in jwt.verify)
+def _keys(text):
+    lower = text.lower()
+    starts = [0] + [m.end() for m in re.finditer(r"[\s.]+", lower)]
+    return {lower[start:] for start in starts if start < len(lower)}
+
+
+class Trie:
+    def __init__(self, items, top_k=TOP_K):
+        self.items = sorted(items, key=lambda item: (-item[2], item[0]))
+        self.top_k = top_k
+        self.root = {}
+        # Items are inserted best-first, so every node's list is already ranked
+        for item_id, (text, _link, _weight) in enumerate(self.items):
+            for key in _keys(text):
+                node = self.root
+                for char in key:
+                    node = node.setdefault(char, {})
+                    best = node.setdefault("", [])
+                    if len(best) < top_k and item_id not in best:
+                        best.append(item_id)
+        self._freeze(self.root)
+
+    # Function to turn the per-node suggestion lists into tuples to save memory
+    def _freeze(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == "":
+                    node[""] = tuple(child)
+                else:
+                    stack.append(child)
+
+    @classmethod
+    def build(cls, compiled=None):
+        return cls(entries(compiled or content.compile_all()))
+
+    # Function to return up to `limit` (suggestion, link) pairs starting with the prefix
+    def suggest(self, prefix, limit=TOP_K):
+        node = self.root
+        for char in prefix.lower().lstrip():
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self.items[item_id][:2] for item_id in node.get("", ())[:limit]]
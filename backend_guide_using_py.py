@@ -16,3 +16,7 @@ def show():
     st.write('''Happy Learning''')
 
     st.write("Ps: I don't know much about these topics, I just took the content from various sources.")
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
@@ -0,0 +1,105 @@
+# Admission control simulation on a fake clock: ordinary readers, one session toggling
+# the page radio as fast as it can, and a farm of sessions behind a single address.
+# Checks that readers are never turned away while the abusers are held to their rate
+# and the in-flight cap holds, and times one enter()/leave() pair.
+#
+#   python -m benchmarks.admission [--seconds 60] [--update]
+import heapq
+import random
+import time
+
+import admission
+import metrics
+from benchmarks.common import make_parser, report
+
+RENDER_SECONDS = 0.05
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counter(name, **labels):
+    rows = [row for row in metrics.snapshot()["counters"] if row["metric"] == name]
+    return sum(row["value"] for row in rows if all(row.get(k) == v for k, v in labels.items()))
+
+
+def simulate(seconds, seed):
+    rng = random.Random(seed)
+    clock = FakeClock()
+    gate = admission.Gate(session_rate=4, session_burst=8, address_rate=20, address_burst=40,
+                          max_in_flight=16, clock=clock)
+    # (time, session id, address, seconds between clicks)
+    clients = [("reader-%d" % i, "10.0.0.%d" % i, 3.0) for i in range(40)]
+    clients.append(("toggler", "10.0.1.1", 0.02))
+    clients += [("farm-%d" % i, "10.0.2.1", 0.5) for i in range(50)]
+    events = [(rng.uniform(0, 1), "click", client) for client in clients]
+    heapq.heapify(events)
+    served = {}
+    clicks = {}
+    peak = 0
+    while events:
+        now, kind, client = heapq.heappop(events)
+        if now > seconds:
+            break
+        clock.now = now
+        if kind == "done":
+            gate.leave()
+            continue
+        session, address, interval = client
+        clicks[session] = clicks.get(session, 0) + 1
+        if gate.enter(session, address).admitted:
+            served[session] = served.get(session, 0) + 1
+            peak = max(peak, gate.in_flight)
+            heapq.heappush(events, (now + RENDER_SECONDS, "done", client))
+        heapq.heappush(events, (now + rng.expovariate(1 / interval), "click", client))
+
+    def rate(prefix):
+        sessions = [s for s in clicks if s.startswith(prefix)]
+        return round(sum(served.get(s, 0) for s in sessions) / sum(clicks[s] for s in sessions), 3)
+
+    return {
+        "reader_served_ratio": rate("reader-"),
+        "toggler_runs_per_second": round(served.get("toggler", 0) / seconds, 2),
+        "farm_runs_per_second": round(sum(served.get(s, 0) for s in served if s.startswith("farm-")) / seconds, 2),
+        "peak_in_flight": peak,
+    }
+
+
+def main():
+    parser = make_parser("Rerun admission control")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = simulate(args.seconds, args.seed)
+    results["rejected"] = {reason: _counter("reruns_rejected_total", reason=reason)
+                           for reason in ("session", "address", "capacity")}
+    results["coalesced"] = _counter("reruns_coalesced_total")
+
+    gate = admission.Gate(max_in_flight=0)
+    n = 100000
+    start = time.perf_counter()
+    for i in range(n):
+        if gate.enter("session-%d" % (i % 500), "10.0.0.%d" % (i % 50)).admitted:
+            gate.leave()
+    results["enter_leave_us"] = round((time.perf_counter() - start) / n * 1e6, 3)
+
+    problems = []
+    if results["reader_served_ratio"] < 1:
+        problems.append("readers were turned away")
+    if results["toggler_runs_per_second"] > 4.5 or results["farm_runs_per_second"] > 21:
+        problems.append("a client exceeded its rate limit")
+    if results["peak_in_flight"] > 16:
+        problems.append("more runs in flight than the cap")
+    report("admission", {k: v for k, v in results.items() if k != "reader_served_ratio"}, args)
+    if problems:
+        raise SystemExit("; ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
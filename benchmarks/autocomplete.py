@@ -0,0 +1,44 @@
+# Memory and lookup latency of the typeahead trie.
+#
+#   python -m benchmarks.autocomplete [--update]
+import time
+import tracemalloc
+
+import autocomplete
+import content
+from benchmarks.common import make_parser, median_ms, report
+
+PREFIXES = ["s", "st", "str", "tok", "jwt.", "jwt.v", "express.s", "createR", "app.", "mongoose.c", "ev", "x"]
+
+
+def main():
+    parser = make_parser("Autocomplete trie benchmark")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    compiled = content.compile_all()
+    tracemalloc.start()
+    trie = autocomplete.Trie.build(compiled)
+    memory, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    samples = []
+    for _ in range(args.repeat):
+        for prefix in PREFIXES:
+            start = time.perf_counter()
+            trie.suggest(prefix)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    results = {
+        "suggestions": len(trie.items),
+        "build_ms": round(median_ms(lambda: autocomplete.Trie.build(compiled), 5), 3),
+        "memory_kb": round(memory / 1024, 1),
+        "lookup_p50_ms": round(samples[len(samples) // 2], 5),
+        "lookup_p99_ms": round(samples[int(len(samples) * 0.99)], 5),
+    }
+    report("autocomplete", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Bulk-write benchmark: loads generated users into a fresh SQLite file with single
+# autocommit inserts, one executemany, batched transactions and WAL single inserts.
+# Reports the time per thousand rows for each, and the estimated fsyncs.
+#
+#   python -m benchmarks.bulk_write [--rows 50000] [--batch-size 1000] [--update]
+import bulk_write
+from benchmarks.common import make_parser, report
+
+
+def main():
+    parser = make_parser("Bulk inserts: autocommit, executemany, batches, WAL")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--budget", type=float, default=5, help="seconds the single-insert and batch modes may run")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in bulk_write.MODES:
+        row = bulk_write.load(mode, args.rows, args.batch_size, budget=args.budget)
+        # Lower is better for every reported number, so the baseline check works on them
+        results[mode] = {"ms_per_1000_rows": round(1000000 / row["rows_per_second"], 3),
+                         "fsyncs_per_1000_rows": round(1000 * row["fsyncs_estimated"] / row["rows"], 2)}
+    report("bulk_write", results, args)
+
+
+if __name__ == "__main__":
+    main()
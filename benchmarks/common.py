@@ -0,0 +1,128 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+
+# Function to build the argument parser shared by every benchmark script
+def make_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative regression over the baseline (default: 0.2 = 20%%)")
+    parser.add_argument("--ci", action="store_true", default=os.environ.get("CI", "") not in ("", "0", "false"),
+                        help="fail when there is no baseline to compare against (default: on when $CI is set)")
+    return parser
+
+
+# Function to time a callable a few times and return the median in milliseconds
+def median_ms(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, name + ".json")
+
+
+def load_baseline(name):
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+# Function to list every numeric metric that grew more than `threshold` over the baseline.
+# Nested dicts are compared key by key; metrics missing from the baseline are ignored.
+def find_regressions(results, baseline, threshold, prefix=""):
+    regressions = []
+    for key, value in results.items():
+        old = baseline.get(key) if baseline else None
+        if old is None:
+            continue
+        name = prefix + key
+        if isinstance(value, dict):
+            regressions += find_regressions(value, old, threshold, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if value > old * (1 + threshold) and value - old > 1e-9:
+                regressions.append((name, old, value))
+    return regressions
+
+
+# Function to print results, then either save them or fail on regressions. `errors` is
+# the number of exceptions or failed sessions the run hit: such a run always fails, and
+# is never saved as a baseline. Without a baseline the run fails in CI mode.
+def report(name, results, args, errors=0):
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if errors:
+        print("%d errors during the run%s." % (errors, ", baseline not written" if args.update else ""))
+        sys.exit(1)
+    if args.update:
+        save_baseline(name, results)
+        print("Baseline written to " + baseline_path(name))
+        return
+    baseline = load_baseline(name)
+    if baseline is None:
+        print("No baseline for '%s' yet, run with --update to create one." % name)
+        if args.ci:
+            sys.exit(1)
+        return
+    regressions = find_regressions(results, baseline, args.threshold)
+    for metric, old, new in regressions:
+        print("REGRESSION %s: %.3f -> %.3f" % (metric, old, new))
+    if regressions:
+        sys.exit(1)
+
+
+# Function to start main.py under AppTest on the given sidebar page
+def open_page(label, timeout=60):
+    from streamlit.testing.v1 import AppTest
+
+    import settings
+
+    # AppTest reruns far faster than anyone clicks and cannot run the busy state's retry
+    # fragment, so the rate limits get a burst it never uses up (before the gate exists)
+    settings.RERUN_BURST = settings.ADDRESS_RERUN_BURST = 10 ** 6
+    at = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=timeout)
+    at.run()
+    at.sidebar.radio[0].set_value(label).run()
+    return at
+
+
+# Function to yield every leaf element currently in an AppTest tree
+def iter_elements(at):
+    stack = [at._tree]
+    while stack:
+        node = stack.pop()
+        children = getattr(node, "children", None)
+        if children is not None:
+            stack.extend(children.values())
+        else:
+            yield node
+
+
+# Function to sum the serialized protobuf size of every element sent to the browser
+def payload_bytes(at):
+    total = 0
+    for element in iter_elements(at):
+        proto = getattr(element, "proto", None)
+        if proto is not None:
+            total += len(proto.SerializeToString())
+    return total
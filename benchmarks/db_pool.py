@@ -0,0 +1,31 @@
+# Connection pool benchmark: a primary-key lookup on the lab users table, opening a
+# connection per request versus borrowing one from db_pool, for a rising number of
+# threads. Reports throughput and tail latency for each.
+#
+#   python -m benchmarks.db_pool [--workers 1,4,16,32] [--requests 5000] [--update]
+import lab_data
+import lab_load
+from benchmarks.common import make_parser, report
+
+
+def main():
+    parser = make_parser("Connection pool versus connect per request")
+    parser.add_argument("--workers", default="1,4,16,32", help="comma-separated thread counts")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    path = lab_data.users_db()
+    results = {}
+    errors = 0
+    for row in lab_load.compare_pool(path, [int(n) for n in args.workers.split(",")], args.requests, args.pool_size):
+        errors += row["errors"]
+        mode = "pool" if row["mode"].startswith("pool") else "per_request"
+        # Lower is better for every reported number, so the baseline check works on them
+        results["%s_%d_workers" % (mode, row["workers"])] = {
+            "ms_per_request": round(1000 / row["throughput"], 4), "p95_ms": row["p95_ms"], "p99_ms": row["p99_ms"]}
+    report("db_pool", results, args, errors=errors)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Diagram rendering benchmark: cold render from source against a disk-cache hit and an
+# in-memory hit, per diagram, on an empty temporary cache.
+#
+#   python -m benchmarks.diagrams [--update]
+import tempfile
+import time
+
+import diagrams
+from benchmarks.common import make_parser, median_ms, report
+
+
+def main():
+    parser = make_parser("Cold versus cached diagram rendering")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        diagrams.DIAGRAM_DIR = tmp
+        for name, (engine, source) in diagrams.sources().items():
+            key = diagrams.diagram_key(engine, source)
+            cold_ms = median_ms(lambda: diagrams.render(engine, source, key), 20)
+            diagrams.render_to_disk(name)
+
+            def disk_hit():
+                diagrams._memory.clear()
+                diagrams.get_svg(name)
+
+            disk_ms = median_ms(disk_hit, 20)
+            diagrams.get_svg(name)
+            n = 10000
+            start = time.perf_counter()
+            for _ in range(n):
+                diagrams.get_svg(name)
+            memory_us = (time.perf_counter() - start) / n * 1e6
+            results[name] = {"cold_ms": round(cold_ms, 3), "disk_ms": round(disk_ms, 3),
+                             "memory_us": round(memory_us, 3)}
+    report("diagrams", results, args)
+
+
+if __name__ == "__main__":
+    main()
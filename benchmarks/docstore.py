@@ -0,0 +1,41 @@
+# Document store benchmark: loads the generated users collection (see docstore and
+# lab_data) and runs find() through its indexes and as a full scan, for an equality,
+# a compound and a range filter. Reports ms per query and the load time.
+#
+#   python -m benchmarks.docstore [--rows 1000000] [--update]
+import os
+import time
+
+import docstore
+import lab_data
+import settings
+from benchmarks.common import make_parser, median_ms, report
+
+QUERIES = {
+    "email": {"email": "sara.ito7@example.com"},
+    "city_age": {"city": "London", "age": 30},
+    "age_range": {"age": {"$gte": 30, "$lte": 32}},
+}
+
+
+def main():
+    parser = make_parser("Indexed versus full-scan find on the document store")
+    parser.add_argument("--rows", type=int, default=10 ** 6)
+    args = parser.parse_args()
+
+    # Another size gets its own file, so the lab's collection is not regenerated
+    path = None if args.rows == settings.LAB_DOCS_ROWS else os.path.join(settings.LAB_DIR, "users-%d.docs" % args.rows)
+    path = lab_data.users_collection(args.rows, path)
+    start = time.perf_counter()
+    collection = docstore.Collection(path, lab_data.COLLECTION_INDEXES, readonly=True)
+    results = {"load": {"seconds": round(time.perf_counter() - start, 2)}}
+    for name, query in QUERIES.items():
+        results[name] = {
+            "indexed_ms": round(median_ms(lambda: collection.find(query), repeat=20), 3),
+            "scan_ms": round(median_ms(lambda: collection.find(query, hint="$natural"), repeat=3), 1),
+        }
+    report("docstore", results, args)
+
+
+if __name__ == "__main__":
+    main()
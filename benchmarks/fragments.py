@@ -0,0 +1,57 @@
+# Checks the topic selectors of the Authentication and Testing pages.
+#
+#   python -m benchmarks.fragments
+#
+# AppTest renders every topic option. AppTest starts a new script runner for each
+# run and cannot issue fragment-scoped reruns, so the "outer page is not
+# re-executed" check talks to a real server over the websocket protocol instead.
+import asyncio
+
+from benchmarks.common import open_page
+from benchmarks.ws_client import Session, running_server
+
+TOPIC_PAGES = ["Authentication", "Testing"]
+
+
+def check_topics_render():
+    for label in TOPIC_PAGES:
+        at = open_page(label)
+        assert not at.sidebar.selectbox, "%s: the topic selector must not live in the sidebar" % label
+        for option in at.selectbox[0].options:
+            at.selectbox[0].set_value(option).run()
+            assert not at.exception, "%s / %s: %s" % (label, option, at.exception)
+            assert option in [h.value for h in at.header], "%s / %s was not rendered" % (label, option)
+        print("ok  %s: %d topics render" % (label, len(at.selectbox[0].options)))
+
+
+async def check_fragment_rerun(port, label):
+    session = Session(port)
+    await session.connect()
+    try:
+        await session.rerun()
+        session.select("Go to", label)
+        await session.rerun()
+
+        topic = session.widgets["Choose an option:"]
+        assert topic.fragment_id, "%s: the topic selector is not inside a fragment" % label
+        session.select("Choose an option:", topic.options[-1])
+        result = await session.rerun(fragment_id=topic.fragment_id)
+
+        assert result.status == "FINISHED_FRAGMENT_RUN_SUCCESSFULLY", result.status
+        assert not result.exceptions, result.exceptions
+        outer = [d for d in result.deltas if d.fragment_id != topic.fragment_id]
+        assert not outer, "%s: outer page re-executed: %s" % (label, outer)
+        print("ok  %s: topic switch reran only the fragment (%d deltas)" % (label, len(result.deltas)))
+    finally:
+        await session.close()
+
+
+def main():
+    check_topics_render()
+    with running_server() as server:
+        for label in TOPIC_PAGES:
+            asyncio.run(check_fragment_rerun(server.port, label))
+
+
+if __name__ == "__main__":
+    main()
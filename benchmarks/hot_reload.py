@@ -0,0 +1,106 @@
+# Hot reload: how long a recompile + swap takes, how long until a change is visible,
+# and a check that concurrent readers never see an older revision after a newer one.
+# tests/test_hot_reload.py covers partial writes and swaps racing with other pages.
+#
+#   python -m benchmarks.hot_reload [--update] [--revisions 50]
+import os
+import re
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+import content
+import watcher
+from benchmarks.common import ROOT, make_parser, median_ms, report
+from pages import PAGES
+
+LABEL = "Express"
+REVISION = re.compile(r" \[rev (\d+)\]$")
+
+
+# Function to tag every section header of the page source with a revision number
+def write_revision(path, source, revision):
+    tagged = re.sub(r'st\.header\("(\d+\.[^"]*)"\)', r'st.header("\1 [rev %d]")' % revision, source)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(tagged)
+    os.replace(tmp, path)
+
+
+def revisions_of(page):
+    return {REVISION.search(section.title).group(1) if REVISION.search(section.title) else "0"
+            for section in page.sections}
+
+
+def main():
+    parser = make_parser("Hot reload swap time and consistency check")
+    parser.add_argument("--revisions", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--polling", action="store_true", help="use the polling fallback even if watchdog is installed")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        for module in PAGES.values():
+            shutil.copy(os.path.join(ROOT, module + ".py"), root)
+        path = os.path.join(root, PAGES[LABEL] + ".py")
+        with open(path) as f:
+            source = f.read()
+
+        store = content.ContentStore(root)
+        page = store.get(LABEL)
+        swap_ms = median_ms(lambda: store.swap(LABEL, page), 1000)
+        reload_ms = median_ms(lambda: content.compile_page(LABEL, root), 20)
+
+        content_watcher = watcher.ContentWatcher(store, interval=0.01).start(polling=args.polling)
+        stop = threading.Event()
+        stale = []
+        reads = [0]
+
+        def reader():
+            last = 0
+            while not stop.is_set():
+                seen = revisions_of(store.get(LABEL))
+                reads[0] += 1
+                current = max(int(revision) for revision in seen)
+                if len(seen) != 1 or current < last:
+                    stale.append((last, sorted(seen)))
+                last = max(last, current)
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        for thread in threads:
+            thread.start()
+
+        visible = []
+        for revision in range(1, args.revisions + 1):
+            start = time.perf_counter()
+            write_revision(path, source, revision)
+            while revisions_of(store.get(LABEL)) != {str(revision)}:
+                if time.perf_counter() - start > 10:
+                    raise SystemExit("revision %d never became visible" % revision)
+                time.sleep(0.001)
+            visible.append((time.perf_counter() - start) * 1000)
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        content_watcher.stop()
+    finally:
+        shutil.rmtree(root)
+
+    print("%d reads by %d readers, %d stale reads" % (reads[0], args.readers, len(stale)))
+    if stale:
+        raise SystemExit("readers saw revisions out of order (last seen, then got): %s" % stale[:5])
+    results = {
+        "swap_us": round(swap_ms * 1000, 3),
+        "recompile_ms": round(reload_ms, 3),
+        "visible_p50_ms": round(statistics.median(visible), 3),
+        "visible_max_ms": round(max(visible), 3),
+    }
+    report("hot_reload", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Rerun latency and websocket payload size of the "native" (st.write/st.code)
+# and "html" (pre-rendered html_cache) render paths.
+#
+#   python -m benchmarks.html_render [--update] [--pages API Authentication]
+import settings
+from benchmarks.common import make_parser, median_ms, open_page, payload_bytes, report
+
+MODES = ("native", "html")
+
+
+def measure(label, mode, repeat):
+    settings.RENDER_MODE = mode
+    at = open_page(label)
+    assert not at.exception, at.exception
+    return {
+        "rerun_ms": round(median_ms(at.run, repeat), 3),
+        "payload_bytes": payload_bytes(at),
+    }
+
+
+def main():
+    parser = make_parser("Compare the native and pre-rendered HTML render paths")
+    parser.add_argument("--pages", nargs="+", default=["API", "Authentication", "Deployment"])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for label in args.pages:
+        results[label] = {mode: measure(label, mode, args.repeat) for mode in MODES}
+        native, cached = results[label]["native"], results[label]["html"]
+        print("%-16s rerun %.1f -> %.1f ms, payload %d -> %d bytes" % (
+            label, native["rerun_ms"], cached["rerun_ms"], native["payload_bytes"], cached["payload_bytes"]))
+    report("html_render", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Load test: starts main.py on a local server and drives N concurrent simulated
+# browser sessions over the websocket protocol, replaying the usual navigation
+# (radio clicks through the Sequential Topics, topic selectbox toggles on the
+# Authentication and Testing pages). Reruns the admission gate turns away are
+# counted as rejected and left out of the throughput and latency figures.
+#
+#   python -m benchmarks.loadtest --sessions 200 --steps 20 [--update]
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import pages
+from benchmarks.common import make_parser, report
+from benchmarks.ws_client import Session, running_server
+
+TOPIC_LABEL = "Choose an option:"
+
+
+# Function to read RSS (bytes) and CPU time (seconds) of a process from /proc
+def process_usage(pid):
+    with open("/proc/%d/status" % pid) as f:
+        rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    with open("/proc/%d/stat" % pid) as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss, cpu
+
+
+async def sample_usage(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(process_usage(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Function to replay one reader: start on Home and walk forward, sometimes back,
+# flipping through topics on the pages that have them
+async def reader(port, steps, think, latencies, rejected, errors, rng):
+    def record(result):
+        if result.busy:
+            rejected.append(result.elapsed)
+        else:
+            latencies.append(result.elapsed)
+        errors.extend(result.exceptions)
+
+    session = Session(port)
+    await session.connect()
+    try:
+        record(await session.rerun())
+        position = 0
+        for _ in range(steps):
+            await asyncio.sleep(rng.uniform(0, think))
+            topic = session.widgets.get(TOPIC_LABEL)
+            if topic is not None and topic.fragment_id and rng.random() < 0.5:
+                session.select(TOPIC_LABEL, rng.choice(topic.options))
+                result = await session.rerun(fragment_id=topic.fragment_id)
+            else:
+                position = max(0, position - 1) if rng.random() < 0.1 else (position + 1) % len(pages.PAGE_LABELS)
+                session.widgets.pop(TOPIC_LABEL, None)
+                session.select("Go to", pages.PAGE_LABELS[position])
+                result = await session.rerun()
+            record(result)
+    finally:
+        await session.close()
+
+
+async def run_load(server, sessions, steps, think, ramp, seed):
+    latencies, rejected, errors, samples = [], [], [], []
+    stop = asyncio.Event()
+    sampler = asyncio.ensure_future(sample_usage(server.process.pid, samples, stop))
+    idle_rss, idle_cpu = process_usage(server.process.pid)
+
+    tasks = []
+    start = time.perf_counter()
+    for i in range(sessions):
+        rng = random.Random(seed + i)
+        tasks.append(asyncio.ensure_future(reader(server.port, steps, think, latencies, rejected, errors, rng)))
+        await asyncio.sleep(ramp / sessions)
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await sampler
+    peak_rss = max(rss for rss, _cpu in samples) if samples else idle_rss
+    _rss, end_cpu = process_usage(server.process.pid)
+    failed = [o for o in outcomes if isinstance(o, BaseException)]
+    return latencies, rejected, errors, failed, elapsed, idle_rss, peak_rss, end_cpu - idle_cpu
+
+
+def main():
+    parser = make_parser("Concurrent session load test against a local Streamlit server")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=20, help="navigation steps per session")
+    parser.add_argument("--think", type=float, default=1.0, help="max think time between steps (s)")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds to open all sessions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with running_server() as server:
+        latencies, rejected, errors, failed, elapsed, idle_rss, peak_rss, cpu = asyncio.run(
+            run_load(server, args.sessions, args.steps, args.think, args.ramp, args.seed))
+
+    latencies = sorted(ms * 1000 for ms in latencies)
+    results = {
+        "reruns": len(latencies),
+        "rejected_reruns": len(rejected),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "rerun_p50_ms": round(statistics.median(latencies), 2),
+        "rerun_p95_ms": round(latencies[int(len(latencies) * 0.95)], 2),
+        "rerun_p99_ms": round(latencies[int(len(latencies) * 0.99)], 2),
+        "server_peak_rss_mb": round(peak_rss / 2 ** 20, 1),
+        "rss_per_session_kb": round((peak_rss - idle_rss) / args.sessions / 1024, 1),
+        "cpu_ms_per_session": round(cpu * 1000 / args.sessions, 1),
+        "script_exceptions": len(errors),
+        "failed_sessions": len(failed),
+    }
+    for failure in failed[:5]:
+        print("session failed: %r" % failure)
+    report("loadtest", results, args, errors=len(errors) + len(failed))
+
+
+if __name__ == "__main__":
+    main()
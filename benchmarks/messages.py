@@ -0,0 +1,48 @@
+# Forward messages and bytes sent to the browser per page, for each render mode.
+# Runs a real server per mode and reads the websocket stream like a browser would.
+#
+#   python -m benchmarks.messages [--update] [--modes native coalesced]
+import asyncio
+
+import pages
+from benchmarks.common import make_parser, report
+from benchmarks.ws_client import Session, running_server
+
+MODES = ("native", "html", "coalesced")
+
+
+async def measure_mode(port):
+    results = {}
+    for label in pages.PAGE_LABELS:
+        session = Session(port)
+        await session.connect()
+        try:
+            await session.rerun()
+            session.select("Go to", label)
+            run = await session.rerun()
+        finally:
+            await session.close()
+        assert not run.exceptions, "%s: %s" % (label, run.exceptions)
+        results[label] = {"forward_msgs": run.messages, "bytes": run.bytes}
+    return results
+
+
+def main():
+    parser = make_parser("Forward message count and size per page and render mode")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        with running_server(env={"GUIDE_RENDER_MODE": mode}) as server:
+            results[mode] = asyncio.run(measure_mode(server.port))
+
+    print("%-20s" % "page" + "".join("%22s" % mode for mode in args.modes))
+    for label in pages.PAGE_LABELS:
+        row = ["%6d msgs %8d B" % (results[m][label]["forward_msgs"], results[m][label]["bytes"]) for m in args.modes]
+        print("%-20s" % label + "".join("%22s" % cell for cell in row))
+    report("messages", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# Pagination benchmark: fetches pages of GET /api/users from local_api at growing
+# depths with OFFSET/LIMIT and with keyset paging, on the lab users table.
+#
+#   python -m benchmarks.pagination [--depths 0,100,10000,49999] [--limit 20] [--city Oslo] [--update]
+import lab_data
+import lab_load
+from benchmarks.common import make_parser, report
+
+
+def main():
+    parser = make_parser("OFFSET versus keyset pagination")
+    parser.add_argument("--depths", default="0,100,1000,10000,49999", help="comma-separated page numbers")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--city", default=None, help="list one city newest first instead of every user by id")
+    args = parser.parse_args()
+
+    lab_data.users_db()
+    results = {}
+    for row in lab_load.compare_paging([int(n) for n in args.depths.split(",")], args.limit, args.city):
+        results["%s_page_%d" % (row["paging"], row["depth"])] = {"ms": row["ms"]}
+    report("pagination", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Build pipeline benchmark: full, no-op and one-page-edited rebuilds for a range of
+# worker counts. Every run starts from an empty cache in a fresh interpreter and
+# checks that the artifacts are identical whatever the worker count.
+#
+#   python -m benchmarks.pipeline [--workers 1,2,4,8] [--update]
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pages
+from benchmarks.common import ROOT, make_parser, report
+
+# Artifacts whose bytes must not depend on the number of workers
+ARTIFACTS = ("search_index.json", "content.shm")
+
+
+def _run(tmp, workers, force=False):
+    env = dict(os.environ, GUIDE_CACHE_DIR=os.path.join(tmp, "cache"))
+    command = [sys.executable, "-m", "pipeline", "--json", "--workers", str(workers),
+               "--root", os.path.join(tmp, "src"), "--out", os.path.join(tmp, "site")]
+    proc = subprocess.run(command + (["--force"] if force else []), cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout)
+
+
+# Function to change one sentence of the first lesson page, like an author editing a section
+def _edit_one_page(tmp):
+    path = os.path.join(tmp, "src", pages.PAGES[pages.PAGE_LABELS[0]] + ".py")
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source.replace(" the ", " the edited ", 1))
+
+
+def _digests(tmp):
+    digests = {}
+    for name in ARTIFACTS:
+        with open(os.path.join(tmp, "cache", name), "rb") as f:
+            digests[name] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def measure(workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "src"))
+        for module in pages.PAGES.values():
+            shutil.copy(os.path.join(ROOT, module + ".py"), os.path.join(tmp, "src"))
+        full = _run(tmp, workers)
+        noop = _run(tmp, workers)
+        _edit_one_page(tmp)
+        edited = _run(tmp, workers)
+        return {
+            "full_ms": full["total"]["ms"],
+            "noop_ms": noop["total"]["ms"],
+            "one_page_ms": edited["total"]["ms"],
+            "one_page_units": sum(stage["built"] for name, stage in edited.items() if "built" in stage),
+        }, _digests(tmp)
+
+
+def main():
+    parser = make_parser("Full and incremental build time against worker count")
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4, 8)),
+                        help="comma-separated worker counts")
+    args = parser.parse_args()
+
+    results = {"cpu_count": os.cpu_count()}
+    artifacts = set()
+    for workers in [int(n) for n in args.workers.split(",")]:
+        results["workers_%d" % workers], digests = measure(workers)
+        artifacts.add(json.dumps(digests, sort_keys=True))
+    if len(artifacts) != 1:
+        sys.exit("artifacts differ between worker counts: %s" % sorted(artifacts))
+    report("pipeline", results, args)
+
+
+if __name__ == "__main__":
+    main()
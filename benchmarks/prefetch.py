@@ -0,0 +1,56 @@
+# Latency of switching to the next "Sequential Topics" page, with and without the
+# background prefetch. Every measurement runs in a fresh interpreter with an empty
+# cache directory, so the next page is cold unless the prefetcher warmed it.
+#
+#   python -m benchmarks.prefetch [--update]
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pages
+from benchmarks.common import ROOT, make_parser, report
+
+SWITCH = """
+import time
+import settings
+settings.PREFETCH = %(prefetch)r
+from benchmarks.common import open_page
+import renderer
+at = open_page(%(label)r)
+if settings.PREFETCH:
+    renderer.get_prefetcher().wait(30)
+at.sidebar.radio[0].set_value(%(next)r)
+start = time.perf_counter()
+at.run()
+assert not at.exception, at.exception
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def switch_ms(label, prefetch):
+    with tempfile.TemporaryDirectory() as cache_dir:
+        script = SWITCH % {"prefetch": prefetch, "label": label, "next": pages.next_label(label)}
+        proc = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True,
+                              check=True, env=dict(os.environ, GUIDE_CACHE_DIR=cache_dir))
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = make_parser("Next-page switch latency with and without prefetch")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for label in pages.PAGE_LABELS[:-1]:
+        cold = statistics.median(switch_ms(label, False) for _ in range(args.repeat))
+        warm = statistics.median(switch_ms(label, True) for _ in range(args.repeat))
+        name = "%s -> %s" % (label, pages.next_label(label))
+        results[name] = {"cold_ms": round(cold, 3), "prefetched_ms": round(warm, 3)}
+        print("%-40s %8.1f ms -> %8.1f ms" % (name, cold, warm))
+    report("prefetch", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Renders every sidebar page (lessons and labs) and every topic option of main.py
+# through AppTest and records rerun wall time, element count and exceptions. The labs
+# run on small tables of their own, so the run stays short.
+#
+#   python -m benchmarks.render              # fail on regressions against the baseline
+#   python -m benchmarks.render --update     # record benchmarks/baselines/render.json
+import os
+import tempfile
+
+import pages
+from benchmarks.common import iter_elements, make_parser, median_ms, open_page, report
+
+
+def measure(at, repeat):
+    rerun_ms = median_ms(at.run, repeat)
+    return {
+        "rerun_ms": round(rerun_ms, 3),
+        "elements": sum(1 for _ in iter_elements(at)),
+        "exceptions": len(at.exception),
+    }
+
+
+def main():
+    parser = make_parser("AppTest render benchmark for every page of main.py")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    # Read by settings when open_page first imports it
+    os.environ.setdefault("GUIDE_LAB_USERS_ROWS", "5000")
+    os.environ.setdefault("GUIDE_LAB_DOCS_ROWS", "5000")
+    os.environ.setdefault("GUIDE_LAB_DIR", tempfile.mkdtemp(prefix="guide-render-labs-"))
+
+    results = {}
+    for label in pages.PAGE_LABELS + pages.LAB_LABELS:
+        at = open_page(label)
+        results[label] = measure(at, args.repeat)
+        # A lab's selectboxes pick its inputs, not topics
+        topics = at.selectbox[0].options if at.selectbox and label in pages.PAGES else []
+        for option in topics:
+            at.selectbox[0].set_value(option).run()
+            results["%s / %s" % (label, option)] = measure(at, args.repeat)
+
+    for name, result in results.items():
+        flag = "  EXCEPTION" if result["exceptions"] else ""
+        print("%-50s %8.1f ms %4d elements%s" % (name, result["rerun_ms"], result["elements"], flag))
+    report("render", results, args, errors=sum(result["exceptions"] for result in results.values()))
+
+
+if __name__ == "__main__":
+    main()
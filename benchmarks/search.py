@@ -0,0 +1,49 @@
+# Search index build time and BM25 query latency over the whole lesson corpus.
+#
+#   python -m benchmarks.search [--update]
+import statistics
+import time
+
+import content
+import search
+from benchmarks.common import make_parser, median_ms, report
+
+QUERIES = ["rate limiting", "jwt verify", "event loop", "createReadStream", "express static middleware",
+           "blue green canary deployment", "password hashing bcrypt", "mongodb crud", "promise async await",
+           "integration testing supertest"]
+
+# Target latency for a single query
+BUDGET_MS = 5.0
+
+
+def main():
+    parser = make_parser("Search index benchmark")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    compiled = content.compile_all()
+    build_ms = median_ms(lambda: search.SearchIndex.build(compiled), 10)
+    index = search.SearchIndex.build(compiled)
+
+    samples = []
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    results = {
+        "documents": len(index.docs),
+        "build_ms": round(build_ms, 3),
+        "query_p50_ms": round(statistics.median(samples), 4),
+        "query_p99_ms": round(samples[int(len(samples) * 0.99)], 4),
+    }
+    if results["query_p99_ms"] > BUDGET_MS:
+        print("Query p99 %.3f ms is over the %.1f ms budget" % (results["query_p99_ms"], BUDGET_MS))
+        raise SystemExit(1)
+    report("search", results, args)
+
+
+if __name__ == "__main__":
+    main()
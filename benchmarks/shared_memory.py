@@ -0,0 +1,94 @@
+# Per-worker memory with and without the shared content file: starts N worker
+# processes that each load every page, HTML fragment and the search index, either
+# into their own heap ("private") or from the memory-mapped file ("shared"), and
+# reads RSS, PSS and USS from /proc while all of them are alive.
+#
+#   python -m benchmarks.shared_memory [--workers 8] [--update]
+import multiprocessing
+import os
+import tempfile
+
+import content
+import html_cache
+import search
+import shared_store
+from benchmarks.common import make_parser, report
+
+FIELDS = {"Rss": "rss_kb", "Pss": "pss_kb", "Private_Clean": "uss_kb", "Private_Dirty": "uss_kb"}
+
+
+# Function to read this process' memory in KB. USS is what the process would free on exit.
+def memory():
+    usage = dict.fromkeys(FIELDS.values(), 0)
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in FIELDS:
+                usage[FIELDS[name]] += int(rest.split()[0])
+    return usage
+
+
+def _load(mode, path):
+    if mode == "private":
+        compiled = content.compile_all()
+        for page in compiled.values():
+            html_cache.build_page(page)
+        return compiled, search.SearchIndex.build(compiled)
+
+    shared = shared_store.SharedContent(path)
+    html_cache.use_shared(shared)
+    # Touch everything once, the way a worker does after serving every page
+    for page in shared.all().values():
+        html_cache.build_page(page)
+    index = shared.search_index()
+    index.search("event loop middleware")
+    return shared, index
+
+
+def worker(mode, path, ready, done, results):
+    before = memory()
+    loaded = _load(mode, path)
+    after = memory()
+    results.put({name: (after[name], after[name] - before[name]) for name in after})
+    ready.release()
+    done.wait()
+    del loaded
+
+
+# Function to start the workers, wait until all of them are loaded, and average their memory
+def run(mode, workers, path):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Semaphore(0)
+    done = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, path, ready, done, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for _ in processes:
+        ready.acquire()
+    done.set()
+    for process in processes:
+        process.join()
+    summary = {}
+    for name in rows[0]:
+        summary[name] = round(sum(row[name][0] for row in rows) / len(rows), 1)
+        summary[name.replace("_kb", "_content_kb")] = round(sum(row[name][1] for row in rows) / len(rows), 1)
+    return summary
+
+
+def main():
+    parser = make_parser("Per-worker memory with and without the shared content file")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = shared_store.build(path=os.path.join(tmp, "content.shm"))
+        private = run("private", args.workers, path)
+        shared = run("shared", args.workers, path)
+    results = {"private": private, "shared": shared}
+    report("shared_memory", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Soak test for session accounting and eviction: simulates many hours of readers
+# arriving, clicking around and walking away without closing the tab, on a fake
+# clock, and checks that traced memory stays flat once the reaper is running.
+#
+#   python -m benchmarks.soak [--hours 12] [--update]
+import random
+import tracemalloc
+
+import metrics
+import pages
+import sessions
+from benchmarks.common import make_parser, report
+
+# Allowed growth of traced memory between the first and the last measurement
+MAX_GROWTH = 0.1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    parser = make_parser("Session memory soak test")
+    parser.add_argument("--hours", type=float, default=12)
+    parser.add_argument("--arrivals", type=float, default=0.5, help="new sessions per simulated second")
+    parser.add_argument("--ttl", type=float, default=600)
+    parser.add_argument("--max-sessions", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clock = FakeClock()
+    live = {}  # session id -> fake session state, dropped when the reaper closes it
+    active = set()  # sessions whose reader is still clicking
+    tracker = sessions.SessionTracker(clock)
+    reaper = sessions.SessionReaper(tracker, live.pop, ttl=args.ttl, max_sessions=args.max_sessions)
+
+    ticks = int(args.hours * 3600)
+    samples = []
+    next_id = 0
+    tracemalloc.start()
+    for tick in range(ticks):
+        clock.now = float(tick)
+        if rng.random() < args.arrivals:
+            session_id = "session-%d" % next_id
+            next_id += 1
+            live[session_id] = {"page": pages.PAGE_LABELS[0], "search": "", "notes": "x" * rng.randint(0, 2000)}
+            active.add(session_id)
+            # Opening the tab runs the script once
+            metrics.record_rerun(session_id, pages.PAGE_LABELS[0])
+            tracker.touch(session_id, sessions.deep_size(live[session_id]))
+        for session_id in list(active):
+            if session_id not in live or rng.random() < 0.002:
+                active.discard(session_id)  # the reader walked away, the tab stays open
+            elif rng.random() < 0.05:
+                state = live[session_id]
+                state["page"] = rng.choice(pages.PAGE_LABELS)
+                metrics.record_rerun(session_id, state["page"])
+                tracker.touch(session_id, sessions.deep_size(state))
+        if tick % 30 == 0:
+            reaper.reap()
+        if tick % 3600 == 0 and tick:
+            samples.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    # Skip the first two hours: the process is still filling up to its steady state
+    steady = samples[2:] or samples
+    growth = (steady[-1] - steady[0]) / steady[0]
+    results = {
+        "sessions_created": next_id,
+        "sessions_alive_at_end": len(live),
+        "memory_start_kb": round(steady[0] / 1024, 1),
+        "memory_end_kb": round(steady[-1] / 1024, 1),
+    }
+    print("traced memory per simulated hour (KB): " + " ".join("%.0f" % (s / 1024) for s in samples))
+    if growth > MAX_GROWTH:
+        print("Memory grew %.0f%% over the run" % (growth * 100))
+        raise SystemExit(1)
+    report("soak", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Cold-start benchmark for main.py.
+#
+#   python -m benchmarks.startup            # compare against benchmarks/baselines/startup.json
+#   python -m benchmarks.startup --update   # record a new baseline
+#
+# Every measurement runs in a fresh interpreter so nothing is warm.
+import statistics
+import subprocess
+import sys
+
+import pages
+from benchmarks.common import ROOT, make_parser, report
+
+FIRST_RENDER = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=60).run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+print(elapsed * 1000)
+"""
+
+
+# Function to run `python -X importtime -c "import main"` and sum the self times
+def import_profile():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        imported.add(name.strip())
+    page_modules = sorted(m for m in pages.PAGES.values() if m in imported)
+    return total_us / 1000, page_modules
+
+
+def first_render_ms():
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = make_parser("Cold start benchmark for main.py")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import_times = []
+    for _ in range(args.repeat):
+        import_ms, page_modules = import_profile()
+        import_times.append(import_ms)
+    render_times = [first_render_ms() for _ in range(args.repeat)]
+
+    results = {
+        "import_ms": round(statistics.median(import_times), 3),
+        "first_render_ms": round(statistics.median(render_times), 3),
+        "page_modules_imported": len(page_modules),
+    }
+    print("Page modules imported at startup: " + ", ".join(page_modules))
+    report("startup", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Minimal client for the Streamlit websocket protocol (/_stcore/stream). Checks and
+# load tests use it when they need what a browser does: real reruns against a real
+# server, including fragment-scoped reruns that AppTest cannot issue.
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect as websocket_connect
+from websockets.exceptions import ConnectionClosed
+
+from admission import BUSY_MESSAGE
+from benchmarks.common import ROOT
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@dataclass
+class Server:
+    process: subprocess.Popen
+    port: int
+
+
+# Function to run `streamlit run main.py` on a free port until the block exits
+@contextlib.contextmanager
+def running_server(script="main.py", env=None, port=None):
+    port = port or free_port()
+    command = [sys.executable, "-m", "streamlit", "run", script,
+               "--server.headless", "true", "--server.address", "127.0.0.1",
+               "--server.port", str(port), "--browser.gatherUsageStats", "false"]
+    process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, **(env or {})),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen("http://127.0.0.1:%d/_stcore/health" % port, timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None or time.time() > deadline:
+                    raise RuntimeError("streamlit server did not start on port %d" % port)
+                time.sleep(0.2)
+        yield Server(process, port)
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+@dataclass
+class Widget:
+    id: str
+    type: str
+    label: str
+    options: tuple
+    fragment_id: str
+
+
+@dataclass
+class Delta:
+    fragment_id: str
+    type: str
+
+
+@dataclass
+class RunResult:
+    elapsed: float = 0.0
+    messages: int = 0
+    bytes: int = 0
+    status: str = ""
+    deltas: list = field(default_factory=list)
+    exceptions: list = field(default_factory=list)
+    busy: bool = False  # turned away by the admission gate, nothing was rendered
+
+
+# One simulated browser tab
+class Session:
+    def __init__(self, port, query_string=""):
+        self.url = "ws://127.0.0.1:%d/_stcore/stream" % port
+        self.query_string = query_string
+        self.page_hash = ""
+        self.widgets = {}  # label -> Widget, from the latest run
+        self.states = {}   # widget id -> WidgetState sent with every rerun
+        self.connection = None
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+
+    # Function to pick an option of a radio/selectbox by its label (the browser sends the
+    # option's text, not its index)
+    def select(self, label, option):
+        widget = self.widgets[label]
+        if option not in widget.options:
+            raise ValueError("%r is not an option of %r" % (option, label))
+        self.states[widget.id] = WidgetState(id=widget.id, string_value=option)
+
+    def _on_delta(self, msg, result):
+        kind = msg.delta.WhichOneof("type")
+        if kind != "new_element":
+            result.deltas.append(Delta(msg.delta.fragment_id, kind))
+            return
+        element = msg.delta.new_element
+        element_type = element.WhichOneof("type")
+        result.deltas.append(Delta(msg.delta.fragment_id, element_type))
+        proto = getattr(element, element_type)
+        if element_type == "exception":
+            result.exceptions.append(proto.message)
+        elif element_type == "alert" and proto.body == BUSY_MESSAGE:
+            result.busy = True
+        elif getattr(proto, "id", "") and hasattr(proto, "label"):
+            self.widgets[proto.label] = Widget(proto.id, element_type, proto.label,
+                                               tuple(getattr(proto, "options", ())), msg.delta.fragment_id)
+
+    # Function to send a rerun (optionally scoped to one fragment) and read until it finishes
+    async def rerun(self, fragment_id=""):
+        back = BackMsg()
+        state = back.rerun_script
+        state.query_string = self.query_string
+        state.page_script_hash = self.page_hash
+        state.widget_states.widgets.extend(self.states.values())
+        if fragment_id:
+            state.fragment_id = fragment_id
+
+        result = RunResult()
+        start = time.perf_counter()
+        await self.connection.send(back.SerializeToString())
+        while True:
+            try:
+                data = await self.connection.recv()
+            except ConnectionClosed:
+                raise ConnectionError("server closed the session")
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            result.messages += 1
+            result.bytes += len(data)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.page_hash = msg.new_session.main_script_hash
+            elif kind == "delta":
+                self._on_delta(msg, result)
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+                if status != "FINISHED_EARLY_FOR_RERUN":
+                    result.status = status
+                    break
+        result.elapsed = time.perf_counter() - start
+        return result
@@ -0,0 +1,92 @@
+import pandas as pd
+import streamlit as st
+
+import bulk_write
+import renderer
+import settings
+
+# Seconds between two progress refreshes while a job runs
+POLL_EVERY = 0.5
+
+
+def show_results(results):
+    if not results:
+        return
+    table = pd.DataFrame(results)
+    table["mode"] = table["mode"].map(bulk_write.MODES)
+    st.subheader("Rows per second")
+    st.bar_chart(table.set_index("mode")["rows_per_second"])
+    st.dataframe(table[["mode", "rows", "commits", "seconds", "rows_per_second", "fsyncs_estimated"]],
+                 width="stretch", hide_index=True)
+
+
+# Only this part reruns while the job is in flight; the whole page reruns once it is done
+@renderer.fragment("bulk_progress", run_every=POLL_EVERY)
+def show_progress(job):
+    status = job.status()
+    if status["finished"]:
+        st.rerun()
+    done = len(status["results"])
+    if status["current"] is not None:
+        fraction = (done + status["current_rows"] / job.rows) / len(job.modes)
+        st.progress(min(fraction, 1.0), "%s: %s rows" % (bulk_write.MODES[status["current"]],
+                                                         format(status["current_rows"], ",")))
+    if st.button("Stop"):
+        job.cancel.set()
+    show_results(status["results"])
+
+
+def show():
+    st.title("Bulk-Write Lab: Inserting Many Rows")
+    st.write("""
+    Every committed transaction has to reach the disk before the database reports success, and that flush (`fsync`) is
+    slow. Inserting rows one at a time in autocommit mode pays it for every row. This lab loads the same generated users
+    into a fresh SQLite file four ways: single autocommit inserts, one `executemany` in a single transaction, explicit
+    transactions of a chosen size, and single inserts with write-ahead logging (WAL) and `synchronous=NORMAL`.
+    """)
+    st.code("""
+    // One round trip and one commit per row: slow
+    for (const user of users) {
+      await db.query('INSERT INTO users (email, city) VALUES (?, ?)', [user.email, user.city]);
+    }
+
+    // Many rows per statement, inside one transaction
+    await db.query('START TRANSACTION');
+    await db.query('INSERT INTO users (email, city) VALUES ?', [users.map(u => [u.email, u.city])]);
+    await db.query('COMMIT');
+    """, language="javascript")
+
+    job = st.session_state.get("bulk_job")
+    running = job is not None and not job.finished.is_set()
+    with st.form("bulk-lab"):
+        rows = st.slider("Rows", 10000, 200000, 50000, step=10000)
+        batch_size = st.select_slider("Rows per transaction (batched mode)", [10, 100, 1000, 10000], value=1000)
+        submitted = st.form_submit_button("Run", disabled=running)
+
+    if submitted and not running:
+        job = bulk_write.BulkJob(rows, batch_size)
+        if not job.start(bulk_write.job_slots):
+            st.warning("Other readers are running this lab right now. Try again in a few seconds.")
+            return
+        st.session_state["bulk_job"] = job
+        running = True
+
+    if job is None:
+        return
+    if running:
+        show_progress(job)
+    else:
+        status = job.status()
+        if status["error"] is not None:
+            st.error("The run failed: %s" % status["error"])
+        show_results(status["results"])
+
+    st.caption("Single-insert and batch modes stop after %g seconds. fsync counts are estimated from the commits made "
+               "and SQLite's documented sync behaviour, not measured." % settings.BULK_TIME_BUDGET)
+    st.subheader("What to look for")
+    st.write("""
+    - Autocommit pays a full flush per row, so it manages a few thousand rows per second at best.
+    - Batching amortises that flush: past a few hundred rows per transaction the commit cost stops mattering.
+    - WAL with `synchronous=NORMAL` makes each commit an append to the log with no flush; the log is synced only at
+      checkpoints. A power cut can lose the last commits, but never corrupts the database.
+    """)
@@ -0,0 +1,182 @@
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import lab_data
+import settings
+
+INSERT = "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)"
+SCHEMA = """CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    city TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    created_at INTEGER NOT NULL
+)"""
+
+MODES = {
+    "autocommit": "Single inserts, autocommit",
+    "executemany": "executemany, one transaction",
+    "batches": "Explicit transactions of N rows",
+    "wal": "Single inserts, WAL + synchronous=NORMAL",
+}
+
+# fsyncs SQLite issues per commit with a rollback journal and synchronous=FULL (journal,
+# journal header, database file). With WAL and synchronous=NORMAL a commit does not sync;
+# only checkpoints do, two syncs (WAL and database) every WAL_AUTOCHECKPOINT pages.
+FSYNCS_PER_COMMIT = 3
+FSYNCS_PER_CHECKPOINT = 2
+WAL_AUTOCHECKPOINT = 1000
+
+# Rows between two progress reports
+REPORT_EVERY = 500
+
+
+class Cancelled(Exception):
+    pass
+
+
+# Function to estimate the fsyncs of a run from its commits, for each journal mode
+def estimated_fsyncs(mode, commits):
+    if mode == "wal":
+        # A single-row commit appends about one page to the WAL
+        return FSYNCS_PER_CHECKPOINT * (math.ceil(commits / WAL_AUTOCHECKPOINT) + 1)
+    return FSYNCS_PER_COMMIT * commits
+
+
+# Function to load up to `rows` generated users into a fresh SQLite file one way.
+# `progress(rows done)` is called every REPORT_EVERY rows; the single-insert and batch
+# modes stop early after `budget` seconds. Returns rows, commits, seconds, rows/s and fsyncs.
+def load(mode, rows, batch_size=1000, budget=None, progress=None, cancel=None, directory=None):
+    budget = settings.BULK_TIME_BUDGET if budget is None else budget
+    directory = directory or settings.LAB_DIR
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".sqlite", prefix="bulk-", dir=directory)
+    os.close(fd)
+    done = 0
+    commits = 0
+    conn = sqlite3.connect(path, isolation_level=None)
+
+    def report():
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        if progress is not None:
+            progress(done)
+
+    try:
+        if mode == "wal":
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        else:
+            conn.execute("PRAGMA synchronous = FULL")
+        conn.execute(SCHEMA)
+        source = lab_data.user_rows(rows)
+        start = time.perf_counter()
+
+        if mode in ("autocommit", "wal"):
+            for row in source:
+                conn.execute(INSERT, row)
+                done += 1
+                commits += 1
+                if done % REPORT_EVERY == 0:
+                    report()
+                    if time.perf_counter() - start > budget:
+                        break
+        elif mode == "executemany":
+            def counted():
+                nonlocal done
+                for row in source:
+                    yield row
+                    done += 1
+                    if done % REPORT_EVERY == 0:
+                        report()
+            conn.execute("BEGIN")
+            conn.executemany(INSERT, counted())
+            conn.execute("COMMIT")
+            commits = 1
+        elif mode == "batches":
+            while done < rows:
+                chunk = [row for _, row in zip(range(batch_size), source)]
+                conn.execute("BEGIN")
+                conn.executemany(INSERT, chunk)
+                conn.execute("COMMIT")
+                commits += 1
+                previous, done = done, done + len(chunk)
+                if done // REPORT_EVERY != previous // REPORT_EVERY:
+                    report()
+                if not chunk or time.perf_counter() - start > budget:
+                    break
+        else:
+            raise ValueError("unknown mode %r" % mode)
+
+        seconds = time.perf_counter() - start
+    finally:
+        conn.close()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    if progress is not None:
+        progress(done)
+    return {"mode": mode, "rows": done, "commits": commits, "seconds": round(seconds, 3),
+            "rows_per_second": round(done / seconds) if seconds else 0,
+            "fsyncs_estimated": estimated_fsyncs(mode, commits)}
+
+
+# One run of every mode on a background thread. The page polls `status()` to show
+# progress, so the script thread is never blocked by the writes.
+class BulkJob:
+    def __init__(self, rows, batch_size, modes=tuple(MODES)):
+        self.rows = rows
+        self.batch_size = batch_size
+        self.modes = list(modes)
+        self.results = []
+        self.current = None
+        self.current_rows = 0
+        self.error = None
+        self.finished = threading.Event()
+        self.cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="bulk-write-lab", daemon=True)
+
+    def start(self, slots):
+        if not slots.acquire(blocking=False):
+            return False
+        self._slots = slots
+        self._thread.start()
+        return True
+
+    def _progress(self, done):
+        with self._lock:
+            self.current_rows = done
+
+    def _run(self):
+        try:
+            for mode in self.modes:
+                with self._lock:
+                    self.current, self.current_rows = mode, 0
+                result = load(mode, self.rows, self.batch_size, progress=self._progress, cancel=self.cancel)
+                with self._lock:
+                    self.results.append(result)
+        except Cancelled:
+            pass
+        except Exception as exc:
+            self.error = exc
+        finally:
+            with self._lock:
+                self.current = None
+            self._slots.release()
+            self.finished.set()
+
+    def status(self):
+        with self._lock:
+            return {"results": list(self.results), "current": self.current, "current_rows": self.current_rows,
+                    "finished": self.finished.is_set(), "error": self.error}
+
+
+# At most this many bulk-write jobs run at once in a process
+job_slots = threading.BoundedSemaphore(settings.BULK_MAX_JOBS)
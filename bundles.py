@@ -0,0 +1,135 @@
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import types
+import zlib
+
+import content
+import settings
+from pages import PAGE_LABELS
+
+
+# Function to rebuild a Page from its JSON form
+def _page_from_dict(data):
+    sections = tuple(
+        content.Section(**dict(section, examples=tuple(content.Example(**e) for e in section["examples"])))
+        for section in data["sections"]
+    )
+    selector = data["selector"]
+    if selector is not None:
+        selector = content.Selector(**dict(selector, options=tuple(selector["options"])))
+    return content.Page(**dict(data, sections=sections, selector=selector))
+
+
+# An immutable, versioned snapshot of every page. It has the same get()/all()/version
+# interface as content.ContentStore, so the renderer can serve from either.
+class Bundle:
+    def __init__(self, version, compiled):
+        self.version = version
+        self._pages = types.MappingProxyType(dict(compiled))
+
+    def get(self, label):
+        return self._pages[label]
+
+    def all(self):
+        return dict(self._pages)
+
+    @classmethod
+    def from_pages(cls, compiled, version=None):
+        if version is None:
+            key = repr([compiled[label] for label in PAGE_LABELS])
+            version = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+        return cls(version, compiled)
+
+    def save(self, directory=None):
+        directory = directory or settings.BUNDLE_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.version + ".json")
+        data = {"version": self.version, "pages": [dataclasses.asdict(self._pages[l]) for l in PAGE_LABELS]}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        pages = [_page_from_dict(page) for page in data["pages"]]
+        return cls(data["version"], {page.label: page for page in pages})
+
+
+def available(directory=None):
+    directory = directory or settings.BUNDLE_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+
+
+# Routes each session to the stable bundle or, for `percent` % of sessions, to the
+# canary. At most two bundles are resident. The state is one tuple that is replaced
+# as a whole, so stage/promote/rollback are O(1) pointer switches.
+class BundleSelector:
+    def __init__(self, stable):
+        self._state = (stable, None, 0)
+        self._lock = threading.Lock()
+
+    @property
+    def stable(self):
+        return self._state[0]
+
+    @property
+    def canary(self):
+        return self._state[1]
+
+    @property
+    def percent(self):
+        return self._state[2]
+
+    # Function to pick the bundle for a session; a session always lands in the same bucket
+    def for_session(self, session_id):
+        stable, canary, percent = self._state
+        if canary is not None and zlib.crc32(session_id.encode("utf-8")) % 100 < percent:
+            return canary
+        return stable
+
+    def stage(self, bundle, percent):
+        with self._lock:
+            self._state = (self._state[0], bundle, max(0, min(100, int(percent))))
+
+    def set_percent(self, percent):
+        with self._lock:
+            stable, canary, _ = self._state
+            self._state = (stable, canary, max(0, min(100, int(percent))))
+
+    def promote(self):
+        with self._lock:
+            stable, canary, _ = self._state
+            if canary is not None:
+                self._state = (canary, None, 0)
+
+    def rollback(self):
+        with self._lock:
+            self._state = (self._state[0], None, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Package the current lesson content as a versioned bundle")
+    parser.add_argument("command", choices=["build", "list"])
+    parser.add_argument("--version", help="bundle name (default: content hash)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        bundle = Bundle.from_pages(content.compile_all(), args.version)
+        print("wrote " + bundle.save())
+    else:
+        for version in available():
+            print(version)
+
+
+if __name__ == "__main__":
+    main()
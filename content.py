@@ -0,0 +1,290 @@
+import ast
+import os
+import textwrap
+import threading
+from dataclasses import dataclass, field
+
+from pages import PAGES
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+QUESTIONS_HEADER = "Theoretical Questions"
+
+# Subheader text (lowercased, without the trailing colon) -> Section field
+SUBHEADER_FIELDS = {
+    "explanation": "explanation",
+    "practical use case": "use_case",
+    "assignment": "assignment",
+}
+
+# Bold labels used inside the markdown-only pages (API, Authentication, ...)
+MARKDOWN_FIELDS = [
+    ("**Explanation:**", "explanation"),
+    ("**Practical Use Case:**", "use_case"),
+    ("**Assignment:**", "assignment"),
+]
+
+
+# A code sample shown under an "Example" subheader
+@dataclass(frozen=True)
+class Example:
+    label: str
+    code: str
+    language: str = "python"
+
+
+# One numbered lesson section of a page, e.g. "3. Event Loop"
+@dataclass(frozen=True)
+class Section:
+    title: str
+    explanation: str = ""
+    examples: tuple = ()
+    use_case: str = ""
+    assignment: str = ""
+
+
+# The sub-topic selectbox used by Authentication and Testing
+@dataclass(frozen=True)
+class Selector:
+    title: str
+    label: str
+    options: tuple
+
+
+# A whole page. For pages with a selector, sections line up with selector.options.
+@dataclass(frozen=True)
+class Page:
+    label: str
+    module: str
+    title: str = ""
+    intro: str = ""
+    sections: tuple = ()
+    questions: str = ""
+    selector: Selector = None
+
+
+# Mutable helper used while a section is being collected
+@dataclass
+class _SectionBuilder:
+    title: str
+    fields: dict = field(default_factory=dict)
+    examples: list = field(default_factory=list)
+
+    def add_text(self, name, text):
+        if text:
+            old = self.fields.get(name)
+            self.fields[name] = old + "\n\n" + text if old else text
+
+    def build(self):
+        return Section(title=self.title, examples=tuple(self.examples), **self.fields)
+
+
+def _clean(text):
+    return textwrap.dedent(text).strip("\n").rstrip()
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ValueError("line %d: lesson content must be a literal" % node.lineno)
+
+
+# Function to turn `st.sidebar.title` into "sidebar.title" (None if it is not an st call)
+def _st_call_name(node):
+    if not isinstance(node, ast.Call):
+        return None
+    parts = []
+    func = node.func
+    while isinstance(func, ast.Attribute):
+        parts.append(func.attr)
+        func = func.value
+    if not isinstance(func, ast.Name) or func.id != "st" or not parts:
+        return None
+    return ".".join(reversed(parts))
+
+
+# Function to flatten a function body into ("call name", args, keywords) tuples in order
+def _calls(body):
+    calls = []
+    for stmt in body:
+        value = stmt.value if isinstance(stmt, (ast.Expr, ast.Assign)) else None
+        name = _st_call_name(value)
+        if name is None:
+            continue
+        args = [_literal(arg) for arg in value.args]
+        keywords = {kw.arg: _literal(kw.value) for kw in value.keywords}
+        calls.append((name, args, keywords))
+    return calls
+
+
+# Function to split a markdown blob on the bold field labels used by the markdown-only pages
+def _split_markdown(text):
+    positions = sorted((text.find(label), label, name) for label, name in MARKDOWN_FIELDS if label in text)
+    if not positions:
+        return [("explanation", text)]
+    parts = []
+    head = text[:positions[0][0]].strip()
+    if head:
+        parts.append(("explanation", head))
+    for i, (start, label, name) in enumerate(positions):
+        end = positions[i + 1][0] if i + 1 < len(positions) else len(text)
+        parts.append((name, _clean(text[start + len(label):end]).strip()))
+    return parts
+
+
+# Function to group st.header/subheader/write/code calls into page parts
+def _compile_calls(calls):
+    title = ""
+    intro = []
+    questions = []
+    sections = []
+    current = None
+    target = "explanation"
+    example_label = "Example"
+
+    for name, args, keywords in calls:
+        text = _clean(args[0]) if args and isinstance(args[0], str) else ""
+        if name == "title":
+            title = title or text
+        elif name == "header":
+            if text == QUESTIONS_HEADER:
+                current = None
+                target = "questions"
+            else:
+                current = _SectionBuilder(text)
+                sections.append(current)
+                target = "explanation"
+        elif name == "subheader":
+            key = text.rstrip(":").strip().lower()
+            if key.startswith("example"):
+                example_label = text.rstrip(":")
+            else:
+                target = SUBHEADER_FIELDS.get(key, "explanation")
+        elif name in ("write", "markdown"):
+            if not text or text == "---":
+                continue
+            if target == "questions":
+                questions.append(text)
+            elif current is None:
+                intro.append(text)
+            elif target == "explanation" and "**" in text:
+                for field_name, part in _split_markdown(text):
+                    current.add_text(field_name, part)
+            else:
+                current.add_text(target, text)
+        elif name == "code" and current is not None:
+            language = keywords.get("language", args[1] if len(args) > 1 else "python")
+            current.examples.append(Example(example_label, _clean(args[0]), language))
+
+    return title, "\n\n".join(intro), [s.build() for s in sections], "\n\n".join(questions)
+
+
+# Function to find `if option == "X": display_x()` branches, returning {"X": "display_x"}
+def _option_targets(body):
+    targets = {}
+    for stmt in body:
+        while isinstance(stmt, ast.If):
+            test = stmt.test
+            if (isinstance(test, ast.Compare) and isinstance(test.comparators[0], ast.Constant)
+                    and isinstance(stmt.body[0], ast.Expr) and isinstance(stmt.body[0].value, ast.Call)):
+                targets[test.comparators[0].value] = stmt.body[0].value.func.id
+            stmt = stmt.orelse[0] if stmt.orelse else None
+    return targets
+
+
+# Function to tell whether a statement is the `if __name__ == "__main__":` block every
+# lesson module ends with
+def _is_main_guard(stmt):
+    return (isinstance(stmt, ast.If) and isinstance(stmt.test, ast.Compare)
+            and isinstance(stmt.test.left, ast.Name) and stmt.test.left.id == "__name__")
+
+
+# Function to compile one page module's show() into a Page without importing the module.
+# A module that does not end with its main block was cut short, even if what is left parses.
+def compile_source(label, module, source):
+    tree = ast.parse(source, filename=module + ".py")
+    if not tree.body or not _is_main_guard(tree.body[-1]):
+        raise ValueError('%s.py does not end with its `if __name__ == "__main__":` block, it is incomplete' % module)
+    show = next((node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "show"), None)
+    if show is None:
+        raise ValueError("%s.py has no show() function" % module)
+
+    calls = _calls(show.body)
+    title, intro, sections, questions = _compile_calls(calls)
+
+    # The topic selectbox lives either in show() itself or in a nested (fragment) function
+    helpers = {node.name: node for node in show.body if isinstance(node, ast.FunctionDef)}
+    selector_body = show.body
+    for helper in helpers.values():
+        if any(c[0].endswith("selectbox") for c in _calls(helper.body)):
+            selector_body = helper.body
+    selector_calls = _calls(selector_body)
+
+    selectbox = next((c for c in selector_calls if c[0].endswith("selectbox")), None)
+    selector = None
+    if selectbox is not None:
+        targets = _option_targets(selector_body)
+        options = tuple(selectbox[1][1])
+        sections = []
+        for option in options:
+            helper = helpers.get(targets.get(option))
+            if helper is None:
+                raise ValueError("%s.py: option %r is not wired to a display function" % (module, option))
+            sections += _compile_calls(_calls(helper.body))[2]
+        selector_title = next((c[1][0] for c in selector_calls if c[0] in ("sidebar.title", "subheader")), "")
+        selector = Selector(selector_title, selectbox[1][0], options)
+
+    return Page(label=label, module=module, title=title, intro=intro, sections=tuple(sections),
+                questions=questions, selector=selector)
+
+
+# Function to compile a page from its source file. A file that stops mid-line or before
+# its final main block is still being written (or was cut short), even when what is
+# there happens to parse.
+def compile_page(label, root=ROOT):
+    module = PAGES[label]
+    with open(os.path.join(root, module + ".py"), encoding="utf-8") as f:
+        source = f.read()
+    if not source.endswith("\n"):
+        raise ValueError("%s.py ends mid-line, it is incomplete" % module)
+    return compile_source(label, module, source)
+
+
+def compile_all(root=ROOT):
+    return {label: compile_page(label, root) for label in PAGES}
+
+
+# Compiled pages for one process. Pages are compiled the first time they are asked for.
+# Pages are immutable and swap() replaces the whole mapping, so a reader always gets
+# either the old or the new version of a page, never a mix.
+class ContentStore:
+    name = "live"
+
+    def __init__(self, root=ROOT):
+        self.root = root
+        self.version = 0
+        self.on_swap = []  # callbacks called with the label of each swapped page
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, label):
+        page = self._pages.get(label)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(label)
+                if page is None:
+                    page = compile_page(label, self.root)
+                    self._pages = dict(self._pages, **{label: page})
+        return page
+
+    # Function to return every page, compiling the missing ones
+    def all(self):
+        return {label: self.get(label) for label in PAGES}
+
+    def swap(self, label, page):
+        with self._lock:
+            self._pages = dict(self._pages, **{label: page})
+            self.version += 1
+        for callback in self.on_swap:
+            callback(label)
@@ -139,3 +139,7 @@ def show():
     4. Why is data modeling important, and how does it differ between SQL and NoSQL?
     5. What are the trade-offs of using an unstructured data model in MongoDB versus a structured model in MySQL?
     """)
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
@@ -0,0 +1,175 @@
+import collections
+import contextlib
+import sqlite3
+import threading
+import time
+
+import metrics
+import settings
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PoolClosed(Exception):
+    pass
+
+
+# Function to check a connection is still usable before handing it out
+def ping(conn):
+    try:
+        conn.execute("SELECT 1").fetchone()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+# A fixed set of open connections shared by threads. Connections are created on demand
+# up to max_size (min_size are opened up front), checked with `check` when they have
+# been idle for check_after seconds, and acquire() waits up to `timeout` seconds for
+# one to come back before raising PoolTimeout.
+class ConnectionPool:
+    def __init__(self, connect, min_size=None, max_size=None, timeout=None, check=ping, check_after=None,
+                 name="default", clock=time.monotonic):
+        self._connect = connect
+        self.min_size = settings.DB_POOL_MIN if min_size is None else min_size
+        self.max_size = settings.DB_POOL_MAX if max_size is None else max_size
+        self.timeout = settings.DB_POOL_TIMEOUT if timeout is None else timeout
+        self.check = check
+        self.check_after = settings.DB_POOL_CHECK_AFTER if check_after is None else check_after
+        self.name = name
+        self.clock = clock
+        self._idle = collections.deque()  # (connection, time it was returned), most recent last
+        self._size = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+        self.stats = collections.Counter()
+        for _ in range(self.min_size):
+            self._idle.append((self._open(), self.clock()))
+
+    def _open(self):
+        conn = self._connect()
+        with self._available:
+            self._size += 1
+            self.stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with contextlib.suppress(sqlite3.Error):
+            conn.close()
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = self.clock() + timeout
+        start = time.perf_counter()
+        while True:
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise PoolClosed("pool %r is closed" % self.name)
+                    if self._idle:
+                        conn, returned = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        conn = returned = None
+                        self._size += 1  # reserved now, opened outside the lock
+                        break
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        metrics.increment("db_pool_timeouts_total", pool=self.name)
+                        raise PoolTimeout("no connection free in pool %r after %.1f s" % (self.name, timeout))
+                    self.stats["waits"] += 1
+                    self._available.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+                with self._available:
+                    self.stats["created"] += 1
+            elif self.clock() - returned >= self.check_after and not self.check(conn):
+                metrics.increment("db_pool_health_failures_total", pool=self.name)
+                with self._available:
+                    self.stats["health_failures"] += 1
+                self._discard(conn)
+                continue
+            metrics.observe("db_pool_wait_ms", (time.perf_counter() - start) * 1000, pool=self.name)
+            return conn
+
+    # Function to give a connection back. A connection left inside a transaction is rolled
+    # back; one that cannot be is closed and replaced later.
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+        if broken or self._closed:
+            self._discard(conn)
+            return
+        with self._available:
+            self._idle.append((conn, self.clock()))
+            self._available.notify()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            self.release(conn, broken=not ping(conn))
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._available.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def snapshot(self):
+        with self._available:
+            return dict(self.stats, name=self.name, size=self._size, idle=len(self._idle),
+                        in_use=self._size - len(self._idle), max_size=self.max_size)
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+# Function to return the process-wide pool for a SQLite file, creating it on first use.
+# Every database-backed feature goes through here, so they share connections.
+def for_database(path, readonly=True, **options):
+    key = (path, readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(key)
+            if pool is None:
+                uri = "file:%s?mode=%s" % (path, "ro" if readonly else "rwc")
+                pool = _pools[key] = ConnectionPool(
+                    lambda: sqlite3.connect(uri, uri=True, check_same_thread=False),
+                    name="%s%s" % (path.rsplit("/", 1)[-1], "" if readonly else ":rw"), **options)
+    return pool
+
+
+def pools():
+    with _lock:
+        return list(_pools.values())
@@ -0,0 +1,359 @@
+import collections
+import functools
+import hashlib
+import html
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+import metrics
+import settings
+
+# Bump when the SVG produced below changes, so old cache entries are not reused
+RENDERER_VERSION = "1"
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "diagrams")
+DIAGRAM_DIR = os.path.join(settings.CACHE_DIR, "diagrams")
+
+# File extension -> engine. "flowchart" is the Mermaid flowchart subset rendered below;
+# "dot" sources need Graphviz's `dot` on the PATH.
+ENGINES = {".mmd": "flowchart", ".dot": "dot"}
+
+# (page label, section title) -> diagrams shown at the end of that section
+SECTIONS = {
+    ("Js Fundamentals", "3. Event Loop"): ("event-loop",),
+    ("Express", "2. Middleware Functions"): ("express-middleware",),
+    ("Deployment", "1. Deployment"): ("blue-green", "canary"),
+}
+
+SHAPES = [
+    ("stadium", r'\(\[(?:"[^"]*"|[^\]]*)\]\)'),
+    ("rect", r'\[(?:"[^"]*"|[^\]]*)\]'),
+    ("diamond", r'\{(?:"[^"]*"|[^}]*)\}'),
+    ("round", r'\((?:"[^"]*"|[^)]*)\)'),
+]
+NODE = re.compile(r"\s*([A-Za-z_][\w-]*)\s*(%s)?" % "|".join(pattern for _, pattern in SHAPES))
+EDGE = re.compile(r'\s*(-->|-\.->)\s*(?:\|("[^"]*"|[^|]*)\|)?')
+HEADER = re.compile(r"^(?:flowchart|graph)\s+(TD|TB|LR)\s*$")
+
+FONT_SIZE = 13
+CHAR_WIDTH = 7.2
+NODE_HEIGHT = 40
+LAYER_GAP = 64
+NODE_GAP = 36
+LOOP_OFFSET = 70
+MARGIN = 16
+
+_memory = collections.OrderedDict()  # cache key -> SVG, least recently used first
+_lock = threading.Lock()
+_warmed = [False]
+
+
+def _label(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        text = text[1:-1]
+    return text
+
+
+# Function to parse a flowchart into (direction, {id: (label, shape)}, [(from, to, label, dashed)])
+def parse_flowchart(source):
+    lines = [line.split("%%")[0].rstrip() for line in source.splitlines()]
+    lines = [line for line in lines if line.strip()]
+    header = HEADER.match(lines[0].strip()) if lines else None
+    if header is None:
+        raise ValueError("a flowchart starts with `flowchart TD` or `flowchart LR`")
+    nodes = {}
+    edges = []
+
+    def node(match):
+        node_id, shape_text = match.group(1), match.group(2)
+        if shape_text:
+            shape = next(name for name, pattern in SHAPES if re.fullmatch(pattern, shape_text))
+            inner = shape_text[2:-2] if shape == "stadium" else shape_text[1:-1]
+            nodes[node_id] = (_label(inner), shape)
+        elif node_id not in nodes:
+            nodes[node_id] = (node_id, "rect")
+        return node_id
+
+    for number, line in enumerate(lines[1:], 2):
+        match = NODE.match(line)
+        if match is None:
+            raise ValueError("line %d: expected a node: %r" % (number, line))
+        previous = node(match)
+        position = match.end()
+        while position < len(line):
+            arrow = EDGE.match(line, position)
+            target = arrow and NODE.match(line, arrow.end())
+            if not target:
+                raise ValueError("line %d: expected `--> node`: %r" % (number, line))
+            current = node(target)
+            edges.append((previous, current, _label(arrow.group(2) or ""), arrow.group(1) == "-.->"))
+            previous = current
+            position = target.end()
+    return "TD" if header.group(1) == "TB" else header.group(1), nodes, edges
+
+
+# Function to split edges into forward edges and the back edges that close a cycle
+def _back_edges(nodes, edges):
+    children = collections.defaultdict(list)
+    for edge in edges:
+        children[edge[0]].append(edge)
+    back = set()
+    state = {}  # node id -> "open" while on the DFS stack, "done" after
+    for root in nodes:
+        if root in state:
+            continue
+        state[root] = "open"
+        stack = [(root, iter(children[root]))]
+        while stack:
+            node_id, pending = stack[-1]
+            edge = next(pending, None)
+            if edge is None:
+                state[node_id] = "done"
+                stack.pop()
+            elif state.get(edge[1]) == "open":
+                back.add(edge)
+            elif edge[1] not in state:
+                state[edge[1]] = "open"
+                stack.append((edge[1], iter(children[edge[1]])))
+    return back
+
+
+def _size(label, shape):
+    width = max(72, len(label) * CHAR_WIDTH + 28)
+    if shape == "diamond":
+        return width + 36, NODE_HEIGHT + 16
+    return width, NODE_HEIGHT
+
+
+# Function to lay out and draw a flowchart: nodes in layers by longest path, edges as
+# straight lines between layers and curves around the side for loops
+def flowchart_to_svg(source, marker_id="arrow"):
+    direction, nodes, edges = parse_flowchart(source)
+    back = _back_edges(nodes, edges)
+    forward = [edge for edge in edges if edge not in back]
+
+    layer = dict.fromkeys(nodes, 0)
+    for _ in nodes:
+        for start, end, _label_text, _dashed in forward:
+            layer[end] = max(layer[end], layer[start] + 1)
+    layers = collections.defaultdict(list)
+    for node_id in nodes:
+        layers[layer[node_id]].append(node_id)
+
+    # Order every layer by the average position of its parents, to cut down on crossings
+    order = {}
+    for depth in sorted(layers):
+        declared = {node_id: i for i, node_id in enumerate(layers[depth])}
+
+        def barycenter(node_id):
+            parents = [order[e[0]] for e in forward if e[1] == node_id and e[0] in order]
+            return sum(parents) / len(parents) if parents else declared[node_id]
+        layers[depth].sort(key=barycenter)
+        order.update((node_id, i) for i, node_id in enumerate(layers[depth]))
+
+    sizes = {node_id: _size(*nodes[node_id]) for node_id in nodes}
+    across = 0 if direction == "TD" else 1  # axis nodes of one layer are spread along
+    spans = {d: sum(sizes[n][across] for n in ids) + NODE_GAP * (len(ids) - 1) for d, ids in layers.items()}
+    depths = {d: max(sizes[n][1 - across] for n in ids) for d, ids in layers.items()}
+    breadth = max(spans.values())
+
+    centers = {}
+    offset = MARGIN
+    for depth in sorted(layers):
+        position = MARGIN + (breadth - spans[depth]) / 2
+        for node_id in layers[depth]:
+            along = position + sizes[node_id][across] / 2
+            middle = offset + depths[depth] / 2
+            centers[node_id] = (along, middle) if direction == "TD" else (middle, along)
+            position += sizes[node_id][across] + NODE_GAP
+        offset += depths[depth] + LAYER_GAP
+
+    # Loops and edges that skip a layer go around the side, clear of the nodes in between
+    loops = [edge for edge in edges if edge in back or abs(layer[edge[1]] - layer[edge[0]]) != 1]
+    pad = LOOP_OFFSET if loops else 0  # room for the curves at either side
+    if direction == "TD":
+        centers = {node_id: (x + pad, y) for node_id, (x, y) in centers.items()}
+    else:
+        centers = {node_id: (x, y + pad) for node_id, (x, y) in centers.items()}
+    extent = offset - LAYER_GAP + MARGIN
+    width = breadth + 2 * (MARGIN + pad) if direction == "TD" else extent
+    height = extent if direction == "TD" else breadth + 2 * (MARGIN + pad)
+    middle = pad + MARGIN + breadth / 2
+
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 %d %d" width="%d" height="%d" '
+        'font-family="-apple-system, Segoe UI, Roboto, sans-serif" font-size="%d" role="img">'
+        % (width, height, width, height, FONT_SIZE),
+        '<defs><marker id="%s" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" '
+        'orient="auto-start-reverse"><path d="M0,0L10,5L0,10z" fill="#262730"/></marker></defs>' % marker_id,
+    ]
+
+    def anchor(node_id, side):
+        x, y = centers[node_id]
+        w, h = sizes[node_id]
+        return {"top": (x, y - h / 2), "bottom": (x, y + h / 2), "left": (x - w / 2, y),
+                "right": (x + w / 2, y)}[side]
+
+    for edge in edges:
+        start, end, text, dashed = edge
+        style = ' stroke-dasharray="5,4"' if dashed else ""
+        if edge in loops:
+            along = centers[start][across]
+            if direction == "TD":
+                side = "right" if along >= middle else "left"
+            else:
+                side = "bottom" if along >= middle else "top"
+            (x1, y1), (x2, y2) = anchor(start, side), anchor(end, side)
+            # Clear every node in the layers the edge passes
+            low, high = sorted((layer[start], layer[end]))
+            passed = [n for n in nodes if low <= layer[n] <= high]
+            if side in ("right", "bottom"):
+                edge_at = max(centers[n][across] + sizes[n][across] / 2 for n in passed) + LOOP_OFFSET
+            else:
+                edge_at = min(centers[n][across] - sizes[n][across] / 2 for n in passed) - LOOP_OFFSET
+            controls = (edge_at, y1, edge_at, y2) if direction == "TD" else (x1, edge_at, x2, edge_at)
+            path = "M%.1f,%.1f C%.1f,%.1f %.1f,%.1f %.1f,%.1f" % ((x1, y1) + controls + (x2, y2))
+            # Point of the curve at t = 0.5
+            label_at = ((x1 + x2) / 8 + (controls[0] + controls[2]) * 3 / 8,
+                        (y1 + y2) / 8 + (controls[1] + controls[3]) * 3 / 8)
+        else:
+            sides = ("bottom", "top") if direction == "TD" else ("right", "left")
+            (x1, y1), (x2, y2) = anchor(start, sides[0]), anchor(end, sides[1])
+            path = "M%.1f,%.1f L%.1f,%.1f" % (x1, y1, x2, y2)
+            label_at = ((x1 + x2) / 2, (y1 + y2) / 2)
+        parts.append('<path d="%s" fill="none" stroke="#262730" stroke-width="1.3"%s marker-end="url(#%s)"/>'
+                     % (path, style, marker_id))
+        if text:
+            w = len(text) * CHAR_WIDTH * 0.9 + 8
+            parts.append('<rect x="%.1f" y="%.1f" width="%.1f" height="18" fill="#ffffff"/>'
+                         % (label_at[0] - w / 2, label_at[1] - 9, w))
+            parts.append('<text x="%.1f" y="%.1f" text-anchor="middle" dominant-baseline="central" '
+                         'font-size="%d" fill="#555867">%s</text>'
+                         % (label_at[0], label_at[1], FONT_SIZE - 2, html.escape(text)))
+
+    for node_id, (text, shape) in nodes.items():
+        x, y = centers[node_id]
+        w, h = sizes[node_id]
+        if shape == "diamond":
+            parts.append('<polygon points="%.1f,%.1f %.1f,%.1f %.1f,%.1f %.1f,%.1f" fill="#fff4e5" stroke="#262730"/>'
+                         % (x, y - h / 2, x + w / 2, y, x, y + h / 2, x - w / 2, y))
+        else:
+            radius = {"stadium": h / 2, "round": 10}.get(shape, 4)
+            fill = "#e8f0fe" if shape == "stadium" else "#f0f2f6"
+            parts.append('<rect x="%.1f" y="%.1f" width="%.1f" height="%.1f" rx="%.1f" fill="%s" stroke="#262730"/>'
+                         % (x - w / 2, y - h / 2, w, h, radius, fill))
+        parts.append('<text x="%.1f" y="%.1f" text-anchor="middle" dominant-baseline="central" fill="#262730">%s</text>'
+                     % (x, y, html.escape(text)))
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+# Function to render a Graphviz source with the `dot` binary
+def dot_to_svg(source):
+    if shutil.which("dot") is None:
+        raise RuntimeError("Graphviz is not installed: `dot` is not on the PATH")
+    svg = subprocess.run(["dot", "-Tsvg"], input=source, capture_output=True, text=True, check=True).stdout
+    # Drop the XML prologue and doctype, the SVG is served inline
+    return svg[svg.index("<svg"):]
+
+
+def render(engine, source, key=""):
+    if engine == "dot":
+        return dot_to_svg(source)
+    return flowchart_to_svg(source, "arrow-" + key[:12])
+
+
+@functools.lru_cache(maxsize=None)
+def sources():
+    found = {}
+    if os.path.isdir(SOURCE_DIR):
+        for name in sorted(os.listdir(SOURCE_DIR)):
+            stem, extension = os.path.splitext(name)
+            if extension in ENGINES:
+                with open(os.path.join(SOURCE_DIR, name), encoding="utf-8") as f:
+                    found[stem] = (ENGINES[extension], f.read())
+    return found
+
+
+def diagram_key(engine, source):
+    key = "\x00".join([RENDERER_VERSION, engine, source])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(DIAGRAM_DIR, key + ".svg")
+
+
+def _remember(key, svg):
+    with _lock:
+        _memory[key] = svg
+        _memory.move_to_end(key)
+        while len(_memory) > settings.DIAGRAM_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+# Function to render a diagram and write it to the disk cache
+def render_to_disk(name):
+    engine, source = sources()[name]
+    key = diagram_key(engine, source)
+    svg = render(engine, source, key)
+    os.makedirs(DIAGRAM_DIR, exist_ok=True)
+    tmp = "%s.%d.%d.tmp" % (_path(key), os.getpid(), threading.get_ident())
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(svg)
+    os.replace(tmp, _path(key))
+    return svg
+
+
+# Function to return a diagram's SVG from memory or disk. Before warm() has run a miss
+# is rendered; after it a miss returns None, so nothing is rendered on the request path.
+def get_svg(name):
+    engine, source = sources()[name]
+    key = diagram_key(engine, source)
+    with _lock:
+        svg = _memory.get(key)
+        if svg is not None:
+            _memory.move_to_end(key)
+            return svg
+    if os.path.exists(_path(key)):
+        with open(_path(key), encoding="utf-8") as f:
+            svg = f.read()
+    elif _warmed[0]:
+        metrics.increment("diagram_misses_total", diagram=name)
+        return None
+    else:
+        svg = render_to_disk(name)
+    _remember(key, svg)
+    return svg
+
+
+# Function to render every diagram missing from the disk cache and load them into memory.
+# Returns the names that had to be rendered.
+def warm(names=None):
+    rendered = []
+    for name in names or sources():
+        engine, source = sources()[name]
+        if not os.path.exists(_path(diagram_key(engine, source))):
+            render_to_disk(name)
+            rendered.append(name)
+        get_svg(name)
+    _warmed[0] = True
+    return rendered
+
+
+def stale():
+    return [name for name, (engine, source) in sources().items() if not os.path.exists(_path(diagram_key(engine, source)))]
+
+
+def section_diagrams(page_label, section_title):
+    return SECTIONS.get((page_label, section_title), ())
+
+
+if __name__ == "__main__":
+    for name in warm():
+        print("rendered " + name)
+    print("%d diagrams cached in %s" % (len(sources()), DIAGRAM_DIR))
@@ -0,0 +1,469 @@
+import bisect
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from array import array
+
+# A small embedded document store, standing in for MongoDB in the labs. A collection is
+# one append-only log of JSON lines: an insert or update appends the whole new document,
+# a delete appends {"$delete": _id}. Opening a collection replays the log; only the offset
+# of each live document and the secondary indexes are kept in memory, and documents are
+# read back from the file when a query needs them.
+
+RANGE_OPERATORS = {
+    "$gt": lambda value, bound: value > bound,
+    "$gte": lambda value, bound: value >= bound,
+    "$lt": lambda value, bound: value < bound,
+    "$lte": lambda value, bound: value <= bound,
+}
+
+
+class DuplicateKeyError(Exception):
+    pass
+
+
+class ReadOnlyCollection(Exception):
+    pass
+
+
+# Sort bracket of each indexable type: values of different brackets never compare in a
+# range query, as in MongoDB. Documents come from JSON, so exact types are enough.
+BRACKETS = {int: "number", float: "number", str: "string"}
+
+_decode = json.JSONDecoder().decode
+
+
+# Function to return a value's sort bracket, or None for values indexes skip
+def bracket(value):
+    return BRACKETS.get(type(value))
+
+
+# Function to compare for equality the way the indexes do: true and 1 are not equal,
+# since a boolean is not a number
+def same(value, other):
+    return value == other and (type(value) is bool) == (type(other) is bool)
+
+
+# Function to split a filter condition into {operator: operand}; a plain value means $eq
+def operators(condition):
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        return condition
+    return {"$eq": condition}
+
+
+def _test(operator, bound):
+    if operator == "$eq":
+        return lambda value: same(value, bound)
+    if operator == "$ne":
+        return lambda value: not same(value, bound)
+    if operator in ("$in", "$nin"):
+        if not isinstance(bound, list):
+            raise ValueError("%s needs an array" % operator)
+        if operator == "$in":
+            return lambda value: any(same(value, item) for item in bound)
+        return lambda value: not any(same(value, item) for item in bound)
+    if operator in RANGE_OPERATORS:
+        name, compare = bracket(bound), RANGE_OPERATORS[operator]
+        if name is None:
+            raise ValueError("%s needs a number or a string" % operator)
+        return lambda value: BRACKETS.get(type(value)) == name and compare(value, bound)
+    raise ValueError("unsupported query operator %r" % operator)
+
+
+# Function to turn a filter into a test for documents: {"field": value} for equality, or
+# {"field": {"$gt": 1, "$lt": 5}} with $eq, $ne, $gt, $gte, $lt, $lte, $in and $nin.
+# Every field must match; a missing field only matches None. Built once per query, so
+# a scan does not re-read the filter for every document.
+def compile_query(query):
+    if not isinstance(query, dict):
+        raise ValueError("a filter must be a document, not %s" % type(query).__name__)
+    for field in query:
+        if field.startswith("$"):
+            raise ValueError("unsupported query operator %r" % field)
+    tests = [(field, _test(operator, bound)) for field, condition in query.items()
+             for operator, bound in operators(condition).items()]
+    return lambda doc: all(test(doc.get(field)) for field, test in tests)
+
+
+# Function to apply an update document: {"$set": {...}}, {"$unset": {...}}, {"$inc": {...}},
+# or a plain document of fields to set (what mongoose sends for updateOne(filter, {age: 35})).
+def apply_update(doc, update):
+    if not isinstance(update, dict):
+        raise ValueError("an update must be a document, not %s" % type(update).__name__)
+    if not any(key.startswith("$") for key in update):
+        update = {"$set": update}
+    updated = dict(doc)
+    for operator, fields in update.items():
+        if not isinstance(fields, dict):
+            raise ValueError("%s needs a document of fields" % operator)
+        if "_id" in fields:
+            raise ValueError("the _id field cannot be updated")
+        if operator == "$set":
+            updated.update(fields)
+        elif operator == "$unset":
+            for field in fields:
+                updated.pop(field, None)
+        elif operator == "$inc":
+            for field, amount in fields.items():
+                current = updated.get(field, 0)
+                if bracket(amount) != "number" or bracket(current) != "number":
+                    raise ValueError("$inc needs numbers, not %r and %r" % (current, amount))
+                updated[field] = current + amount
+        else:
+            raise ValueError("unsupported update operator %r" % operator)
+    return updated
+
+
+# Equality index: value -> slot, or a list of slots when several documents share it
+class HashIndex:
+    kind = "hash"
+
+    def __init__(self, field):
+        self.field = field
+        self._entries = {}
+
+    def add(self, value, slot):
+        if type(value) not in BRACKETS:
+            return
+        current = self._entries.get(value)
+        if current is None:
+            self._entries[value] = slot
+        elif isinstance(current, list):
+            current.append(slot)
+        else:
+            self._entries[value] = [current, slot]
+
+    def remove(self, value, slot):
+        current = self._entries.get(value) if bracket(value) is not None else None
+        if current is None:
+            return
+        if isinstance(current, list):
+            current.remove(slot)
+            if len(current) == 1:
+                self._entries[value] = current[0]
+        elif current == slot:
+            del self._entries[value]
+
+    def lookup(self, value):
+        current = self._entries.get(value)
+        if current is None:
+            return []
+        return list(current) if isinstance(current, list) else [current]
+
+    def finish(self):
+        pass
+
+
+# Range index: for each bracket, values kept sorted next to their slots
+class SortedIndex:
+    kind = "sorted"
+
+    def __init__(self, field):
+        self.field = field
+        self._brackets = {}  # bracket -> (sorted values, slots in the same order)
+        self._pending = {}  # bracket -> {slot: value} while the log is replayed, sorted once by finish()
+
+    def add(self, value, slot):
+        name = BRACKETS.get(type(value))
+        if name is None:
+            return
+        if self._pending is not None:
+            self._pending.setdefault(name, {})[slot] = value
+            return
+        values, slots = self._brackets.setdefault(name, ([], array("q")))
+        position = bisect.bisect_right(values, value)
+        values.insert(position, value)
+        slots.insert(position, slot)
+
+    def remove(self, value, slot):
+        if self._pending is not None:
+            self._pending.get(bracket(value), {}).pop(slot, None)
+            return
+        values, slots = self._brackets.get(bracket(value), ([], ()))
+        start, end = bisect.bisect_left(values, value), bisect.bisect_right(values, value)
+        for position in range(start, end):
+            if slots[position] == slot:
+                del values[position]
+                del slots[position]
+                return
+
+    # Called once the log has been replayed, so loading sorts each bracket once
+    def finish(self):
+        for name, pending in (self._pending or {}).items():
+            order = sorted(pending, key=pending.__getitem__)
+            self._brackets[name] = ([pending[slot] for slot in order], array("q", order))
+        self._pending = None
+
+    def lookup(self, value):
+        return self.range({"$gte": value, "$lte": value})
+
+    # Function to return the slots whose value satisfies every range operator given
+    def range(self, bounds):
+        names = {bracket(bound) for bound in bounds.values()}
+        if len(names) != 1 or None in names:
+            return []
+        values, slots = self._brackets.get(names.pop(), ([], ()))
+        start, end = 0, len(values)
+        for operator, bound in bounds.items():
+            if operator == "$gt":
+                start = max(start, bisect.bisect_right(values, bound))
+            elif operator == "$gte":
+                start = max(start, bisect.bisect_left(values, bound))
+            elif operator == "$lt":
+                end = min(end, bisect.bisect_left(values, bound))
+            elif operator == "$lte":
+                end = min(end, bisect.bisect_right(values, bound))
+        return list(slots[start:end]) if start < end else []
+
+
+INDEX_KINDS = {"hash": HashIndex, "sorted": SortedIndex}
+
+
+class Collection:
+    def __init__(self, path, indexes=None, readonly=False, sync=False):
+        self.path = path
+        self.readonly = readonly
+        self.sync = sync
+        self.index_kinds = dict(indexes or {})
+        # Read-only collections never change once loaded, so their readers need no lock
+        self._lock = contextlib.nullcontext() if readonly else threading.RLock()
+        if not readonly:
+            open(path, "ab").close()
+        self._load()
+
+    def _load(self):
+        self.indexes = {field: INDEX_KINDS[kind](field) for field, kind in self.index_kinds.items()}
+        self._ids = {}  # _id -> slot
+        self._offsets = array("q")  # slot -> offset of its document in the log, -1 once deleted
+        self._lengths = array("q")
+        self._fd = os.open(self.path, os.O_RDONLY if self.readonly else os.O_RDWR | os.O_APPEND)
+        self._closer = weakref.finalize(self, os.close, self._fd)
+        # The first version of a document is the common case: add it inline, and leave
+        # updates and deletes to _place and _forget
+        ids, offsets, lengths = self._ids, self._offsets, self._lengths
+        adders = [(field, index.add) for field, index in self.indexes.items()]
+        with open(self.path, "rb") as log:
+            offset = 0
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break  # torn write at the end of the log: ignore it
+                record = _decode(line.decode())
+                _id = record.get("_id")
+                if _id is not None and _id not in ids:
+                    slot = ids[_id] = len(offsets)
+                    offsets.append(offset)
+                    lengths.append(len(line))
+                    for field, add in adders:
+                        add(record.get(field), slot)
+                elif "$delete" in record:
+                    self._forget(record["$delete"])
+                else:
+                    self._place(record, offset, len(line))
+                offset += len(line)
+        self._size = offset
+        if not self.readonly and os.fstat(self._fd).st_size > offset:
+            os.ftruncate(self._fd, offset)
+        for index in self.indexes.values():
+            index.finish()
+
+    def __len__(self):
+        return len(self._ids)
+
+    # Function to open a collection on a new temporary file, removed once the collection
+    # is garbage collected (e.g. with the session state holding it)
+    @classmethod
+    def temporary(cls, indexes=None, directory=None):
+        fd, path = tempfile.mkstemp(suffix=".docs", dir=directory)
+        os.close(fd)
+        collection = cls(path, indexes)
+        weakref.finalize(collection, os.remove, path)
+        return collection
+
+    def close(self):
+        self._closer()
+
+    def _read(self, slot):
+        return _decode(os.pread(self._fd, self._lengths[slot], self._offsets[slot]).decode())
+
+    # Function to point _id at a document written at `offset`, updating the indexes
+    def _place(self, doc, offset, length, previous=None):
+        slot = self._ids.get(doc["_id"])
+        if slot is None:
+            slot = self._ids[doc["_id"]] = len(self._offsets)
+            self._offsets.append(offset)
+            self._lengths.append(length)
+        else:
+            if previous is None:
+                previous = self._read(slot)
+            for field, index in self.indexes.items():
+                index.remove(previous.get(field), slot)
+            self._offsets[slot], self._lengths[slot] = offset, length
+        for field, index in self.indexes.items():
+            index.add(doc.get(field), slot)
+
+    def _forget(self, _id, previous=None):
+        slot = self._ids.pop(_id, None)
+        if slot is None:
+            return
+        if previous is None:
+            previous = self._read(slot)
+        for field, index in self.indexes.items():
+            index.remove(previous.get(field), slot)
+        self._offsets[slot] = -1
+
+    def _append(self, records):
+        if self.readonly:
+            raise ReadOnlyCollection("%s is open read-only" % self.path)
+        lines = [json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records]
+        data = memoryview(b"".join(lines))
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(self._fd, data[written:])
+            if self.sync:
+                os.fsync(self._fd)
+        except Exception:
+            # Drop whatever part made it to the log, so the next record starts at _size
+            with contextlib.suppress(OSError):
+                os.ftruncate(self._fd, self._size)
+            raise
+        offsets = []
+        for line in lines:
+            offsets.append((self._size, len(line)))
+            self._size += len(line)
+        return offsets
+
+    def insert_many(self, docs):
+        if not isinstance(docs, (list, tuple)) or not all(isinstance(doc, dict) for doc in docs):
+            raise ValueError("documents must be objects")
+        docs = [dict(doc) for doc in docs]
+        with self._lock:
+            seen = set()
+            for doc in docs:
+                doc.setdefault("_id", uuid.uuid4().hex[:24])
+                if bracket(doc["_id"]) is None:
+                    raise ValueError("_id must be a string or a number, not %r" % (doc["_id"],))
+                if doc["_id"] in self._ids or doc["_id"] in seen:
+                    raise DuplicateKeyError("duplicate _id %r" % (doc["_id"],))
+                seen.add(doc["_id"])
+            for doc, (offset, length) in zip(docs, self._append(docs)):
+                self._place(doc, offset, length)
+        return [doc["_id"] for doc in docs]
+
+    def insert_one(self, doc):
+        return self.insert_many([doc])[0]
+
+    # Function to pick how to run a filter: the _id, an index lookup or a range on one
+    # field, or a full scan. Returns (plan, candidate slots or None for a scan).
+    def _plan(self, query, hint):
+        if hint == "$natural":
+            return {"stage": "COLLSCAN"}, None
+        best = None
+        for field, condition in query.items():
+            condition = operators(condition)
+            if field == "_id" and "$eq" in condition:
+                if bracket(condition["$eq"]) is None:
+                    raise ValueError("_id must be a string or a number, not %r" % (condition["$eq"],))
+                slot = self._ids.get(condition["$eq"])
+                return {"stage": "IDHACK"}, [] if slot is None else [slot]
+            index = self.indexes.get(field)
+            if index is None or (hint is not None and hint != field):
+                continue
+            if "$eq" in condition and bracket(condition["$eq"]) is not None:
+                slots = index.lookup(condition["$eq"])
+            elif "$in" in condition and all(bracket(value) is not None for value in condition["$in"]):
+                slots = sorted({slot for value in condition["$in"] for slot in index.lookup(value)})
+            elif index.kind == "sorted" and any(op in RANGE_OPERATORS for op in condition):
+                slots = index.range({op: bound for op, bound in condition.items() if op in RANGE_OPERATORS})
+            else:
+                continue
+            if best is None or len(slots) < len(best[1]):
+                best = ({"stage": "IXSCAN", "index": "%s_%s" % (field, index.kind)}, slots)
+        return best or ({"stage": "COLLSCAN"}, None)
+
+    def _scan(self):
+        with open(self.path, "rb") as log:
+            offset = 0
+            for line in log:
+                if offset >= self._size:
+                    break
+                record = _decode(line.decode())
+                slot = self._ids.get(record.get("_id")) if "$delete" not in record else None
+                if slot is not None and self._offsets[slot] == offset:
+                    yield slot, record
+                offset += len(line)
+
+    # Function to run a filter, returning (matching documents, execution stats). hint is
+    # an indexed field to use, or "$natural" to force a full scan.
+    def _execute(self, query, limit=0, hint=None):
+        query = query or {}
+        start = time.perf_counter()
+        with self._lock:
+            test = compile_query(query)
+            plan, slots = self._plan(query, hint)
+            source = self._scan() if slots is None else ((slot, self._read(slot)) for slot in slots)
+            docs = []
+            examined = 0
+            for slot, doc in source:
+                examined += 1
+                if test(doc):
+                    docs.append((slot, doc))
+                    if limit and len(docs) >= limit:
+                        break
+        stats = dict(plan, keysExamined=0 if slots is None else len(slots), docsExamined=examined,
+                     nReturned=len(docs), executionTimeMillis=round((time.perf_counter() - start) * 1000, 3))
+        return docs, stats
+
+    def find(self, query=None, limit=0, hint=None):
+        return [doc for _, doc in self._execute(query, limit, hint)[0]]
+
+    def find_one(self, query=None, hint=None):
+        docs = self.find(query, 1, hint)
+        return docs[0] if docs else None
+
+    def explain(self, query=None, limit=0, hint=None):
+        return self._execute(query, limit, hint)[1]
+
+    def update_one(self, query, update):
+        with self._lock:
+            found = self._execute(query, 1)[0]
+            if not found:
+                return {"matchedCount": 0, "modifiedCount": 0}
+            _, doc = found[0]
+            updated = apply_update(doc, update)
+            # Compared as JSON, so true replacing 1 or 30.0 replacing 30 is still a change
+            if json.dumps(updated, sort_keys=True) == json.dumps(doc, sort_keys=True):
+                return {"matchedCount": 1, "modifiedCount": 0}
+            (offset, length), = self._append([updated])
+            self._place(updated, offset, length, previous=doc)
+        return {"matchedCount": 1, "modifiedCount": 1}
+
+    def delete_one(self, query):
+        with self._lock:
+            found = self._execute(query, 1)[0]
+            if not found:
+                return {"deletedCount": 0}
+            _, doc = found[0]
+            self._append([{"$delete": doc["_id"]}])
+            self._forget(doc["_id"], previous=doc)
+        return {"deletedCount": 1}
+
+    # Function to rewrite the log with only the live documents, dropping old versions
+    def compact(self):
+        with self._lock:
+            if self.readonly:
+                raise ReadOnlyCollection("%s is open read-only" % self.path)
+            tmp = "%s.%d.tmp" % (self.path, os.getpid())
+            with open(tmp, "wb") as out:
+                for _, doc in self._scan():
+                    out.write(json.dumps(doc, separators=(",", ":")).encode() + b"\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.path)
+            self._closer()
+            self._load()
@@ -0,0 +1,196 @@
+import json
+import statistics
+import time
+
+import streamlit as st
+
+import db_pool
+import docstore
+import indexing_lab
+import lab_data
+import renderer
+import settings
+
+# Lookups the lab runs on the users collection, and the same question asked of the users table
+QUERIES = {
+    "Find a user by email": {
+        "filter": lambda values: {"email": values["email"]},
+        "sql": "SELECT * FROM users WHERE email = ?",
+        "params": ("email",),
+    },
+    "Users of one age in a city": {
+        "filter": lambda values: {"city": values["city"], "age": values["age"]},
+        "sql": "SELECT * FROM users WHERE city = ? AND age = ?",
+        "params": ("city", "age"),
+    },
+    "Users in an age range": {
+        "filter": lambda values: {"age": {"$gte": values["age"], "$lte": values["age_to"]}},
+        "sql": "SELECT * FROM users WHERE age BETWEEN ? AND ?",
+        "params": ("age", "age_to"),
+    },
+}
+
+# Documents the playground collection starts with
+SEED_DOCUMENTS = [
+    {"name": "John", "email": "john@example.com", "age": 30},
+    {"name": "Jane", "email": "jane@example.com", "age": 25},
+    {"name": "Alex", "email": "alex@example.com", "age": 41},
+]
+
+OPERATIONS = ["find", "updateOne", "deleteOne", "insertOne"]
+
+# Index lookups are repeated until this many seconds have passed (a full scan runs once)
+TIME_BUDGET = 0.3
+MAX_RUNS = 50
+
+
+# The users collection is generated once per machine and loaded once per process
+@st.cache_resource(show_spinner="Loading the users collection (first visit only)...")
+def users_collection():
+    return docstore.Collection(lab_data.users_collection(settings.LAB_DOCS_ROWS), lab_data.COLLECTION_INDEXES,
+                               readonly=True)
+
+
+# Function for the prefetcher: load the users collection into memory before the lab is
+# opened. The load itself cannot be stopped half-way; it is skipped once should_stop() says so.
+def warm(should_stop):
+    if lab_data.users_collection_ready() and not should_stop():
+        users_collection()
+    if lab_data.users_db_ready() and not should_stop():
+        indexing_lab.sample_email(renderer.users_db())
+
+
+# Function to pick an email that exists in the collection, as the default for the email lookup
+def sample_email(collection):
+    return collection.find_one({"_id": min(123456, len(collection))})["email"]
+
+
+# Function to run find() repeatedly, returning (median ms, the last explain() stats)
+def measure(collection, query, hint=None):
+    samples = []
+    started = time.perf_counter()
+    while not samples or (len(samples) < MAX_RUNS and time.perf_counter() - started < TIME_BUDGET):
+        stats = collection.explain(query, hint=hint)
+        samples.append(stats["executionTimeMillis"])
+    return statistics.median(samples), stats
+
+
+def playground():
+    collection = st.session_state.get("docstore_playground")
+    if collection is None:
+        collection = docstore.Collection.temporary({"name": "hash", "age": "sorted"}, directory=settings.LAB_DIR)
+        collection.insert_many(SEED_DOCUMENTS)
+        st.session_state["docstore_playground"] = collection
+
+    with st.form("docstore-playground"):
+        operation = st.selectbox("Operation", OPERATIONS)
+        query = st.text_input("Filter (or document, for insertOne)", '{"name": "John"}')
+        update = st.text_input("Update (updateOne only)", '{"age": 35}')
+        submitted = st.form_submit_button("Run")
+
+    if submitted:
+        try:
+            query, update = json.loads(query or "{}"), json.loads(update or "{}")
+            if operation == "find":
+                st.json(collection.find(query))
+                st.caption("Plan: %s" % collection.explain(query))
+            elif operation == "updateOne":
+                st.json(collection.update_one(query, update))
+            elif operation == "deleteOne":
+                st.json(collection.delete_one(query))
+            else:
+                st.json({"insertedId": collection.insert_one(query)})
+        except (ValueError, docstore.DuplicateKeyError) as exc:
+            st.error(str(exc))
+
+    with open(collection.path) as log:
+        lines = log.read().splitlines()
+    st.markdown("**The log on disk** (%d documents live, %d lines)" % (len(collection), len(lines)))
+    st.code("\n".join(lines[-15:]), language="json")
+    if st.button("Compact the log"):
+        collection.compact()
+        st.rerun()
+
+
+def show():
+    st.title("Document Store Lab: Indexes in a NoSQL Database")
+    st.write("""
+    The mongoose examples on the Database page need a running MongoDB. This lab runs the same `find`, `updateOne` and
+    `deleteOne` query shapes against a small embedded document store instead. Each collection is an append-only log of
+    JSON documents on disk, with hash or sorted indexes on the fields you declare. Without an index, `find` has to read
+    and decode every document (a collection scan, `COLLSCAN`). With one, it reads only the documents the index points
+    to (`IXSCAN`).
+    """)
+    st.code("""
+    const User = mongoose.model('User', new mongoose.Schema({
+      name: String,
+      email: { type: String, index: true },   // equality lookups
+      age: { type: Number, index: true },     // equality and range lookups
+      city: String,
+    }));
+
+    User.find({ email: 'sara.ito7@example.com' });       // uses the email index
+    User.find({ age: { $gte: 30, $lte: 35 } });          // range on the age index
+    User.find({ email: 'sara.ito7@example.com' }).hint({ $natural: 1 });  // forces a full scan
+    """, language="javascript")
+
+    st.subheader("Indexed find versus a full scan")
+    collection = users_collection()
+    path = renderer.users_db()
+    st.caption("Collection of %s generated users (the first of the Indexing Lab's %s), indexed on %s." % (
+        format(len(collection), ","), format(settings.LAB_USERS_ROWS, ","),
+        ", ".join("%s (%s)" % item for item in lab_data.COLLECTION_INDEXES.items())))
+
+    name = st.selectbox("Query", list(QUERIES))
+    query = QUERIES[name]
+    with st.form("docstore-lab"):
+        values = {
+            "email": st.text_input("email", sample_email(collection)),
+            "city": st.selectbox("city", lab_data.CITIES, index=lab_data.CITIES.index("London")),
+            "age": st.number_input("age (from)", min_value=18, max_value=80, value=30),
+            "age_to": st.number_input("age (to)", min_value=18, max_value=80, value=32),
+        }
+        submitted = st.form_submit_button("Run")
+
+    if submitted:
+        document_filter = query["filter"](values)
+        st.code("users.find(%s)" % json.dumps(document_filter), language="javascript")
+        try:
+            with st.spinner("Running (the full scan decodes every document)..."):
+                indexed = measure(collection, document_filter)
+                scan = measure(collection, document_filter, hint="$natural")
+                params = tuple(values[param] for param in query["params"])
+                with db_pool.for_database(path).connection() as conn:
+                    sql_plan = indexing_lab.query_plan(conn, query["sql"], params)
+                    sql_latency, _, _ = indexing_lab.measure(conn, query["sql"], params)
+        except db_pool.PoolTimeout:
+            st.warning("Other readers are running this lab right now. Try again in a few seconds.")
+        else:
+            columns = st.columns(3)
+            titles = ("Document store, indexed", "Document store, full scan")
+            for column, title, (latency, stats) in zip(columns, titles, (indexed, scan)):
+                with column:
+                    st.markdown("**%s**" % title)
+                    st.metric("Median latency", "%.2f ms" % latency)
+                    st.json(stats)
+            with columns[2]:
+                st.markdown("**SQLite, same question**")
+                st.metric("Median latency", "%.2f ms" % sql_latency)
+                st.code(sql_plan, language="text")
+
+    st.subheader("Playground: find, updateOne, deleteOne")
+    st.write("A private collection for this session, indexed on `name` (hash) and `age` (sorted). Every write appends "
+             "to the log; compacting rewrites it with only the live documents.")
+    playground()
+
+    st.subheader("What to look for")
+    st.write("""
+    - A full scan decodes every document, so it costs the same whichever document you look for. An index lookup reads
+      only the matches.
+    - `keysExamined` against `nReturned` shows how selective the chosen index was. For a city and an age, the store
+      uses the smaller of the two candidate sets and filters the rest.
+    - The SQLite table answers the same questions through its own indexes. The SQL table has a fixed schema and stores
+      rows compactly, while documents are flexible JSON that must be decoded on every read. That decoding is part of the
+      price of schema flexibility.
+    - Updates never change old bytes. They append a new version, which is why the log needs compacting.
+    """)
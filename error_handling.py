@@ -205,20 +205,29 @@ def show():
     # Streamlit app content
     st.title("Testing Concepts Exploration")
 
-    st.sidebar.title("Select a Topic")
-    option = st.sidebar.selectbox(
-        "Choose an option:",
-        ["Unit Testing", "Integration Testing", "End-to-End (E2E) Testing", "Mocking and Stubbing",
-         "Test-Driven Development (TDD)"]
-    )
-
-    if option == "Unit Testing":
-        display_unit_testing()
-    elif option == "Integration Testing":
-        display_integration_testing()
-    elif option == "End-to-End (E2E) Testing":
-        display_e2e_testing()
-    elif option == "Mocking and Stubbing":
-        display_mocking_stubbing()
-    elif option == "Test-Driven Development (TDD)":
-        display_tdd()
+    # Only this part reruns when another topic is picked
+    @st.fragment
+    def display_selected_topic():
+        st.subheader("Select a Topic")
+        option = st.selectbox(
+            "Choose an option:",
+            ["Unit Testing", "Integration Testing", "End-to-End (E2E) Testing", "Mocking and Stubbing",
+             "Test-Driven Development (TDD)"]
+        )
+
+        if option == "Unit Testing":
+            display_unit_testing()
+        elif option == "Integration Testing":
+            display_integration_testing()
+        elif option == "End-to-End (E2E) Testing":
+            display_e2e_testing()
+        elif option == "Mocking and Stubbing":
+            display_mocking_stubbing()
+        elif option == "Test-Driven Development (TDD)":
+            display_tdd()
+
+    display_selected_topic()
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
@@ -0,0 +1,195 @@
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+
+import content
+import diagrams
+import html_cache
+import pages
+import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bump when the page layout below changes, so every page is rebuilt
+EXPORT_VERSION = "1"
+
+MANIFEST = "manifest.json"
+STYLESHEET = "style.css"
+
+BASE_CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; line-height: 1.6; margin: 0; color: #262730; }
+nav { position: fixed; top: 0; bottom: 0; width: 15rem; padding: 1rem; background: #f0f2f6; overflow-y: auto; }
+nav a { display: block; padding: .25rem 0; color: #262730; text-decoration: none; }
+nav a.current { font-weight: 600; }
+main { margin-left: 17rem; max-width: 48rem; padding: 1rem 2rem 4rem; }
+.highlight { background: #f8f8f8; border-radius: .5rem; padding: .25rem 1rem; overflow-x: auto; }
+code { background: #f0f2f6; padding: 0 .2rem; border-radius: .25rem; }
+.topics a { margin-right: 1rem; }
+"""
+
+
+def page_file(label, option=None):
+    name = "index" if label == pages.PAGE_LABELS[0] else pages.slug(label)
+    if option is not None:
+        name += "." + pages.slug(option)
+    return name + ".html"
+
+
+def _document(title, current, body):
+    links = "\n".join(
+        '<a href="%s"%s>%s</a>' % (page_file(label), ' class="current"' if label == current else "", html.escape(label))
+        for label in pages.PAGE_LABELS
+    )
+    return """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>%s</title>
+<link rel="stylesheet" href="%s">
+</head>
+<body>
+<nav><strong>Sequential Topics:</strong>
+%s
+</nav>
+<main>
+<h1>AJ's Guide to Backend using js</h1>
+%s
+</main>
+</body>
+</html>
+""" % (html.escape(title), STYLESHEET, links, body)
+
+
+# Function to render a section with its diagrams. The export runs offline, so a diagram
+# missing from the cache is rendered here rather than left out.
+def _section_html(page, section):
+    parts = [html_cache.section_html(section, pages.slug(section.title))]
+    parts += [diagrams.get_svg(name) or diagrams.render_to_disk(name)
+              for name in diagrams.section_diagrams(page.label, section.title)]
+    return "\n".join(parts)
+
+
+# Function to render one page, or one topic of a page with a selector, as a standalone document
+def render_page(page, option=None):
+    body = []
+    if page.title:
+        body.append("<h1>%s</h1>" % html.escape(page.title))
+    if page.intro:
+        body.append(html_cache.get_html(page.intro))
+    if page.selector:
+        option = option or page.selector.options[0]
+        body.append("<h3>%s</h3>" % html.escape(page.selector.title))
+        body.append('<p class="topics">%s</p>' % " ".join(
+            '<a href="%s">%s</a>' % (page_file(page.label, o), html.escape(o)) for o in page.selector.options))
+        section = page.sections[page.selector.options.index(option)]
+        body.append(_section_html(page, section))
+    else:
+        for section in page.sections:
+            body.append(_section_html(page, section))
+    if page.questions:
+        body.append("<h2>%s</h2>" % content.QUESTIONS_HEADER)
+        body.append(html_cache.get_html(page.questions))
+    return _document(option or page.title or page.label, page.label, "\n".join(body))
+
+
+def _diagram_keys(page):
+    names = [name for section in page.sections for name in diagrams.section_diagrams(page.label, section.title)]
+    return [diagrams.diagram_key(*diagrams.sources()[name]) for name in names]
+
+
+# Function to list every file of the site as (name, content hash, page, topic option).
+# The stylesheet is the unit without a page.
+def plan(compiled):
+    nav = "|".join(pages.PAGE_LABELS)
+    units = [(STYLESHEET, hashlib.sha256((EXPORT_VERSION + BASE_CSS + html_cache.stylesheet()).encode()).hexdigest(),
+              None, None)]
+    for label in pages.PAGE_LABELS:
+        page = compiled[label]
+        options = [None] + list(page.selector.options if page.selector else [])
+        for option in options:
+            key = "\x00".join([EXPORT_VERSION, html_cache.RENDERER_VERSION, nav, repr(page), repr(option),
+                                repr(_diagram_keys(page))])
+            units.append((page_file(label, option), hashlib.sha256(key.encode()).hexdigest(), page, option))
+    return units
+
+
+# Function to render and write one planned file. Runs in the build pipeline's worker processes.
+def export_unit(path, page, option):
+    write_compressed(path, BASE_CSS + html_cache.stylesheet() if page is None else render_page(page, option))
+
+
+def _write(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# Function to write a file plus its .gz and .br variants
+def write_compressed(path, text):
+    data = text.encode("utf-8")
+    _write(path, data)
+    _write(path + ".gz", gzip.compress(data, 9, mtime=0))
+    if brotli is not None:
+        _write(path + ".br", brotli.compress(data, quality=11))
+
+
+# Function to export the site, re-rendering only files whose content hash changed.
+# With an executor, the stale files are rendered in parallel.
+def export(out_dir=None, force=False, compiled=None, executor=None):
+    out_dir = out_dir or settings.EXPORT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    compiled = compiled or content.compile_all()
+    written = []
+    stale = []
+    new_manifest = {}
+    for name, digest, page, option in plan(compiled):
+        new_manifest[name] = digest
+        path = os.path.join(out_dir, name)
+        if manifest.get(name) == digest and os.path.exists(path):
+            continue
+        stale.append((path, page, option))
+        written.append(name)
+    if executor is not None and stale:
+        list(executor.map(export_unit, *zip(*stale)))
+    else:
+        for unit in stale:
+            export_unit(*unit)
+
+    for name in set(manifest) - set(new_manifest):
+        for suffix in ("", ".gz", ".br"):
+            if os.path.exists(os.path.join(out_dir, name + suffix)):
+                os.remove(os.path.join(out_dir, name + suffix))
+
+    _write(manifest_path, json.dumps(new_manifest, indent=2, sort_keys=True).encode())
+    return written, len(new_manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export every lesson page as static, precompressed HTML")
+    parser.add_argument("out_dir", nargs="?", default=settings.EXPORT_DIR)
+    parser.add_argument("--force", action="store_true", help="re-render every page")
+    args = parser.parse_args()
+
+    written, total = export(args.out_dir, args.force)
+    for name in written:
+        print("wrote " + name)
+    print("%d of %d files re-rendered in %s%s" % (
+        len(written), total, args.out_dir, "" if brotli else " (brotli not installed, no .br files)"))
+
+
+if __name__ == "__main__":
+    main()
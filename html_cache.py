@@ -0,0 +1,237 @@
+import functools
+import hashlib
+import html
+import os
+import re
+import threading
+
+import content
+import settings
+
+try:
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    highlight = None
+
+# Bump when the HTML produced below changes, so old cache entries are not reused
+RENDERER_VERSION = "1"
+
+HTML_DIR = os.path.join(settings.CACHE_DIR, "html")
+
+FENCE = re.compile(r"^(\s*)```\s*([\w+-]*)\s*$")
+LIST_ITEM = re.compile(r"^(\s*)([-*]|\d+\.)\s+(.*)$")
+INLINE_CODE = re.compile(r"`([^`]+)`")
+BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+_memory = {}
+_lock = threading.Lock()
+_shared = [None]  # shared_store.SharedContent whose fragments are read in place
+
+
+# Function to format inline markdown. Everything is escaped first, so the only
+# tags in the output are the ones added here.
+def _inline(text):
+    codes = []
+
+    def stash(match):
+        codes.append("<code>%s</code>" % match.group(1))
+        return "\x00%d\x00" % (len(codes) - 1)
+
+    text = html.escape(text, quote=False)
+    text = INLINE_CODE.sub(stash, text)
+    text = BOLD.sub(r"<strong>\1</strong>", text)
+    return re.sub("\x00(\\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+# Function to highlight a code block with Pygments (plain <pre> if it is not installed)
+def code_to_html(code, language):
+    if highlight is None:
+        return '<div class="highlight"><pre>%s</pre></div>' % html.escape(code)
+    try:
+        lexer = get_lexer_by_name(language or "text")
+    except ClassNotFound:
+        lexer = get_lexer_by_name("text")
+    return highlight(code, lexer, HtmlFormatter())
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet():
+    if highlight is None:
+        return ""
+    return HtmlFormatter().get_style_defs(".highlight")
+
+
+# Function to convert the markdown subset used by the lessons (paragraphs, **bold**,
+# `code`, nested -/1. lists, fenced code and ---) to HTML
+def markdown_to_html(text):
+    out = []
+    paragraph = []
+    lists = []  # open lists as (tag, indent)
+    previous_blank = False
+
+    def flush_paragraph():
+        if paragraph:
+            lines = [_inline(line.strip()) + ("<br>" if line.endswith("  ") else "") for line in paragraph]
+            out.append("<p>%s</p>" % "\n".join(lines))
+            del paragraph[:]
+
+    def close_lists(indent=-1):
+        while lists and lists[-1][1] > indent:
+            out.append("</li></%s>" % lists.pop()[0])
+
+    lines = text.split("\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        fence = FENCE.match(line)
+        item = LIST_ITEM.match(line)
+        indent = len(line) - len(line.lstrip())
+
+        if fence:
+            flush_paragraph()
+            if lists and indent <= lists[0][1]:
+                close_lists()
+            body = []
+            i += 1
+            while i < len(lines) and not FENCE.match(lines[i]):
+                body.append(lines[i][len(fence.group(1)):] if lines[i].startswith(fence.group(1)) else lines[i].lstrip())
+                i += 1
+            out.append(code_to_html("\n".join(body), fence.group(2)))
+            previous_blank = False
+        elif not line.strip():
+            flush_paragraph()
+            previous_blank = True
+        elif line.strip() == "---":
+            flush_paragraph()
+            close_lists()
+            out.append("<hr>")
+        elif item:
+            flush_paragraph()
+            tag = "ol" if item.group(2)[0].isdigit() else "ul"
+            close_lists(indent)
+            if lists and lists[-1][1] == indent:
+                if lists[-1][0] == tag:
+                    out.append("</li>")
+                else:
+                    out.append("</li></%s>" % lists.pop()[0])
+            if not lists or lists[-1][1] < indent:
+                lists.append((tag, indent))
+                out.append("<%s>" % tag)
+            out.append("<li>" + _inline(item.group(3).strip()))
+            previous_blank = False
+        elif lists and not (previous_blank and indent <= lists[0][1]):
+            # Continuation line of the current list item
+            out.append(" " + _inline(line.strip()))
+            previous_blank = False
+        else:
+            close_lists()
+            paragraph.append(line)
+            previous_blank = False
+        i += 1
+
+    flush_paragraph()
+    close_lists()
+    return "\n".join(out)
+
+
+def content_hash(kind, text, language=""):
+    key = "\x00".join([RENDERER_VERSION, kind, language, text])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def fragment_path(key):
+    return os.path.join(HTML_DIR, key[:2], key + ".html")
+
+
+# Function to render a fragment and write it to the disk cache, replacing any old copy
+def write_fragment(text, kind="markdown", language=""):
+    path = fragment_path(content_hash(kind, text, language))
+    rendered = code_to_html(text, language) if kind == "code" else markdown_to_html(text)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(rendered)
+    os.replace(tmp, path)
+    return rendered
+
+
+# Function to return cached HTML for a markdown blob (kind="markdown") or a code
+# sample (kind="code"), rendering and writing it to disk on a miss
+def get_html(text, kind="markdown", language=""):
+    key = content_hash(kind, text, language)
+    if _shared[0] is not None:
+        cached = _shared[0].html(key)
+        if cached is not None:
+            return cached
+    cached = _memory.get(key)
+    if cached is not None:
+        return cached
+
+    path = fragment_path(key)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            cached = f.read()
+    else:
+        cached = write_fragment(text, kind, language)
+
+    with _lock:
+        _memory[key] = cached
+    return cached
+
+
+# Function to serve fragments from a shared content file before the per-process cache
+def use_shared(shared):
+    _shared[0] = shared
+
+
+# Function to render a whole lesson section as one HTML fragment
+def section_html(section, anchor=""):
+    parts = ['<h2 id="%s">%s</h2>' % (html.escape(anchor), html.escape(section.title))]
+    if section.explanation:
+        parts += ["<h3>Explanation:</h3>", get_html(section.explanation)]
+    for example in section.examples:
+        parts += ["<h3>%s:</h3>" % html.escape(example.label), get_html(example.code, "code", example.language)]
+    if section.use_case:
+        parts += ["<h3>Practical Use Case:</h3>", get_html(section.use_case)]
+    if section.assignment:
+        parts += ["<h3>Assignment:</h3>", get_html(section.assignment)]
+    return "\n".join(parts)
+
+
+# Function to list every markdown field and code sample of a page as (text, kind, language)
+def fragments(page):
+    texts = [(page.intro, "markdown", ""), (page.questions, "markdown", "")]
+    for section in page.sections:
+        texts += section_fragments(section)
+    return [text for text in texts if text[0]]
+
+
+def section_fragments(section):
+    texts = [(section.explanation, "markdown", ""), (section.use_case, "markdown", ""),
+             (section.assignment, "markdown", "")]
+    texts += [(example.code, "code", example.language) for example in section.examples]
+    return [text for text in texts if text[0]]
+
+
+# Function to pre-render every markdown field and code sample of a page
+def build_page(page):
+    texts = fragments(page)
+    for text, kind, language in texts:
+        get_html(text, kind, language)
+    return len(texts)
+
+
+def build_all():
+    total = 0
+    for label, page in content.compile_all().items():
+        count = build_page(page)
+        print("%-20s %3d fragments" % (label, count))
+        total += count
+    print("%d fragments cached in %s" % (total, HTML_DIR))
+
+
+if __name__ == "__main__":
+    build_all()
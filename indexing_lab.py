@@ -0,0 +1,151 @@
+import statistics
+import time
+
+import streamlit as st
+
+import db_pool
+import lab_data
+import renderer
+import settings
+
+# Lookups the lab can run. "{source}" becomes `users NOT INDEXED` (full table scan) or
+# `users INDEXED BY <index>`, so every strategy runs against the same shared table.
+QUERIES = {
+    "Find a user by email": {
+        "sql": "SELECT id, email, city, age FROM {source} WHERE email = ?",
+        "params": ("email",),
+        "indexes": (None, "idx_users_email"),
+    },
+    "Count users of one age in a city": {
+        "sql": "SELECT COUNT(*) FROM {source} WHERE city = ? AND age = ?",
+        "params": ("city", "age"),
+        "indexes": (None, "idx_users_city", "idx_users_city_age"),
+    },
+    "Newest sign-ups in a city": {
+        "sql": "SELECT id, email, created_at FROM {source} WHERE city = ? ORDER BY created_at DESC LIMIT 20",
+        "params": ("city",),
+        "indexes": (None, "idx_users_city", "idx_users_city_created"),
+    },
+}
+
+INDEX_NAMES = {
+    None: "No index (full table scan)",
+    "idx_users_email": "Index on email",
+    "idx_users_city": "Index on city",
+    "idx_users_city_age": "Composite index on (city, age)",
+    "idx_users_city_created": "Composite index on (city, created_at)",
+}
+
+# Each strategy runs at least MIN_RUNS times and until TIME_BUDGET seconds have passed
+MIN_RUNS = 3
+MAX_RUNS = 50
+TIME_BUDGET = 0.3
+
+
+# Function to pick an email that exists, as the default for the email lookup
+@st.cache_resource(show_spinner=False)
+def sample_email(path):
+    with db_pool.for_database(path).connection() as conn:
+        row = conn.execute("SELECT email FROM users WHERE id = ?", (min(123456, settings.LAB_USERS_ROWS),)).fetchone()
+    return row[0]
+
+
+# Function for the prefetcher: open the pool on the users table before the lab is opened
+def warm(should_stop):
+    if lab_data.users_db_ready():
+        sample_email(renderer.users_db())
+
+
+def build_sql(sql, index):
+    return sql.format(source="users NOT INDEXED" if index is None else "users INDEXED BY " + index)
+
+
+# Function to format EXPLAIN QUERY PLAN rows as an indented tree
+def query_plan(conn, sql, params):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _unused, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+# Function to run a query repeatedly, returning (median ms, runs, rows returned)
+def measure(conn, sql, params):
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MIN_RUNS or (len(samples) < MAX_RUNS and time.perf_counter() - started < TIME_BUDGET):
+        start = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(samples), rows
+
+
+# Function to describe a strategy's latency against the full scan, e.g. "12.5x faster"
+# or "1.3x slower"
+def compared_to_scan(scan, latency):
+    speedup = scan / max(latency, 1e-6)
+    if speedup >= 1:
+        return "%.1fx faster" % speedup
+    return "%.1fx slower" % (latency / max(scan, 1e-6))
+
+
+def run_strategy(path, sql, params, index):
+    with db_pool.for_database(path).connection() as conn:
+        sql = build_sql(sql, index)
+        plan = query_plan(conn, sql, params)
+        latency, runs, rows = measure(conn, sql, params)
+    return {"plan": plan, "latency": latency, "runs": runs, "rows": rows}
+
+
+def show():
+    st.title("Indexing Lab: Queries With and Without Indexes")
+    st.write("""
+    An index is a separate, sorted structure that lets the database jump to matching rows instead of reading the whole
+    table. This lab runs the same lookup against a generated `users` table, first as a full table scan and then through
+    single-column and composite indexes, and shows what SQLite plans to do (`EXPLAIN QUERY PLAN`) next to how long it took.
+    """)
+
+    path = renderer.users_db()
+    st.caption("SQLite file with %s generated users, shared by every reader." % format(settings.LAB_USERS_ROWS, ","))
+
+    name = st.selectbox("Query", list(QUERIES))
+    query = QUERIES[name]
+    st.code(query["sql"].format(source="users"), language="sql")
+    with st.form("indexing-lab"):
+        values = {
+            "email": st.text_input("email", sample_email(path)),
+            "city": st.selectbox("city", lab_data.CITIES, index=lab_data.CITIES.index("London")),
+            "age": st.number_input("age", min_value=18, max_value=80, value=30),
+        }
+        submitted = st.form_submit_button("Run")
+
+    if not submitted:
+        return
+    params = tuple(values[param] for param in query["params"])
+    try:
+        results = [(index, run_strategy(path, query["sql"], params, index)) for index in query["indexes"]]
+    except db_pool.PoolTimeout:
+        st.warning("Other readers are running this lab right now. Try again in a few seconds.")
+        return
+
+    columns = st.columns(len(results))
+    scan = results[0][1]["latency"]
+    for column, (index, result) in zip(columns, results):
+        with column:
+            st.markdown("**%s**" % INDEX_NAMES[index])
+            delta = None if index is None else compared_to_scan(scan, result["latency"])
+            slower = delta is not None and delta.endswith("slower")
+            st.metric("Median latency", "%.2f ms" % result["latency"], delta,
+                      delta_color="inverse" if slower else "normal")
+            st.code(result["plan"], language="text")
+            st.caption("%d rows returned, %d runs" % (len(result["rows"]), result["runs"]))
+
+    st.subheader("What to look for")
+    st.write("""
+    - `SCAN users` reads every row; `SEARCH users USING INDEX` jumps straight to the matching ones.
+    - `USING COVERING INDEX` means the index alone answers the query, so the table is not read at all.
+    - A composite index helps when the query filters on its leading columns, and can also return rows already sorted
+      (no `USE TEMP B-TREE FOR ORDER BY` step).
+    """)
@@ -132,3 +132,7 @@ def show():
     4. What is the difference between synchronous and asynchronous code?
     5. How does the event loop handle promises vs. callbacks?
     """)
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
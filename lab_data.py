@@ -0,0 +1,173 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+
+import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Bump when the generated data or schema changes, so old files are regenerated
+DATA_VERSION = "1"
+
+SEED = 42
+
+USERS_FILE = os.path.join(settings.LAB_DIR, "users.sqlite")
+USERS_COLLECTION_FILE = os.path.join(settings.LAB_DIR, "users.docs")
+
+FIRST_NAMES = ("Ava Ben Chloe Dev Emma Finn Grace Hugo Isla Jay Kara Leo Maya Noah Omar Priya Quinn Ravi Sara Tom "
+               "Uma Victor Wen Xena Yusuf Zoe").split()
+LAST_NAMES = ("Adams Brown Chen Diaz Evans Fischer Garcia Hughes Ito Jones Khan Lopez Martin Nguyen Okafor Patel "
+              "Rossi Smith Tanaka Walker").split()
+CITIES = ("Amsterdam Austin Bangalore Berlin Boston Cairo Chicago Denver Dublin Istanbul Lagos Lisbon London "
+          "Madrid Melbourne Mumbai Nairobi Oslo Paris Pune Seoul Singapore Stockholm Sydney Tokyo Toronto "
+          "Vancouver Vienna Warsaw Zurich").split()
+
+# Unix time of the first sign-up, and the span sign-ups are spread over (5 years)
+FIRST_SIGNUP = 1577836800
+SIGNUP_SPAN = 5 * 365 * 24 * 3600
+
+# Secondary indexes built on the users table. Labs pick one with INDEXED BY, or none
+# with NOT INDEXED, so readers never have to create or drop an index themselves.
+INDEXES = {
+    "idx_users_email": "users(email)",
+    "idx_users_city": "users(city)",
+    "idx_users_city_age": "users(city, age)",
+    "idx_users_city_created": "users(city, created_at)",
+}
+
+# Secondary indexes declared on the users collection
+COLLECTION_INDEXES = {"email": "hash", "city": "hash", "age": "sorted", "created_at": "sorted"}
+
+_lock = threading.Lock()
+
+
+# Function to yield the same rows on every run: (id, email, first_name, last_name, city, age, created_at)
+def user_rows(count, seed=SEED):
+    rng = random.Random(seed)
+    for user_id in range(1, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = "%s.%s%d@example.com" % (first.lower(), last.lower(), user_id)
+        yield (user_id, email, first, last, rng.choice(CITIES), rng.randint(18, 80),
+               FIRST_SIGNUP + rng.randrange(SIGNUP_SPAN))
+
+
+def _generate(path, rows):
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        # Throwaway file until it is renamed, so durability does not matter here
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("""CREATE TABLE users (
+            id INTEGER PRIMARY KEY,
+            email TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            city TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )""")
+        with conn:
+            conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)", user_rows(rows))
+        for name, target in INDEXES.items():
+            conn.execute("CREATE INDEX %s ON %s" % (name, target))
+        conn.execute("ANALYZE")
+        with conn:
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [("version", DATA_VERSION), ("rows", str(rows))])
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+
+
+def _is_current(path, rows):
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect("file:%s?mode=ro" % path, uri=True)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+    return meta.get("version") == DATA_VERSION and meta.get("rows") == str(rows)
+
+
+# Function to generate a lab file once. Other threads and worker processes wait for the
+# one generating it instead of generating their own copy.
+def _generate_once(path, rows, is_current, generate):
+    if is_current(path, rows):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path + ".lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if not is_current(path, rows):
+            generate(path, rows)
+    return path
+
+
+# Function to return the path of the users database, generating it the first time
+def users_db(rows=None, path=None):
+    rows = settings.LAB_USERS_ROWS if rows is None else rows
+    return _generate_once(path or USERS_FILE, rows, _is_current, _generate)
+
+
+# Function to tell whether the users database is generated already. Background warm-ups
+# only open lab data that exists: generating it takes much longer than they may run.
+def users_db_ready(rows=None, path=None):
+    return _is_current(path or USERS_FILE, settings.LAB_USERS_ROWS if rows is None else rows)
+
+
+# The same users as documents, shaped like the mongoose User model in the Database lesson
+def user_documents(count, seed=SEED):
+    for user_id, email, first, last, city, age, created_at in user_rows(count, seed):
+        yield {"_id": user_id, "name": "%s %s" % (first, last), "email": email, "age": age, "city": city,
+               "created_at": created_at}
+
+
+def _generate_collection(path, rows):
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as log:
+        for doc in user_documents(rows):
+            log.write(json.dumps(doc, separators=(",", ":")).encode() + b"\n")
+    os.replace(tmp, path)
+    # Written last: a log without a current meta file is regenerated
+    with open(path + ".meta", "w") as meta:
+        json.dump({"version": DATA_VERSION, "rows": rows}, meta)
+
+
+def _collection_is_current(path, rows):
+    try:
+        with open(path + ".meta") as meta:
+            return json.load(meta) == {"version": DATA_VERSION, "rows": rows} and os.path.exists(path)
+    except (OSError, ValueError):
+        return False
+
+
+# Function to return the path of the users collection log (see docstore), generating it
+# the first time
+def users_collection(rows=None, path=None):
+    rows = settings.LAB_DOCS_ROWS if rows is None else rows
+    return _generate_once(path or USERS_COLLECTION_FILE, rows, _collection_is_current, _generate_collection)
+
+
+def users_collection_ready(rows=None, path=None):
+    return _collection_is_current(path or USERS_COLLECTION_FILE, settings.LAB_DOCS_ROWS if rows is None else rows)
+
+
+# Function to open a read-only connection to a lab database
+def connect(path):
+    return sqlite3.connect("file:%s?mode=ro" % path, uri=True, check_same_thread=False)
+
+
+if __name__ == "__main__":
+    print("users table ready in " + users_db())
+    print("users collection ready in " + users_collection())
@@ -0,0 +1,106 @@
+import collections
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db_pool
+import lab_data
+import local_api
+import pagination
+import settings
+
+QUERY = "SELECT id, email, city, age FROM users WHERE id = ?"
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# Function to call `task` `requests` times from `workers` threads, each running its share
+# back to back. Returns throughput (requests/s) and latency percentiles (ms).
+def run(task, workers, requests):
+    errors = collections.Counter()
+
+    def worker(count):
+        samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                task()
+            except Exception as exc:
+                errors[type(exc).__name__] += 1
+                continue
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    shares = [requests // workers + (1 if i < requests % workers else 0) for i in range(workers)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        latencies = sorted(sample for samples in executor.map(worker, shares) for sample in samples)
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "errors": sum(errors.values()),
+    }
+
+
+# Function to compare opening a connection per request with borrowing one from a pool,
+# for a primary-key lookup on the users table. Yields one row per (mode, worker count).
+def compare_pool(path, worker_counts, requests, pool_size, rows=None):
+    rows = rows or settings.LAB_USERS_ROWS
+    rng = random.Random(0)
+
+    def per_request():
+        conn = lab_data.connect(path)
+        try:
+            conn.execute(QUERY, (rng.randint(1, rows),)).fetchone()
+        finally:
+            conn.close()
+
+    for workers in worker_counts:
+        yield dict(run(per_request, workers, requests), mode="connect per request", workers=workers)
+        pool = db_pool.ConnectionPool(lambda: lab_data.connect(path), min_size=pool_size, max_size=pool_size,
+                                      name="pool-lab")
+
+        def pooled():
+            with pool.connection() as conn:
+                conn.execute(QUERY, (rng.randint(1, rows),)).fetchone()
+
+        try:
+            yield dict(run(pooled, workers, requests), mode="pool of %d" % pool_size, workers=workers)
+        finally:
+            pool.close()
+
+
+# Function to time fetching page `depth` of GET /api/users with offset and keyset paging.
+# The keyset cursor for a page is looked up beforehand (untimed), as if the client had
+# followed the "next" links that far. Yields one row per (paging, depth).
+def compare_paging(depths, limit=pagination.DEFAULT_LIMIT, city=None, repeat=5):
+    filters = {} if city is None else {"city": city}
+    keys = local_api.users_query("keyset", city).keys
+    for depth in depths:
+        skipped = depth * limit
+        cursor = None
+        if skipped:
+            last = local_api.request("GET", "/api/users", dict(filters, paging="offset", offset=skipped - 1, limit=1))
+            if not last.body["data"]:
+                continue  # past the end of the list
+            cursor = pagination.encode_cursor([last.body["data"][0][key] for key in keys])
+        calls = {
+            "offset": dict(filters, paging="offset", offset=skipped, limit=limit),
+            "keyset": dict(filters, paging="keyset", limit=limit, **({"cursor": cursor} if cursor else {})),
+        }
+        for paging, params in calls.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = local_api.request("GET", "/api/users", params)
+                samples.append((time.perf_counter() - start) * 1000)
+            yield {"paging": paging, "depth": depth, "rows_skipped": skipped, "ms": round(statistics.median(samples), 3),
+                   "first_id": response.body["data"][0]["id"] if response.body["data"] else None}
@@ -0,0 +1,110 @@
+import collections
+import functools
+import inspect
+import re
+
+import db_pool
+import lab_data
+import pagination
+
+# In-process stand-in for the Express endpoints in the lessons. Labs call
+# request("GET", "/api/users", {"limit": 20}) and get a Response back, with the status and
+# JSON-style body a real server would send, without running a server.
+Response = collections.namedtuple("Response", "status body")
+
+ROUTES = []  # (method, compiled path pattern, handler, check)
+
+USER_COLUMNS = ("id", "email", "first_name", "last_name", "city", "age", "created_at")
+
+
+# Decorator to register a handler for `method` and an Express-style path ("/api/users/:id").
+# The handler gets the path parameters and the query parameters as keyword arguments.
+# `check(params)`, if given, validates and converts them before the handler runs.
+def route(method, path, check=None):
+    pattern = re.compile("^%s$" % re.sub(r":(\w+)", r"(?P<\1>[^/]+)", path))
+
+    def register(handler):
+        ROUTES.append((method, pattern, handler, check))
+        return handler
+    return register
+
+
+# Function to answer a request. Parameters the handler does not take, or that its check
+# rejects, get a 400; an error inside the handler itself is a bug and is raised.
+def request(method, path, params=None):
+    for route_method, pattern, handler, check in ROUTES:
+        match = pattern.match(path)
+        if match and route_method == method:
+            try:
+                bound = inspect.signature(handler).bind(**dict(params or {}, **match.groupdict()))
+                bound.apply_defaults()
+                arguments = check(bound.arguments) if check else bound.arguments
+            except (TypeError, ValueError) as exc:
+                return Response(400, {"error": str(exc)})
+            return handler(**arguments)
+    return Response(404, {"error": "Cannot %s %s" % (method, path)})
+
+
+# Function to build the users list query, paged one way or the other. The whole table is
+# listed by id; a city is listed newest first through its (city, created_at) index.
+def users_query(paging="keyset", city=None):
+    if paging not in pagination.STRATEGIES:
+        raise ValueError("paging must be one of: " + ", ".join(pagination.STRATEGIES))
+    strategy = pagination.STRATEGIES[paging]
+    if city is None:
+        return strategy("users", USER_COLUMNS, ["id"])
+    return strategy("users", USER_COLUMNS, ["created_at", "id"], descending=True, where="city = ?", params=(city,),
+                    source="users INDEXED BY idx_users_city_created")
+
+
+# The users table is generated once, so its path is resolved once per process
+@functools.lru_cache(maxsize=None)
+def _users_path():
+    return lab_data.users_db()
+
+
+def _users():
+    return db_pool.for_database(_users_path())
+
+
+def check_list_users(params):
+    if params["city"] is not None and not isinstance(params["city"], str):
+        raise ValueError("city must be a string")
+    params["limit"] = pagination.check_limit(params["limit"])
+    keys = users_query(params["paging"], params["city"]).keys
+    if params["paging"] == "offset":
+        params["offset"] = pagination.check_offset(params["offset"])
+    elif params["cursor"]:
+        params["cursor"] = pagination.check_cursor(pagination.decode_cursor(params["cursor"]), keys)
+    return params
+
+
+# GET /api/users?limit=20&paging=keyset&cursor=... (or paging=offset&offset=40), optionally &city=
+@route("GET", "/api/users", check=check_list_users)
+def list_users(limit=pagination.DEFAULT_LIMIT, paging="keyset", cursor=None, offset=None, city=None):
+    query = users_query(paging, city)
+    position = offset if paging == "offset" else cursor or None
+    with _users().connection() as conn:
+        rows, following = query.page(conn, limit, position)
+    if following is None:
+        next_page = None
+    elif paging == "offset":
+        next_page = {"offset": following}
+    else:
+        next_page = {"cursor": pagination.encode_cursor(following)}
+    return Response(200, {"data": rows, "next": next_page})
+
+
+def check_get_user(params):
+    params["id"] = int(params["id"])
+    return params
+
+
+# GET /api/users/:id
+@route("GET", "/api/users/:id", check=check_get_user)
+def get_user(id):
+    with _users().connection() as conn:
+        row = conn.execute("SELECT %s FROM users WHERE id = ?" % ", ".join(USER_COLUMNS), (id,)).fetchone()
+    if row is None:
+        return Response(404, {"error": "User not found"})
+    return Response(200, dict(zip(USER_COLUMNS, row)))
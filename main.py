@@ -1,26 +1,38 @@
 import streamlit as st
-import backend_guide_using_py, js_fundamentals, node_js_core, Express_js, database, Authentication, API, error_handling, deployment
+import metrics
+import pages
+import renderer
+import settings
+
+# Hidden admin page with the render metrics
+if settings.ADMIN_TOKEN and st.query_params.get("admin") == settings.ADMIN_TOKEN:
+    renderer.render_metrics_panel()
+    st.stop()
+
+renderer.start_watcher()
+renderer.warm_diagrams()
 
 st.title("AJ\'s Guide to Backend using js")
 
 st.sidebar.title("Sequential Topics: ")
-page = st.sidebar.radio("Go to", ["Home", "Js Fundamentals", "Node js core", "Express", "Database in backend", "Authentication", "API", "Testing", "Deployment"])
+linked = pages.from_slug(st.query_params.get("page", ""))
+if "page" not in st.session_state:
+    st.session_state.page = linked or pages.PAGE_LABELS[0]
+page = st.sidebar.radio("Go to", pages.ALL_LABELS, key="page")
+renderer.render_search()
+
+# A deep link only applies while its page is selected
+section = st.query_params.get("section") if page == linked else None
+if linked and page != linked:
+    st.query_params.clear()
 
-if page == "Home":
-    backend_guide_using_py.show()
-elif page == "Js Fundamentals":
-    js_fundamentals.show()
-elif page == "Node js core":
-    node_js_core.show()
-elif page == "Express":
-    Express_js.show()
-elif page == "Database in backend":
-    database.show()
-elif page == "Authentication":
-    Authentication.show()
-elif page == "API":
-    API.show()
-elif page == "Testing":
-    error_handling.show()
-elif page == "Deployment":
-    deployment.show()
\ No newline at end of file
+with renderer.admitted():
+    metrics.record_rerun(renderer.session_id(), page)
+    renderer.track_session()
+    with metrics.timed("page_render_ms", page=page):
+        if page in pages.LABS:
+            renderer.render_lab(page)
+        else:
+            renderer.render_page(page, section)
+    renderer.prefetch_next(page)
+metrics.write_prometheus()
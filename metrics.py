@@ -0,0 +1,168 @@
+import collections
+import contextlib
+import os
+import threading
+import time
+
+import settings
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Samples kept per histogram. Quantiles are computed over this recent window.
+WINDOW = 2048
+
+_lock = threading.Lock()
+_histograms = {}  # (name, labels) -> Histogram
+_counters = collections.Counter()  # (name, labels) -> value
+# session id -> {"reruns": int, "fragment_runs": int, "page": str, "last_seen": float}, least
+# recently seen first and at most settings.METRICS_MAX_SESSIONS of them
+_sessions = collections.OrderedDict()
+_last_write = [0.0]
+
+
+class Histogram:
+    def __init__(self):
+        self.samples = collections.deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def increment(name, amount=1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += amount
+
+
+# Context manager that records how long its block took, in milliseconds
+@contextlib.contextmanager
+def timed(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000, **labels)
+
+
+# Function to return the counts of a session, marked as just seen. Called with _lock held.
+def _session(session_id):
+    session = _sessions.get(session_id)
+    if session is None:
+        session = _sessions[session_id] = {"reruns": 0, "fragment_runs": 0, "page": None, "last_seen": 0.0}
+        while len(_sessions) > settings.METRICS_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    else:
+        _sessions.move_to_end(session_id)
+    session["last_seen"] = time.time()
+    return session
+
+
+# Function to count a rerun, and a page view when the session switched pages
+def record_rerun(session_id, page):
+    with _lock:
+        session = _session(session_id)
+        session["reruns"] += 1
+        viewed = session["page"] != page
+        session["page"] = page
+        _counters[_key("reruns_total", {})] += 1
+        if viewed:
+            _counters[_key("page_views_total", {"page": page})] += 1
+
+
+# Function to count a fragment-scoped rerun, which does not run main.py
+def record_fragment_run(session_id, fragment):
+    with _lock:
+        _session(session_id)["fragment_runs"] += 1
+        _counters[_key("fragment_runs_total", {"fragment": fragment})] += 1
+
+
+def forget_session(session_id):
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+# Function to return plain rows for the metrics panel
+def snapshot():
+    histograms = []
+    counters = []
+    with _lock:
+        for (name, labels), histogram in sorted(_histograms.items()):
+            row = dict(labels, metric=name, count=histogram.count)
+            for q in QUANTILES:
+                row["p%d" % round(q * 100)] = round(histogram.quantile(q), 3)
+            histograms.append(row)
+        for (name, labels), value in sorted(_counters.items()):
+            counters.append(dict(labels, metric=name, value=value))
+        reruns = sorted(session["reruns"] for session in _sessions.values())
+    return {"histograms": histograms, "counters": counters, "sessions": len(reruns), "reruns_per_session": reruns}
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        escaped.append('%s="%s"' % (name, value))
+    return "{%s}" % ",".join(escaped)
+
+
+# Function to format every metric in the Prometheus text exposition format
+def prometheus_text(prefix="guide_"):
+    lines = []
+    with _lock:
+        seen = set()
+        for (name, labels), histogram in sorted(_histograms.items()):
+            metric = prefix + name
+            if metric not in seen:
+                seen.add(metric)
+                lines.append("# TYPE %s summary" % metric)
+            for q in QUANTILES:
+                lines.append("%s%s %s" % (metric, _labels_text(labels + (("quantile", q),)), histogram.quantile(q)))
+            lines.append("%s_sum%s %s" % (metric, _labels_text(labels), histogram.total))
+            lines.append("%s_count%s %d" % (metric, _labels_text(labels), histogram.count))
+        for (name, labels), value in sorted(_counters.items()):
+            metric = prefix + name
+            if metric not in seen:
+                seen.add(metric)
+                lines.append("# TYPE %s counter" % metric)
+            lines.append("%s%s %s" % (metric, _labels_text(labels), value))
+        lines.append("# TYPE %ssessions gauge" % prefix)
+        lines.append("%ssessions %d" % (prefix, len(_sessions)))
+    return "\n".join(lines) + "\n"
+
+
+# Function to write the Prometheus file, at most once every METRICS_WRITE_INTERVAL seconds
+def write_prometheus(path=None, force=False):
+    now = time.time()
+    if not force and now - _last_write[0] < settings.METRICS_WRITE_INTERVAL:
+        return
+    _last_write[0] = now
+    path = path or settings.METRICS_FILE
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "%s.%d.tmp" % (path, threading.get_ident())
+    with open(tmp, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
@@ -161,3 +161,7 @@ console.log(math.add(2, 3)); // Output: 5
     4. Why are streams beneficial when dealing with large files or data?  
     5. How does the CommonJS module system (require) work, and what are its key components?
     """)
+
+# To display the content, call the show function
+if __name__ == "__main__":
+    show()
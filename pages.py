@@ -0,0 +1,78 @@
+import importlib
+import re
+
+# Sidebar label -> module that holds the page's show() function.
+# Order matters: this is the "Sequential Topics" order shown in the sidebar.
+PAGES = {
+    "Home": "backend_guide_using_py",
+    "Js Fundamentals": "js_fundamentals",
+    "Node js core": "node_js_core",
+    "Express": "Express_js",
+    "Database in backend": "database",
+    "Authentication": "Authentication",
+    "API": "API",
+    "Testing": "error_handling",
+    "Deployment": "deployment",
+}
+
+PAGE_LABELS = list(PAGES)
+
+# Interactive lab pages, listed after the lessons. Their show() runs as-is: they are not
+# compiled, searched or exported like the lesson pages.
+LABS = {
+    "Indexing Lab": "indexing_lab",
+    "Connection Pool Lab": "pool_lab",
+    "Bulk-Write Lab": "bulk_lab",
+    "Pagination Lab": "pagination_lab",
+    "Document Store Lab": "docstore_lab",
+}
+
+LAB_LABELS = list(LABS)
+
+ALL_LABELS = PAGE_LABELS + LAB_LABELS
+
+# Lab modules imported so far in this process
+_loaded = {}
+
+
+# Function to import a lab module the first time it is opened. Lesson modules are never
+# imported: renderer.render_page serves them from the compiled content model.
+def load_lab(label):
+    module = _loaded.get(label)
+    if module is None:
+        module = importlib.import_module(LABS[label])
+        _loaded[label] = module
+    return module
+
+
+# Function to turn a label or title into a URL-safe slug ("5. Monitoring and Logging" -> "monitoring-and-logging")
+def slug(text):
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if words and words[0].isdigit():
+        words = words[1:]
+    return "-".join(words)
+
+
+# Function to build the deep link to a page, or to one section of it
+def link(label, section=None):
+    url = "?page=" + slug(label)
+    if section:
+        url += "&section=" + slug(section)
+    return url
+
+
+# Function to find a page label from its slug (None if unknown)
+def from_slug(page_slug):
+    for label in ALL_LABELS:
+        if slug(label) == page_slug:
+            return label
+    return None
+
+
+# Function to return the page after `label` in the sidebar order: the lessons, then the
+# labs (None for the last lab)
+def next_label(label):
+    if label not in ALL_LABELS:
+        return None
+    i = ALL_LABELS.index(label)
+    return ALL_LABELS[i + 1] if i + 1 < len(ALL_LABELS) else None
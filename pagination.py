@@ -0,0 +1,105 @@
+import abc
+import base64
+import json
+
+# Page sizes list endpoints accept
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+# Function to turn cursor values into the opaque string an API hands to clients, and back
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("invalid cursor %r" % cursor)
+
+
+def check_limit(limit):
+    limit = int(limit)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError("limit must be between 1 and %d" % MAX_LIMIT)
+    return limit
+
+
+def check_offset(offset):
+    offset = int(offset or 0)
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    return offset
+
+
+# Function to check a decoded keyset cursor: one plain value per key
+def check_cursor(values, keys):
+    plain = isinstance(values, list) and all(
+        isinstance(value, (int, float, str)) and not isinstance(value, bool) for value in values)
+    if not plain or len(values) != len(keys):
+        raise ValueError("cursor must hold %d values" % len(keys))
+    return values
+
+
+# A list query paged one way or another. `keys` are the columns the list is ordered by
+# and must identify a row (end with the primary key); `where` filters with `params`.
+# page(conn, limit, cursor) returns (rows as dicts, cursor of the next page or None).
+class Pagination(abc.ABC):
+    name = None
+
+    def __init__(self, table, columns, keys, descending=False, where="", params=(), source=None):
+        self.table = table
+        self.columns = list(columns) + [key for key in keys if key not in columns]
+        self.keys = list(keys)
+        self.descending = descending
+        self.where = where
+        self.params = tuple(params)
+        self.source = source or table  # e.g. "users INDEXED BY idx_users_city_created"
+
+    def _sql(self, extra_where, tail):
+        conditions = [c for c in (self.where, extra_where) if c]
+        order = ", ".join("%s %s" % (key, "DESC" if self.descending else "ASC") for key in self.keys)
+        return "SELECT %s FROM %s%s ORDER BY %s %s" % (
+            ", ".join(self.columns), self.source, " WHERE " + " AND ".join(conditions) if conditions else "", order,
+            tail)
+
+    def _rows(self, conn, sql, params):
+        return [dict(zip(self.columns, row)) for row in conn.execute(sql, params)]
+
+    @abc.abstractmethod
+    def page(self, conn, limit, cursor=None):
+        pass
+
+
+# LIMIT/OFFSET: the cursor is the number of rows to skip. Simple, and a client can jump
+# to any page, but the database still walks past every skipped row.
+class OffsetPagination(Pagination):
+    name = "offset"
+
+    def page(self, conn, limit, cursor=None):
+        offset = check_offset(cursor)
+        rows = self._rows(conn, self._sql("", "LIMIT ? OFFSET ?"), self.params + (limit, offset))
+        return rows, offset + limit if len(rows) == limit else None
+
+
+# Keyset (seek): the cursor holds the keys of the last row sent, and the next page starts
+# right after them, so the index jumps straight there however deep the page is.
+class KeysetPagination(Pagination):
+    name = "keyset"
+
+    def after(self, cursor):
+        values = list(cursor)
+        if len(values) != len(self.keys):
+            raise ValueError("cursor must hold %d values" % len(self.keys))
+        return "(%s) %s (%s)" % (", ".join(self.keys), "<" if self.descending else ">",
+                                 ", ".join("?" * len(self.keys))), tuple(values)
+
+    def page(self, conn, limit, cursor=None):
+        extra, values = self.after(cursor) if cursor is not None else ("", ())
+        rows = self._rows(conn, self._sql(extra, "LIMIT ?"), self.params + values + (limit,))
+        next_cursor = [rows[-1][key] for key in self.keys] if len(rows) == limit else None
+        return rows, next_cursor
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (OffsetPagination, KeysetPagination)}
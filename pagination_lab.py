@@ -0,0 +1,79 @@
+import pandas as pd
+import streamlit as st
+
+import lab_data
+import lab_load
+import local_api
+import pagination
+import renderer
+import settings
+
+DEPTHS = [0, 1, 10, 100, 1000, 10000, 25000, 49999]
+
+
+# Function for the prefetcher: open the pool and read the first page before the lab is opened
+def warm(should_stop):
+    if lab_data.users_db_ready():
+        renderer.users_db()
+        local_api.request("GET", "/api/users", {"limit": pagination.DEFAULT_LIMIT})
+
+
+def show():
+    st.title("Pagination Lab: OFFSET versus Keyset")
+    st.write("""
+    The `GET /api/users` and `GET /posts` endpoints in the lessons return every row at once. Real list endpoints return a
+    page at a time, and there are two common ways to ask for the next one. **OFFSET/LIMIT** skips a number of rows: easy,
+    but the database still walks past every skipped row, so deep pages get slower. **Keyset** (seek) pagination sends the
+    sort key of the last row instead, and the next query starts right after it through the index, at the same cost on
+    every page. This lab fetches pages at growing depths both ways from the same endpoint.
+    """)
+    st.code("""
+    // OFFSET: GET /api/users?page=500&limit=20
+    const users = await db.query('SELECT * FROM users ORDER BY id LIMIT ? OFFSET ?', [limit, (page - 1) * limit]);
+
+    // Keyset: GET /api/users?after=10000&limit=20, where 10000 is the last id the client received
+    const users = await db.query('SELECT * FROM users WHERE id > ? ORDER BY id LIMIT ?', [after, limit]);
+    res.json({ data: users, next: users.length === limit ? users[users.length - 1].id : null });
+    """, language="javascript")
+
+    renderer.users_db()
+    st.caption("`GET /api/users` on a SQLite table of %s generated users." % format(settings.LAB_USERS_ROWS, ","))
+
+    with st.form("pagination-lab"):
+        depths = st.multiselect("Page numbers to fetch", DEPTHS, default=DEPTHS)
+        limit = st.slider("Page size", 10, pagination.MAX_LIMIT, pagination.DEFAULT_LIMIT, step=10)
+        city = st.selectbox("Filter", ["All users, by id"] + ["%s, newest first" % city for city in lab_data.CITIES])
+        submitted = st.form_submit_button("Run")
+
+    if not submitted or not depths:
+        return
+    city = None if city.startswith("All users") else city.split(",")[0]
+    with st.spinner("Fetching pages..."):
+        rows = list(lab_load.compare_paging(sorted(depths), limit, city))
+    if not rows:
+        st.warning("Every page you picked is past the end of the list.")
+        return
+
+    results = pd.DataFrame(rows)
+    chart = results.pivot(index="rows_skipped", columns="paging", values="ms")
+    st.subheader("Page fetch latency (ms) by rows skipped")
+    st.line_chart(chart)
+    slower = chart[chart["offset"] > chart["keyset"] * 1.5]
+    if len(slower):
+        st.write("OFFSET falls behind from about **%s rows skipped** (page %d) in this run." % (
+            format(slower.index[0], ","), slower.index[0] // limit))
+    st.dataframe(results[["paging", "depth", "rows_skipped", "ms", "first_id"]], width="stretch",
+                 hide_index=True)
+
+    st.subheader("Try the endpoint")
+    first = local_api.request("GET", "/api/users", {"limit": 3, **({"city": city} if city else {})})
+    st.json(first.body)
+    st.caption("Pass `next.cursor` back as `cursor` to get the following page.")
+
+    st.subheader("What to look for")
+    st.write("""
+    - On the first pages both are about as fast: skipping a few hundred rows is cheap.
+    - OFFSET grows linearly with the rows skipped; keyset stays flat because it seeks into the index.
+    - Keyset cannot jump to an arbitrary page number, and its sort key must be unique (here `id`, or `created_at`
+      followed by `id`), so rows inserted while a client pages through are neither skipped nor repeated.
+    """)
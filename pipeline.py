@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bundles
+import content
+import diagrams
+import export
+import html_cache
+import pages
+import search
+import settings
+import shared_store
+
+BUILD_DIR = os.path.join(settings.CACHE_DIR, "build")
+
+STAGES = ("compile", "highlight", "diagrams", "index", "export", "shared")
+
+
+def _compiler_version():
+    with open(content.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Function to return the cache key of a compiled page: the compiler plus the page's source
+def _page_key(label, root, compiler):
+    with open(os.path.join(root, pages.PAGES[label] + ".py"), "rb") as f:
+        return hashlib.sha256(compiler.encode() + b"\x00" + f.read()).hexdigest()
+
+
+def _page_path(key):
+    return os.path.join(BUILD_DIR, "pages", key + ".pickle")
+
+
+# Worker: compile one page and keep it under its content key
+def _compile_unit(label, root, key):
+    page = content.compile_page(label, root)
+    path = _page_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as f:
+        pickle.dump(page, f)
+    os.replace(tmp, path)
+    return page
+
+
+# Worker: render the HTML fragments of one section (or of a page's intro and questions)
+def _highlight_unit(texts):
+    for text, kind, language in texts:
+        html_cache.write_fragment(text, kind, language)
+    return len(texts)
+
+
+def _map(executor, fn, *iterables):
+    return list(map(fn, *iterables) if executor is None else executor.map(fn, *iterables))
+
+
+def _compile(executor, root, force):
+    compiler = _compiler_version()
+    keys = {label: _page_key(label, root, compiler) for label in pages.PAGE_LABELS}
+    compiled = {}
+    for label, key in keys.items():
+        if not force and os.path.exists(_page_path(key)):
+            with open(_page_path(key), "rb") as f:
+                compiled[label] = pickle.load(f)
+    stale = [label for label in pages.PAGE_LABELS if label not in compiled]
+    for label, page in zip(stale, _map(executor, _compile_unit, stale, [root] * len(stale),
+                                       [keys[label] for label in stale])):
+        compiled[label] = page
+    # Merged in curriculum order whatever order the workers finished in
+    return {label: compiled[label] for label in pages.PAGE_LABELS}, len(keys), len(stale)
+
+
+def _highlight(executor, compiled, force):
+    units = []
+    seen = set()
+    for label in pages.PAGE_LABELS:
+        page = compiled[label]
+        texts = [(page.intro, "markdown", ""), (page.questions, "markdown", "")]
+        groups = [[text for text in texts if text[0]]] + [html_cache.section_fragments(s) for s in page.sections]
+        for group in groups:
+            unit = []
+            for text, kind, language in group:
+                key = html_cache.content_hash(kind, text, language)
+                # A fragment shared by two sections is rendered once
+                if key in seen:
+                    continue
+                seen.add(key)
+                if force or not os.path.exists(html_cache.fragment_path(key)):
+                    unit.append((text, kind, language))
+            units.append(unit)
+    stale = [unit for unit in units if unit]
+    _map(executor, _highlight_unit, stale)
+    return len(units), len(stale)
+
+
+def _diagrams(executor, force):
+    names = list(diagrams.sources())
+    stale = names if force else diagrams.stale()
+    _map(executor, diagrams.render_to_disk, stale)
+    return len(names), len(stale)
+
+
+def _index(executor, compiled, force):
+    digest = search.fingerprint(compiled)
+    path = settings.SEARCH_INDEX_FILE
+    if not force and os.path.exists(path) and search.SearchIndex.load(path).fingerprint == digest:
+        return len(compiled), 0
+    parts = _map(executor, search.page_terms, [compiled[label] for label in pages.PAGE_LABELS])
+    search.SearchIndex.merge(parts, digest).save(path)
+    return len(compiled), len(compiled)
+
+
+def _export(executor, compiled, force, out_dir):
+    written, total = export.export(out_dir, force, compiled, executor)
+    return total, len(written)
+
+
+def _shared(compiled, force):
+    version = bundles.Bundle.from_pages(compiled).version
+    shared = None if force else shared_store.SharedContent.open()
+    if shared is not None and shared.version == version:
+        return 1, 0
+    shared_store.build(compiled)
+    return 1, 1
+
+
+# Function to run compile -> highlight -> diagrams -> index -> export -> shared content
+# file. Pages and sections fan out over `workers` processes; units whose content hash is
+# unchanged are skipped. Returns {stage: {"units", "built", "ms"}}.
+def build(workers=None, force=False, out_dir=None, root=content.ROOT):
+    workers = workers or os.cpu_count() or 1
+    stats = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        units, built = result[-2:]
+        stats[stage] = {"units": units, "built": built, "ms": round((time.perf_counter() - start) * 1000, 1)}
+        return result
+
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        compiled = timed("compile", _compile, executor, root, force)[0]
+        timed("highlight", _highlight, executor, compiled, force)
+        timed("diagrams", _diagrams, executor, force)
+        timed("index", _index, executor, compiled, force)
+        timed("export", _export, executor, compiled, force, out_dir)
+        timed("shared", _shared, compiled, force)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    stats["total"] = {"ms": round((time.perf_counter() - start) * 1000, 1)}
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every content artifact in parallel, skipping unchanged units")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="rebuild every unit")
+    parser.add_argument("--out", default=settings.EXPORT_DIR, help="static export directory")
+    parser.add_argument("--root", default=content.ROOT, help="directory with the lesson modules")
+    parser.add_argument("--json", action="store_true", help="print the stage timings as JSON")
+    args = parser.parse_args()
+
+    stats = build(args.workers, args.force, args.out, args.root)
+    if args.json:
+        print(json.dumps(stats))
+        return
+    for stage in STAGES:
+        print("%-10s %3d/%-3d units rebuilt %9.1f ms" % (stage, stats[stage]["built"], stats[stage]["units"],
+                                                      stats[stage]["ms"]))
+    print("%-10s %29.1f ms" % ("total", stats["total"]["ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import pandas as pd
+import streamlit as st
+
+import lab_data
+import lab_load
+import renderer
+
+WORKER_COUNTS = [1, 2, 4, 8, 16, 32]
+
+
+# Function for the prefetcher: resolve the users table before the lab is opened
+def warm(should_stop):
+    if lab_data.users_db_ready():
+        renderer.users_db()
+
+
+def show():
+    st.title("Connection Pool Lab: Reusing Database Connections")
+    st.write("""
+    Opening a database connection costs a file open (or a TCP and auth handshake for MySQL) every time. The MySQL example
+    on the Database page calls `mysql.createConnection` for each use; a pool keeps a few connections open and lends them
+    out, so a request only waits when every connection is busy. This lab runs the same primary-key lookup both ways from
+    a growing number of threads and compares throughput and tail latency.
+    """)
+    st.code("""
+    const mysql = require('mysql');
+
+    // At most 10 connections, shared by every request
+    const pool = mysql.createPool({ connectionLimit: 10, host: 'localhost', user: 'root', database: 'my_database' });
+
+    app.get('/users/:id', (req, res) => {
+      pool.query('SELECT * FROM users WHERE id = ?', [req.params.id], (err, rows) => {
+        if (err) return res.status(500).send(err.message);
+        res.json(rows[0]);
+      });
+    });
+    """, language="javascript")
+
+    path = renderer.users_db()
+    with st.form("pool-lab"):
+        workers = st.multiselect("Concurrent workers", WORKER_COUNTS, default=[1, 4, 16])
+        requests = st.slider("Requests per run", 1000, 20000, 5000, step=1000)
+        pool_size = st.slider("Pool size", 1, 16, 4)
+        submitted = st.form_submit_button("Run")
+
+    if not submitted or not workers:
+        return
+    workers = sorted(workers)
+    progress = st.progress(0.0, "Running...")
+    rows = []
+    for row in lab_load.compare_pool(path, workers, requests, pool_size):
+        rows.append(row)
+        progress.progress(len(rows) / (2 * len(workers)), "%s, %d workers" % (row["mode"], row["workers"]))
+    progress.empty()
+
+    results = pd.DataFrame(rows)
+    st.subheader("Throughput (requests/s)")
+    st.line_chart(results.pivot(index="workers", columns="mode", values="throughput"))
+    st.subheader("p99 latency (ms)")
+    st.line_chart(results.pivot(index="workers", columns="mode", values="p99_ms"))
+    st.dataframe(results[["mode", "workers", "throughput", "p50_ms", "p95_ms", "p99_ms", "errors"]],
+                 width="stretch", hide_index=True)
+
+    st.subheader("What to look for")
+    st.write("""
+    - Connecting per request pays the open cost every time, so its throughput stays low however many workers you add.
+    - With more workers than pooled connections, requests queue for a free connection: the median stays low but p99
+      grows. Size the pool for the concurrency you expect, not for the number of users.
+    """)
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import html_cache
+import pages
+import settings
+
+
+# Function to compile a page, for the native render mode, which never reads HTML fragments
+def warm_page(store, label, should_stop):
+    if label in pages.PAGES:
+        store.get(label)
+
+
+# Function to compile a page and pre-render its HTML fragments, one unit at a time,
+# stopping as soon as should_stop() says so
+def warm_content(store, label, should_stop):
+    if label not in pages.PAGES:
+        return
+    page = store.get(label)
+    for text, kind, language in html_cache.fragments(page):
+        if should_stop():
+            return
+        html_cache.get_html(text, kind, language)
+
+
+# Function to import a lab page and let it warm the data it opens with, if it has a
+# warm(should_stop) function
+def warm_lab(store, label, should_stop):
+    if label not in pages.LABS:
+        return
+    warm = getattr(pages.load_lab(label), "warm", None)
+    if warm is not None and not should_stop():
+        warm(should_stop)
+
+
+# A warm-up in flight and the sessions waiting for it
+class _Job:
+    def __init__(self):
+        self.cancel = threading.Event()
+        self.sessions = set()
+        self.thread = None
+
+
+# Warms pages on background threads, one warm-up per page however many sessions asked
+# for it. Each session prefetches one page at a time: scheduling another page drops the
+# session's previous request, and a warm-up no session waits for any more is cancelled.
+# Each warm-up stops after `budget` seconds. HTML fragments are only pre-rendered with
+# `html` on, i.e. when the renderer serves them.
+class Prefetcher:
+    def __init__(self, store, budget=None, html=True):
+        self.store = store
+        self.budget = settings.PREFETCH_BUDGET if budget is None else budget
+        self.warmers = [warm_content if html else warm_page, warm_lab]
+        self.warmed = set()
+        self._lock = threading.Lock()
+        self._jobs = {}      # label -> _Job
+        self._sessions = {}  # session id -> label it waits for
+
+    def schedule(self, label, session_id=""):
+        with self._lock:
+            if self._sessions.get(session_id) == label:
+                return
+            self._release(session_id)
+            if label is None or label in self.warmed:
+                return
+            job = self._jobs.get(label)
+            if job is None or job.cancel.is_set():
+                job = self._jobs[label] = _Job()
+                job.thread = threading.Thread(target=self._run, args=(label, job), name="prefetch-" + label,
+                                              daemon=True)
+                job.thread.start()
+            job.sessions.add(session_id)
+            self._sessions[session_id] = label
+
+    # Function to drop a page from the warmed set, e.g. after its content was reloaded
+    def forget(self, label):
+        self.warmed.discard(label)
+
+    # Function to drop a session's request, e.g. when the session is closed
+    def cancel(self, session_id=""):
+        with self._lock:
+            self._release(session_id)
+
+    # Called with _lock held
+    def _release(self, session_id):
+        label = self._sessions.pop(session_id, None)
+        job = self._jobs.get(label)
+        if job is None:
+            return
+        job.sessions.discard(session_id)
+        if not job.sessions:
+            job.cancel.set()
+
+    # Function to block until the warm-ups in flight are done (used by benchmarks)
+    def wait(self, timeout=None):
+        with self._lock:
+            threads = [job.thread for job in self._jobs.values()]
+        for thread in threads:
+            thread.join(timeout)
+
+    def _run(self, label, job):
+        deadline = time.monotonic() + self.budget
+
+        def should_stop():
+            return job.cancel.is_set() or time.monotonic() > deadline
+
+        try:
+            for warm in self.warmers:
+                warm(self.store, label, should_stop)
+            if not should_stop():
+                self.warmed.add(label)
+        finally:
+            with self._lock:
+                if self._jobs.get(label) is job:
+                    del self._jobs[label]
+                for session_id in job.sessions:
+                    if self._sessions.get(session_id) == label:
+                        del self._sessions[session_id]
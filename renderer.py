@@ -0,0 +1,439 @@
+import contextlib
+import functools
+import os
+
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import admission
+import autocomplete
+import bundles
+import content
+import db_pool
+import diagrams
+import html_cache
+import lab_data
+import metrics
+import pages
+import prefetch
+import search
+import sessions
+import settings
+import shared_store
+import watcher
+
+
+# One compiled content store per process, shared by every session
+@st.cache_resource(show_spinner=False)
+def get_store():
+    return content.ContentStore()
+
+
+# A bundle from BUNDLE_DIR, loaded once per process. Bundles are served as they are:
+# hot reload only edits the live store, so a bundle always matches its version.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_bundle(version):
+    return bundles.Bundle.load(os.path.join(settings.BUNDLE_DIR, version + ".json"))
+
+
+# Background warm-up of the next page, one per content source (with one request per session)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _prefetcher(name, _source):
+    prefetcher = prefetch.Prefetcher(_source, html=_html_mode())
+    if isinstance(_source, content.ContentStore):
+        _source.on_swap.append(prefetcher.forget)
+    return prefetcher
+
+
+def get_prefetcher(source=None):
+    source = source or current_content()
+    return _prefetcher(_source_name(source), source)
+
+
+# Function to start warming the page readers usually open after this one
+def prefetch_next(label):
+    if settings.PREFETCH:
+        get_prefetcher().schedule(pages.next_label(label), session_id())
+
+
+# Watches the lesson sources and swaps recompiled pages into the store, one per process
+@st.cache_resource(show_spinner=False)
+def get_watcher():
+    return watcher.ContentWatcher(get_store()).start()
+
+
+def start_watcher():
+    if settings.HOT_RELOAD:
+        get_watcher()
+
+
+# Per-session memory accounting plus the reaper that closes idle sessions, one per process
+@st.cache_resource(show_spinner=False)
+def get_session_tracker():
+    tracker = sessions.SessionTracker()
+    sessions.SessionReaper(tracker, _close_session).start()
+    return tracker
+
+
+# Function to close a session from the reaper thread. Runtime.close_session has to run
+# on the server's event loop, which is the loop the public Runtime.stopped future belongs to.
+def _close_session(session_id):
+    get_gate().forget(session_id)
+    get_prefetcher(get_selector().for_session(session_id)).cancel(session_id)
+    if not Runtime.exists():
+        return
+    runtime = Runtime.instance()
+    runtime.stopped.get_loop().call_soon_threadsafe(runtime.close_session, session_id)
+
+
+# Function to record this session's activity and the size of its session state
+def track_session():
+    state_bytes = sessions.deep_size(st.session_state.to_dict())
+    get_session_tracker().touch(session_id(), state_bytes)
+
+
+# Rate limits and the in-flight cap for script runs, one per process
+@st.cache_resource(show_spinner=False)
+def get_gate():
+    return admission.Gate()
+
+
+# Function to return the reader's address, for the per-address rate limit. Behind a
+# trusted proxy it is the last X-Forwarded-For hop the proxies did not add themselves;
+# otherwise the header is whatever the client sent, and the connection's address is used.
+def _client_address():
+    address = getattr(st.context, "ip_address", None)
+    # Streamlit reports connections from the same box as None
+    if (address or "127.0.0.1") in settings.TRUSTED_PROXIES:
+        for hop in reversed(st.context.headers.get("X-Forwarded-For", "").split(",")):
+            hop = hop.strip()
+            if hop and hop not in settings.TRUSTED_PROXIES:
+                return hop
+    return address
+
+
+# Busy state of a rerun that was turned away. It is a fragment that the browser reruns
+# after `retry_after` seconds, and that rerun asks for the whole app with the widget
+# state of the moment, so a click made while waiting replaces the pending rerun.
+def _busy(retry_after):
+    def retry():
+        ctx = get_script_run_ctx()
+        if ctx is not None and ctx.fragment_ids_this_run:
+            st.session_state._busy_retry = True
+            st.rerun()
+        st.info(admission.BUSY_MESSAGE)
+    st.fragment(retry, run_every=retry_after)()
+
+
+# Context manager around the expensive part of a run (or of a fragment's rerun). A rerun
+# over the rate limits or the in-flight cap shows the busy state and ends the run there.
+@contextlib.contextmanager
+def admitted():
+    gate = get_gate()
+    retry = st.session_state.pop("_busy_retry", False)
+    decision = gate.enter(session_id(), _client_address(), retry)
+    if not decision.admitted:
+        _busy(min(decision.retry_after, settings.BUSY_RETRY))
+        st.stop()
+    try:
+        yield
+    finally:
+        gate.leave()
+
+
+# Content file mapped by every worker process, when one has been built. Hot reload
+# edits the live store, so the shared file is only used when it is turned off.
+@st.cache_resource(show_spinner=False)
+def get_shared_content():
+    if not settings.SHARED_STORE or settings.HOT_RELOAD:
+        return None
+    shared = shared_store.SharedContent.open()
+    if shared is not None:
+        html_cache.use_shared(shared)
+    return shared
+
+
+# Stable/canary content bundles. The initial stable one is the shared content file if
+# there is one, otherwise the live, hot-reloaded store.
+@st.cache_resource(show_spinner=False)
+def get_selector():
+    return bundles.BundleSelector(get_shared_content() or get_store())
+
+
+# Function to return the content (live store or bundle) this session is served from
+def current_content():
+    return get_selector().for_session(session_id())
+
+
+# Function to return the name a content source keeps across reloads: "live", or the
+# version of the bundle it serves
+def _source_name(source):
+    return getattr(source, "name", source.version)
+
+
+def _content_key(source):
+    return "%s:%s:%s" % (type(source).__name__, _source_name(source), source.version)
+
+
+# Search index over every lesson. It is keyed by the content version, so it is rebuilt
+# (once per process) after a page is reloaded or a bundle is staged.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _search_index(key, _source):
+    if isinstance(_source, shared_store.SharedContent):
+        return _source.search_index()
+    return search.load_index(search.index_path(_source_name(_source)), compiled=_source.all())
+
+
+def get_search_index():
+    source = current_content()
+    return _search_index(_content_key(source), source)
+
+
+# Typeahead trie over section titles and code identifiers, shared by all sessions
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _trie(key, _source):
+    return autocomplete.Trie.build(_source.all())
+
+
+def get_trie():
+    source = current_content()
+    return _trie(_content_key(source), source)
+
+
+def _html_mode():
+    return settings.RENDER_MODE in ("html", "coalesced")
+
+
+def _coalesced_mode():
+    return settings.RENDER_MODE == "coalesced"
+
+
+# Function to display a markdown field, pre-rendered to HTML when html mode is on
+def _markdown(text):
+    if _html_mode():
+        st.html(html_cache.get_html(text))
+    else:
+        st.write(text)
+
+
+def _code(code, language):
+    if _html_mode():
+        st.html(html_cache.get_html(code, "code", language))
+    else:
+        st.code(code, language=language)
+
+
+# Function to return the id of the browser session running this script
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "bare"
+
+
+# Decorator that makes a function an st.fragment. Its fragment-scoped reruns do not go
+# through main.py, so they are counted and admitted here.
+def fragment(name, run_every=None):
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            if ctx is None or not ctx.fragment_ids_this_run:
+                return func(*args, **kwargs)
+            metrics.record_fragment_run(session_id(), name)
+            with admitted():
+                return func(*args, **kwargs)
+        return st.fragment(run, run_every=run_every)
+    return decorate
+
+
+# Function to display one lesson section
+def render_section(section, page_label):
+    with metrics.timed("section_render_ms", page=page_label, section=section.title):
+        _render_section(section)
+        _render_diagrams(page_label, section)
+
+
+# Every diagram rendered to SVG once per process, before the first page is served
+@st.cache_resource(show_spinner=False)
+def warm_diagrams():
+    return diagrams.warm()
+
+
+# Function to display the diagrams of a section from the cache. A diagram that is not
+# cached is skipped rather than rendered during the rerun.
+def _render_diagrams(page_label, section):
+    for name in diagrams.section_diagrams(page_label, section.title):
+        svg = diagrams.get_svg(name)
+        if svg is not None:
+            st.html(svg)
+
+
+def _render_section(section):
+    if _coalesced_mode():
+        # The whole section as a single element, i.e. one forward message
+        st.html(html_cache.section_html(section, pages.slug(section.title)))
+        return
+    st.header(section.title)
+    if section.explanation:
+        st.subheader("Explanation:")
+        _markdown(section.explanation)
+    for example in section.examples:
+        st.subheader(example.label + ":")
+        _code(example.code, example.language)
+    if section.use_case:
+        st.subheader("Practical Use Case:")
+        _markdown(section.use_case)
+    if section.assignment:
+        st.subheader("Assignment:")
+        _markdown(section.assignment)
+
+
+# Function to display the topic picked in a page's selector. It is a fragment, so
+# picking another topic reruns only this function, not main.py.
+@fragment("topic")
+def render_topic(page, index=0):
+    st.subheader(page.selector.title)
+    option = st.selectbox(page.selector.label, page.selector.options, index=index, key="topic:" + page.label)
+    render_section(page.sections[page.selector.options.index(option)], page.label)
+
+
+# Function to find the section a ?section= slug points at. A prefix of the slug is
+# enough, so "monitoring" finds "5. Monitoring and Logging".
+def find_section(page, section_slug):
+    titles = [section.title for section in page.sections]
+    if page.questions:
+        titles.append(content.QUESTIONS_HEADER)
+    slugs = [pages.slug(title) for title in titles]
+    if section_slug in slugs:
+        return slugs.index(section_slug)
+    for i, candidate in enumerate(slugs):
+        if candidate.startswith(section_slug + "-"):
+            return i
+    return None
+
+
+# Function to display a section only once the reader asks for it
+def _render_collapsed(page, title, render):
+    if st.toggle("Show " + title, key="show:%s:%s" % (page.label, title)):
+        render()
+
+
+def _render_questions(page):
+    if _coalesced_mode():
+        st.html("<h2>%s</h2>\n%s" % (content.QUESTIONS_HEADER, html_cache.get_html(page.questions)))
+        return
+    st.header(content.QUESTIONS_HEADER)
+    _markdown(page.questions)
+
+
+# Function to display a page from the compiled content model. With a section slug
+# (from ?section=) only that section is rendered; the others stay collapsed.
+def render_page(label, section_slug=None):
+    page = current_content().get(label)
+    focus = find_section(page, section_slug) if section_slug else None
+
+    if _html_mode():
+        st.html("<style>%s</style>" % html_cache.stylesheet())
+    if page.title:
+        st.title(page.title)
+    if page.intro:
+        _markdown(page.intro)
+
+    if page.selector:
+        index = focus if focus is not None and focus < len(page.sections) else 0
+        render_topic(page, index)
+    else:
+        for i, section in enumerate(page.sections):
+            if focus is None or i == focus:
+                render_section(section, page.label)
+            else:
+                _render_collapsed(page, section.title, lambda section=section: render_section(section, page.label))
+
+    if page.questions:
+        if focus is None or focus == len(page.sections) or page.selector:
+            _render_questions(page)
+        else:
+            _render_collapsed(page, content.QUESTIONS_HEADER, lambda: _render_questions(page))
+
+
+# The users table the labs query, generated once per machine and shared by every session
+@st.cache_resource(show_spinner="Generating the users table (first visit only)...")
+def users_db():
+    return lab_data.users_db()
+
+
+# Function to run an interactive lab page
+def render_lab(label):
+    pages.load_lab(label).show()
+
+
+# Function to display the sidebar search box and its deep-linked results
+def render_search():
+    query = st.sidebar.text_input("Search lessons", placeholder="e.g. rate limiting")
+    if not query.strip():
+        return
+    suggestions = get_trie().suggest(query, limit=5)
+    if suggestions:
+        st.sidebar.caption("Suggestions: " + ", ".join("[%s](%s)" % (text, link) for text, link in suggestions))
+    hits = get_search_index().search(query, limit=8)
+    if not hits:
+        st.sidebar.caption("No matching sections.")
+    for hit in hits:
+        st.sidebar.markdown("[%s](%s)  \n%s" % (hit["section"], hit["link"], hit["page"]))
+
+
+# Function to display the admin metrics panel
+def render_metrics_panel():
+    data = metrics.snapshot()
+    st.title("Render metrics")
+    reruns = data["reruns_per_session"]
+    st.write("**Live sessions:** %d, **reruns per session (median):** %s"
+             % (data["sessions"], reruns[len(reruns) // 2] if reruns else 0))
+    st.subheader("Timings (ms)")
+    st.dataframe(data["histograms"], width="stretch")
+    st.subheader("Counters")
+    st.dataframe(data["counters"], width="stretch")
+    st.subheader("Sessions")
+    rows = sorted(get_session_tracker().snapshot(), key=lambda row: -row["state_bytes"])
+    st.write("**Tracked:** %d, **session state total:** %.1f KB"
+             % (len(rows), sum(row["state_bytes"] for row in rows) / 1024))
+    st.dataframe(rows[:50], width="stretch")
+    st.subheader("Admission")
+    st.write(", ".join("**%s:** %s" % (name.replace("_", " ").capitalize(), value)
+                       for name, value in get_gate().snapshot().items()))
+    pools = [pool.snapshot() for pool in db_pool.pools()]
+    if pools:
+        st.subheader("Database pools")
+        st.dataframe(pools, width="stretch")
+    render_bundle_controls()
+    st.subheader("Prometheus")
+    st.code(metrics.prometheus_text(), language="text")
+
+
+# Function to display the stage/promote/rollback controls of the content bundles
+def render_bundle_controls():
+    selector = get_selector()
+    st.subheader("Content bundles")
+    canary = selector.canary.version if selector.canary else "none"
+    st.write("**Stable:** `%s`, **canary:** `%s` at %d%% of sessions"
+             % (selector.stable.version, canary, selector.percent))
+
+    versions = bundles.available()
+    if not versions:
+        st.caption("No bundles in %s yet, build one with `python -m bundles build`." % settings.BUNDLE_DIR)
+        return
+    version = st.selectbox("Bundle", versions)
+    percent = st.slider("Canary percentage", 0, 100, selector.percent or 10)
+    stage, adjust, promote, rollback = st.columns(4)
+    if stage.button("Stage as canary"):
+        selector.stage(get_bundle(version), percent)
+        st.rerun()
+    if adjust.button("Set percentage", disabled=selector.canary is None):
+        selector.set_percent(percent)
+        st.rerun()
+    if promote.button("Promote", disabled=selector.canary is None):
+        selector.promote()
+        st.rerun()
+    if rollback.button("Roll back", disabled=selector.canary is None):
+        selector.rollback()
+        st.rerun()
@@ -0,0 +1,143 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import content
+import pages
+import settings
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+WORD = re.compile(r"[A-Za-z0-9_$]+")
+CAMEL = re.compile(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])")
+STOPWORDS = frozenset("a an and are as at be by for from how in is it of on or that the this to with you your".split())
+
+
+# Function to split text into lowercase terms. Code identifiers are indexed whole and
+# by their camelCase parts, so "createReadStream" matches "stream" too.
+def tokenize(text):
+    terms = []
+    for word in WORD.findall(text):
+        lower = word.lower()
+        if lower not in STOPWORDS:
+            terms.append(lower)
+        parts = CAMEL.findall(word)
+        if len(parts) > 1:
+            terms += [p.lower() for p in parts if p.lower() not in STOPWORDS]
+    return terms
+
+
+# Function to list the searchable documents of a page: one per section, plus its questions
+def page_documents(page):
+    docs = []
+    for section in page.sections:
+        text = "\n".join([section.title, section.explanation, section.use_case, section.assignment]
+                         + [e.code for e in section.examples])
+        docs.append(({"page": page.label, "section": section.title, "link": pages.link(page.label, section.title)}, text))
+    if page.questions:
+        docs.append(({"page": page.label, "section": content.QUESTIONS_HEADER,
+                      "link": pages.link(page.label, content.QUESTIONS_HEADER)}, page.questions))
+    return docs
+
+
+# Function to tokenize one page: (meta, number of terms, [(term, frequency), ...]) per document
+def page_terms(page):
+    parts = []
+    for meta, text in page_documents(page):
+        terms = tokenize(text)
+        parts.append((meta, len(terms), sorted(Counter(terms).items())))
+    return parts
+
+
+def fingerprint(compiled):
+    key = repr([compiled[label] for label in pages.PAGE_LABELS])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    def __init__(self, docs, postings, lengths, fingerprint=""):
+        self.docs = docs          # doc id -> {"page", "section", "link"}
+        self.postings = postings  # term -> [[doc id, term frequency], ...]
+        self.lengths = lengths    # doc id -> number of terms
+        self.fingerprint = fingerprint
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        n = len(docs)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in postings.items()}
+
+    @classmethod
+    def build(cls, compiled):
+        return cls.merge([page_terms(compiled[label]) for label in pages.PAGE_LABELS], fingerprint(compiled))
+
+    # Function to combine page_terms() results, given in page order, into one index
+    @classmethod
+    def merge(cls, parts, fingerprint=""):
+        docs, postings, lengths = [], {}, []
+        for part in parts:
+            for meta, length, counts in part:
+                doc_id = len(docs)
+                docs.append(meta)
+                lengths.append(length)
+                for term, tf in counts:
+                    postings.setdefault(term, []).append([doc_id, tf])
+        return cls(docs, postings, lengths, fingerprint)
+
+    # Function to return the top `limit` documents for a query, ranked by BM25
+    def search(self, query, limit=10):
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = K1 * (1 - B + B * self.lengths[doc_id] / self.average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [dict(self.docs[doc_id], score=round(score, 3)) for doc_id, score in best]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = {"fingerprint": self.fingerprint, "docs": self.docs, "postings": self.postings, "lengths": self.lengths}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["docs"], data["postings"], data["lengths"], data["fingerprint"])
+
+
+# Function to return the index file of a content source: SEARCH_INDEX_FILE for the live
+# content, one file per bundle version otherwise
+def index_path(name="live"):
+    if name == "live":
+        return settings.SEARCH_INDEX_FILE
+    root, ext = os.path.splitext(settings.SEARCH_INDEX_FILE)
+    return "%s.%s%s" % (root, name, ext)
+
+
+# Function to load the serialized index, rebuilding it if the lessons changed since it
+# was saved
+def load_index(path=None, compiled=None):
+    path = path or settings.SEARCH_INDEX_FILE
+    compiled = compiled or content.compile_all()
+    if os.path.exists(path):
+        index = SearchIndex.load(path)
+        if index.fingerprint == fingerprint(compiled):
+            return index
+    index = SearchIndex.build(compiled)
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    index = load_index()
+    print("%d documents, %d terms in %s" % (len(index.docs), len(index.postings), settings.SEARCH_INDEX_FILE))
@@ -0,0 +1,107 @@
+import collections
+import logging
+import sys
+import threading
+import time
+
+import metrics
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Objects visited per size estimate, so a huge value cannot stall a rerun
+MAX_OBJECTS = 10000
+
+
+# Function to estimate the memory held by an object and everything it references
+def deep_size(obj, max_objects=MAX_OBJECTS):
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < max_objects:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, collections.deque)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+
+# Last activity and session-state size of every live session, in LRU order
+class SessionTracker:
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._sessions = collections.OrderedDict()  # session id -> {"last_seen", "state_bytes"}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id, state_bytes):
+        with self._lock:
+            self._sessions[session_id] = {"last_seen": self.clock(), "state_bytes": state_bytes}
+            self._sessions.move_to_end(session_id)
+        metrics.observe("session_state_bytes", state_bytes)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    # Function to list sessions idle for over `ttl` seconds, then the least recently
+    # used ones beyond `max_sessions`
+    def to_evict(self, ttl, max_sessions, now=None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            idle = [sid for sid, info in self._sessions.items() if now - info["last_seen"] > ttl]
+            idle_set = set(idle)
+            live = [sid for sid in self._sessions if sid not in idle_set]
+            return idle + live[:max(0, len(live) - max_sessions)]
+
+    def snapshot(self):
+        now = self.clock()
+        with self._lock:
+            return [{"session": sid, "state_bytes": info["state_bytes"], "idle_s": round(now - info["last_seen"], 1)}
+                    for sid, info in self._sessions.items()]
+
+
+# Closes idle and over-cap sessions every `interval` seconds. `close` is called with
+# each evicted session id.
+class SessionReaper:
+    def __init__(self, tracker, close, ttl=None, max_sessions=None, interval=None):
+        self.tracker = tracker
+        self.close = close
+        self.ttl = settings.SESSION_TTL if ttl is None else ttl
+        self.max_sessions = settings.MAX_SESSIONS if max_sessions is None else max_sessions
+        self.interval = settings.REAPER_INTERVAL if interval is None else interval
+        self._stop = threading.Event()
+
+    def reap(self, now=None):
+        evicted = self.tracker.to_evict(self.ttl, self.max_sessions, now)
+        for session_id in evicted:
+            try:
+                self.close(session_id)
+            except Exception:
+                logger.exception("Could not close session %s", session_id)
+            self.tracker.forget(session_id)
+            metrics.forget_session(session_id)
+        if evicted:
+            metrics.increment("sessions_evicted_total", len(evicted))
+        return evicted
+
+    def start(self):
+        threading.Thread(target=self._run, name="session-reaper", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.reap()
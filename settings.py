@@ -0,0 +1,85 @@
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Where build artifacts (pre-rendered HTML, indexes, ...) are written
+CACHE_DIR = os.environ.get("GUIDE_CACHE_DIR", os.path.join(ROOT, ".cache"))
+
+# "native" (the default) uses st.write/st.code, "html" emits pre-rendered HTML from
+# html_cache and "coalesced" sends each section as a single pre-rendered HTML element
+RENDER_MODE = os.environ.get("GUIDE_RENDER_MODE", "native")
+
+# Prometheus text file with the render metrics, rewritten at most every N seconds
+METRICS_FILE = os.environ.get("GUIDE_METRICS_FILE", os.path.join(CACHE_DIR, "metrics.prom"))
+METRICS_WRITE_INTERVAL = float(os.environ.get("GUIDE_METRICS_WRITE_INTERVAL", "10"))
+
+# The metrics panel is shown at ?admin=<token>. It stays hidden while this is empty.
+ADMIN_TOKEN = os.environ.get("GUIDE_ADMIN_TOKEN", "")
+
+# Output directory of `python -m export`
+EXPORT_DIR = os.environ.get("GUIDE_EXPORT_DIR", os.path.join(CACHE_DIR, "site"))
+
+# Serialized search index, rebuilt when the lesson content changes
+SEARCH_INDEX_FILE = os.environ.get("GUIDE_SEARCH_INDEX_FILE", os.path.join(CACHE_DIR, "search_index.json"))
+
+# Warm the next "Sequential Topics" page in the background, within this many seconds
+PREFETCH = os.environ.get("GUIDE_PREFETCH", "1") == "1"
+PREFETCH_BUDGET = float(os.environ.get("GUIDE_PREFETCH_BUDGET", "2"))
+
+# Recompile a lesson page when its source file changes, without a restart
+HOT_RELOAD = os.environ.get("GUIDE_HOT_RELOAD", "1") == "1"
+HOT_RELOAD_INTERVAL = float(os.environ.get("GUIDE_HOT_RELOAD_INTERVAL", "1"))
+
+# Directory of packaged content bundles (`python -m bundles build`)
+BUNDLE_DIR = os.environ.get("GUIDE_BUNDLE_DIR", os.path.join(CACHE_DIR, "bundles"))
+
+# Sessions idle for longer than this many seconds are closed, and at most
+# MAX_SESSIONS are kept alive per process (least recently used closed first)
+SESSION_TTL = float(os.environ.get("GUIDE_SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.environ.get("GUIDE_MAX_SESSIONS", "500"))
+REAPER_INTERVAL = float(os.environ.get("GUIDE_REAPER_INTERVAL", "30"))
+# Sessions the render metrics keep per-session counts for (least recently seen dropped first)
+METRICS_MAX_SESSIONS = int(os.environ.get("GUIDE_METRICS_MAX_SESSIONS", str(MAX_SESSIONS)))
+
+# Memory-mapped content file shared by every worker process on the box
+# (`python -m shared_store build`). Used instead of per-process copies when it exists
+# and GUIDE_HOT_RELOAD is off.
+SHARED_STORE = os.environ.get("GUIDE_SHARED_STORE", "1") == "1"
+SHARED_STORE_FILE = os.environ.get("GUIDE_SHARED_STORE_FILE", os.path.join(CACHE_DIR, "content.shm"))
+# Pages of the shared file each process keeps decoded (the ones being read right now)
+SHARED_PAGE_CACHE_SIZE = int(os.environ.get("GUIDE_SHARED_PAGE_CACHE_SIZE", "4"))
+
+# Admission control: reruns per second (and burst) allowed per session and per client
+# address, the cap on script runs rendering at once (0 = no cap), and the longest a
+# turned-away rerun waits before retrying with the latest widget state.
+RERUN_RATE = float(os.environ.get("GUIDE_RERUN_RATE", "4"))
+RERUN_BURST = int(os.environ.get("GUIDE_RERUN_BURST", "8"))
+ADDRESS_RERUN_RATE = float(os.environ.get("GUIDE_ADDRESS_RERUN_RATE", "20"))
+ADDRESS_RERUN_BURST = int(os.environ.get("GUIDE_ADDRESS_RERUN_BURST", "40"))
+MAX_IN_FLIGHT = int(os.environ.get("GUIDE_MAX_IN_FLIGHT", "16"))
+BUSY_RETRY = float(os.environ.get("GUIDE_BUSY_RETRY", "0.5"))
+# Comma-separated addresses of the reverse proxies in front of the app (e.g. 127.0.0.1 for
+# one on the same box). X-Forwarded-For is only believed on connections from one of them.
+TRUSTED_PROXIES = {address.strip() for address in os.environ.get("GUIDE_TRUSTED_PROXIES", "").split(",")
+                   if address.strip()}
+
+# Rendered diagrams (SVG) kept in memory per process; the rest are read from disk
+DIAGRAM_CACHE_SIZE = int(os.environ.get("GUIDE_DIAGRAM_CACHE_SIZE", "32"))
+
+# Interactive labs: where their SQLite files live, and the size of the generated users table
+LAB_DIR = os.environ.get("GUIDE_LAB_DIR", os.path.join(CACHE_DIR, "labs"))
+LAB_USERS_ROWS = int(os.environ.get("GUIDE_LAB_USERS_ROWS", "1000000"))
+# Documents in the Document Store Lab's users collection, the first of the same users. Each
+# process replays it into memory, so it is smaller than the table (benchmarks use 10^6)
+LAB_DOCS_ROWS = int(os.environ.get("GUIDE_LAB_DOCS_ROWS", "100000"))
+
+# SQLite connection pools: connections opened up front and at most, seconds to wait for a
+# free one, and idle seconds after which a connection is health-checked before reuse
+DB_POOL_MIN = int(os.environ.get("GUIDE_DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("GUIDE_DB_POOL_MAX", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("GUIDE_DB_POOL_TIMEOUT", "5"))
+DB_POOL_CHECK_AFTER = float(os.environ.get("GUIDE_DB_POOL_CHECK_AFTER", "30"))
+
+# Bulk-write lab: seconds the single-insert and batch modes may run, and jobs running at once per process
+BULK_TIME_BUDGET = float(os.environ.get("GUIDE_BULK_TIME_BUDGET", "10"))
+BULK_MAX_JOBS = int(os.environ.get("GUIDE_BULK_MAX_JOBS", "2"))
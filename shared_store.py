@@ -0,0 +1,260 @@
+import argparse
+import bisect
+import collections
+import dataclasses
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+import bundles
+import content
+import html_cache
+import pages
+import search
+import settings
+
+# Changed whenever the layout of the file changes; files with another magic are rebuilt
+MAGIC = b"GUIDESH2"
+
+# Magic, then the length of the JSON table of contents that follows it
+HEADER = struct.Struct("<8sQ")
+
+DIGEST_SIZE = 32
+
+# Key of the one-item dicts that stand for a string in the pages of the table of contents
+STRING = "$s"
+
+
+# Function to pack a (offset, length) reference into the data region as one int
+def _ref(offset, length):
+    return offset << 32 | length
+
+
+# Function to replace every string of a page's dict form with {STRING: reference into the
+# data region}. Other values (numbers, booleans, None) are kept as they are.
+def _refs(value, add):
+    if isinstance(value, str):
+        return {STRING: add(value.encode("utf-8"))}
+    if isinstance(value, dict):
+        return {key: _refs(item, add) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_refs(item, add) for item in value]
+    return value
+
+
+# Function to write the lesson text, the rendered HTML fragments and the search postings
+# of every page into one file. Workers map it read-only and share its pages.
+def build(compiled=None, path=None):
+    compiled = compiled or content.compile_all()
+    path = path or settings.SHARED_STORE_FILE
+    data = bytearray()
+    offsets = {}
+
+    def add(blob):
+        # Identical strings (a code sample shown on two pages, ...) are stored once
+        ref = offsets.get(blob)
+        if ref is None:
+            ref = offsets[blob] = _ref(len(data), len(blob))
+            data.extend(blob)
+        return ref
+
+    def align():
+        data.extend(b"\0" * (-len(data) % 8))
+
+    page_refs = {label: _refs(dataclasses.asdict(compiled[label]), add) for label in pages.PAGE_LABELS}
+
+    fragments = {}
+    for label in pages.PAGE_LABELS:
+        for text, kind, language in html_cache.fragments(compiled[label]):
+            key = html_cache.content_hash(kind, text, language)
+            fragments[bytes.fromhex(key)] = html_cache.get_html(text, kind, language)
+    refs = array("Q", [add(fragments[digest].encode("utf-8")) for digest in sorted(fragments)])
+    align()
+    digests_at = len(data)
+    data.extend(b"".join(sorted(fragments)))
+    align()
+    html_refs_at = len(data)
+    data.extend(refs.tobytes())
+
+    index = search.SearchIndex.build(compiled)
+    terms = {}
+    flat = array("I")
+    for term in sorted(index.postings):
+        postings = index.postings[term]
+        terms[term] = [len(flat), len(postings)]
+        for doc_id, tf in postings:
+            flat += array("I", [doc_id, tf])
+    align()
+    postings_at = len(data)
+    data.extend(flat.tobytes())
+
+    toc = {
+        "version": bundles.Bundle.from_pages(compiled).version,
+        "pages": page_refs,
+        "html": {"count": len(fragments), "digests": digests_at, "refs": html_refs_at},
+        "search": {"fingerprint": index.fingerprint, "docs": index.docs, "lengths": index.lengths,
+                   "terms": terms, "postings": postings_at, "size": len(flat)},
+    }
+    toc = json.dumps(toc, separators=(",", ":")).encode("utf-8")
+    # The data region starts 8-byte aligned, so the integer arrays in it can be cast in place
+    toc += b" " * (-(HEADER.size + len(toc)) % 8)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(toc)))
+        f.write(toc)
+        f.write(data)
+    # Replaced, not rewritten: processes that mapped the old file keep reading it intact
+    os.replace(tmp, path)
+    return path
+
+
+# Sorted fragment digests, laid out back to back in the mapping, searchable with bisect
+class _Digests:
+    def __init__(self, view, count):
+        self._view = view
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return bytes(self._view[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+
+
+# term -> (doc id, term frequency) pairs, read straight out of the mapping
+class _Postings:
+    def __init__(self, flat, terms):
+        self._flat = flat
+        self._terms = terms
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def __getitem__(self, term):
+        start, count = self._terms[term]
+        pairs = self._flat[start * 4:(start + count * 2) * 4].cast("I")
+        return zip(pairs[::2], pairs[1::2])
+
+
+# Search index whose postings stay in the shared mapping
+class SharedSearchIndex(search.SearchIndex):
+    def __init__(self, docs, postings, lengths, fingerprint, counts):
+        self.docs = docs
+        self.postings = postings
+        self.lengths = lengths
+        self.fingerprint = fingerprint
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        n = len(docs)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in counts}
+
+
+# Read-only view of a file written by build(). Nothing is copied when it is opened:
+# fragments are decoded from the mapping when they are asked for, and every worker on
+# the box shares one copy of them in the page cache. Pages are decoded when they are asked
+# for; only the SHARED_PAGE_CACHE_SIZE most recently used stay decoded, so a process never
+# holds a private copy of every lesson.
+# It has the same get()/all()/version interface as content.ContentStore.
+class SharedContent:
+    def __init__(self, path=None):
+        self.path = path or settings.SHARED_STORE_FILE
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, toc_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError("%s is not a shared content file" % self.path)
+        self._view = memoryview(self._map)
+        toc = json.loads(bytes(self._view[HEADER.size:HEADER.size + toc_size]))
+        self._data = self._view[HEADER.size + toc_size:]
+        self.version = toc["version"]
+        self._pages = toc["pages"]
+        self._decoded = collections.OrderedDict()  # label -> Page, least recently used first
+        self._lock = threading.Lock()
+        self._html = toc["html"]
+        self._search = toc["search"]
+        count = self._html["count"]
+        self._digests = _Digests(self._data[self._html["digests"]:], count)
+        self._html_refs = self._data[self._html["refs"]:self._html["refs"] + count * 8].cast("Q")
+
+    # Function to map the file if it has been built (None if it is missing or was written
+    # in another format, so that it gets rebuilt)
+    @classmethod
+    def open(cls, path=None):
+        path = path or settings.SHARED_STORE_FILE
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except ValueError:
+            return None
+
+    def _text(self, ref):
+        offset, length = ref >> 32, ref & 0xFFFFFFFF
+        return str(self._data[offset:offset + length], "utf-8")
+
+    def _strings(self, value):
+        if isinstance(value, dict):
+            if STRING in value:
+                return self._text(value[STRING])
+            return {key: self._strings(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._strings(item) for item in value]
+        return value
+
+    def get(self, label):
+        with self._lock:
+            page = self._decoded.get(label)
+            if page is not None:
+                self._decoded.move_to_end(label)
+                return page
+        page = bundles._page_from_dict(self._strings(self._pages[label]))
+        with self._lock:
+            self._decoded[label] = page
+            self._decoded.move_to_end(label)
+            while len(self._decoded) > settings.SHARED_PAGE_CACHE_SIZE:
+                self._decoded.popitem(last=False)
+        return page
+
+    def all(self):
+        return {label: self.get(label) for label in pages.PAGE_LABELS}
+
+    # Function to return the rendered HTML for a fragment key (None if it is not in the file)
+    def html(self, key):
+        digest = bytes.fromhex(key)
+        i = bisect.bisect_left(self._digests, digest)
+        if i == len(self._digests) or self._digests[i] != digest:
+            return None
+        return self._text(self._html_refs[i])
+
+    def search_index(self):
+        data = self._search
+        terms = data["terms"]
+        flat = self._data[data["postings"]:data["postings"] + data["size"] * 4]
+        counts = ((term, count) for term, (_start, count) in terms.items())
+        return SharedSearchIndex(data["docs"], _Postings(flat, terms), data["lengths"], data["fingerprint"], counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the shared, memory-mapped content file")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--path", default=settings.SHARED_STORE_FILE)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print("wrote " + build(path=args.path))
+    shared = SharedContent(args.path)
+    print("%s: version %s, %d pages, %d HTML fragments, %d search terms, %d bytes" % (
+        args.path, shared.version, len(shared._pages), shared._html["count"],
+        len(shared._search["terms"]), os.path.getsize(args.path)))
+
+
+if __name__ == "__main__":
+    main()
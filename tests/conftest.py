@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Build artifacts (HTML cache, indexes, metrics) of the test run go to a scratch directory,
+# also for the servers the tests start. settings reads this at import time.
+os.environ.setdefault("GUIDE_CACHE_DIR", tempfile.mkdtemp(prefix="guide-tests-"))
+
+
+@pytest.fixture
+def lesson_root(tmp_path):
+    """A copy of the lesson sources that a test may edit."""
+    import shutil
+
+    from pages import PAGES
+    for module in PAGES.values():
+        shutil.copy(os.path.join(ROOT, module + ".py"), tmp_path)
+    return str(tmp_path)
@@ -0,0 +1,84 @@
+import asyncio
+import types
+
+import pytest
+
+import renderer
+import settings
+from benchmarks.ws_client import Session, running_server
+
+# One rerun every two seconds, no burst: the second rerun in a row is turned away
+LIMITED = {"GUIDE_RERUN_RATE": "0.5", "GUIDE_RERUN_BURST": "1", "GUIDE_BUSY_RETRY": "1"}
+
+
+@pytest.fixture(scope="module")
+def server():
+    with running_server(env=LIMITED) as server:
+        yield server
+
+
+def busy_fragment(result):
+    alerts = [delta for delta in result.deltas if delta.type == "alert"]
+    assert alerts, "the rerun was not turned away: %s" % result.deltas
+    return alerts[0].fragment_id
+
+
+def test_turned_away_rerun_returns_at_once_and_retries_from_a_fragment(server):
+    async def scenario():
+        session = Session(server.port)
+        await session.connect()
+        try:
+            await session.rerun()
+            turned_away = await session.rerun()
+            assert turned_away.busy
+            assert turned_away.elapsed < settings.BUSY_RETRY
+            retry = busy_fragment(turned_away)
+            await asyncio.sleep(2.5)
+            # The browser reruns the busy fragment, which reruns the whole app
+            result = await session.rerun(fragment_id=retry)
+            assert result.status == "FINISHED_SUCCESSFULLY", result.status
+            assert not result.busy
+            assert not result.exceptions, result.exceptions
+            assert not [delta for delta in result.deltas if delta.type == "alert"]
+        finally:
+            await session.close()
+
+    asyncio.run(scenario())
+
+
+def test_fragment_reruns_go_through_the_gate(server):
+    async def scenario():
+        session = Session(server.port)
+        await session.connect()
+        try:
+            await session.rerun()
+            await asyncio.sleep(2.5)
+            session.select("Go to", "Authentication")
+            await session.rerun()
+            topic = session.widgets["Choose an option:"]
+            session.select("Choose an option:", topic.options[-1])
+            result = await session.rerun(fragment_id=topic.fragment_id)
+            busy_fragment(result)
+            assert "header" not in [delta.type for delta in result.deltas]
+        finally:
+            await session.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("ip_address, proxies, expected", [
+    ("203.0.113.9", set(), "203.0.113.9"),           # no proxy configured: the header is ignored
+    (None, set(), None),
+    ("10.0.0.2", {"10.0.0.2"}, "198.51.100.7"),      # the address the proxy saw, not the spoofed one
+    (None, {"127.0.0.1"}, "198.51.100.7"),           # a proxy on the same box
+    ("10.0.0.2", {"10.0.0.2", "10.0.0.3"}, "198.51.100.7"),
+    ("203.0.113.9", {"10.0.0.2"}, "203.0.113.9"),    # not from the proxy: the header is ignored
+])
+def test_forwarded_for_is_only_believed_from_a_trusted_proxy(monkeypatch, ip_address, proxies, expected):
+    hops = "1.2.3.4, 198.51.100.7" + (", 10.0.0.3" if "10.0.0.3" in proxies else "")
+    headers = {"X-Forwarded-For": hops}
+    monkeypatch.setattr(renderer, "st", types.SimpleNamespace(
+        context=types.SimpleNamespace(ip_address=ip_address, headers=headers)))
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", proxies)
+
+    assert renderer._client_address() == expected
@@ -0,0 +1,8 @@
+import bulk_write
+
+
+def test_batches_stop_at_the_time_budget(tmp_path):
+    result = bulk_write.load("batches", 50000, batch_size=100, budget=0, directory=str(tmp_path))
+
+    assert result["rows"] == 100
+    assert result["commits"] == 1
@@ -0,0 +1,50 @@
+import os
+
+import bundles
+import content
+import search
+import watcher
+from benchmarks.hot_reload import LABEL, revisions_of, write_revision
+from pages import PAGES
+
+
+def test_reload_reaches_the_live_store_but_never_a_bundle(lesson_root):
+    live = content.ContentStore(lesson_root)
+    bundle = bundles.Bundle.from_pages(content.compile_all(lesson_root))
+    before = bundle.get(LABEL)
+    assert live.get(LABEL) == before
+    content_watcher = watcher.ContentWatcher(live)
+    selector = bundles.BundleSelector(live)
+    selector.stage(bundle, 100)
+    forgotten = []
+    live.on_swap.append(forgotten.append)
+
+    path = os.path.join(lesson_root, PAGES[LABEL] + ".py")
+    with open(path) as f:
+        write_revision(path, f.read(), 1)
+    assert content_watcher.reload(LABEL)
+
+    assert revisions_of(live.get(LABEL)) == {"1"}
+    assert forgotten == [LABEL]
+    assert selector.for_session("any").get(LABEL) is before
+    selector.rollback()
+    assert revisions_of(selector.for_session("any").get(LABEL)) == {"1"}
+
+
+def test_each_bundle_has_its_own_search_index_file():
+    assert search.index_path() == search.index_path("live")
+    assert len({search.index_path(name) for name in ("live", "v1", "v2")}) == 3
+
+
+def test_bundles_are_served_as_loaded_with_hot_reload_on(monkeypatch, tmp_path):
+    import renderer
+    import settings
+
+    monkeypatch.setattr(settings, "BUNDLE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "HOT_RELOAD", True)
+    bundle = bundles.Bundle.from_pages(content.compile_all())
+    bundle.save()
+
+    served = renderer.get_bundle(bundle.version)
+    assert isinstance(served, bundles.Bundle)
+    assert served.version == bundle.version
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import docstore
+
+
+@pytest.fixture
+def collection(tmp_path):
+    collection = docstore.Collection(str(tmp_path / "users.docs"), {"age": "sorted", "flag": "hash"})
+    collection.insert_many([{"_id": 1, "name": "John", "age": 30, "flag": True},
+                            {"_id": 2, "name": "Jane", "age": 1, "flag": 1}])
+    yield collection
+    collection.close()
+
+
+@pytest.mark.parametrize("call", [
+    lambda c: c.find([{"name": "John"}]),
+    lambda c: c.find({"_id": [1]}),
+    lambda c: c.find({"age": {"$in": 5}}),
+    lambda c: c.find({"age": {"$gt": [1]}}),
+    lambda c: c.find({"$or": [{"age": 30}]}),
+    lambda c: c.insert_one(5),
+    lambda c: c.insert_one({"_id": [1]}),
+    lambda c: c.update_one({"_id": 1}, {"$inc": {"name": 1}}),
+    lambda c: c.update_one({"_id": 1}, {"$inc": {"age": "1"}}),
+    lambda c: c.update_one({"_id": 1}, {"$set": 5}),
+    lambda c: c.update_one({"_id": 1}, [1]),
+])
+def test_malformed_input_raises_value_error(collection, call):
+    with pytest.raises(ValueError):
+        call(collection)
+    assert len(collection) == 2
+
+
+def test_booleans_do_not_match_numbers(collection):
+    for hint in (None, "$natural"):
+        assert [doc["_id"] for doc in collection.find({"flag": 1}, hint=hint)] == [2]
+        assert [doc["_id"] for doc in collection.find({"flag": True}, hint=hint)] == [1]
+        assert [doc["_id"] for doc in collection.find({"flag": {"$in": [1]}}, hint=hint)] == [2]
+        assert [doc["_id"] for doc in collection.find({"flag": {"$ne": True}}, hint=hint)] == [2]
+
+
+
+def test_updates_that_only_change_a_type_are_written(collection):
+    assert collection.update_one({"_id": 2}, {"$set": {"flag": True}})["modifiedCount"] == 1
+    assert collection.update_one({"_id": 1}, {"$inc": {"age": 0.0}})["modifiedCount"] == 1
+    assert collection.update_one({"_id": 1}, {"$set": {"age": 30.0}})["modifiedCount"] == 0
+
+    reopened = docstore.Collection(collection.path, {"flag": "hash"})
+    assert sorted(doc["_id"] for doc in reopened.find({"flag": True})) == [1, 2]
+    assert repr(reopened.find_one({"_id": 1})["age"]) == "30.0"
+
+
+def test_short_writes_are_completed(collection, monkeypatch):
+    write = os.write
+    monkeypatch.setattr(os, "write", lambda fd, data: write(fd, bytes(data[:7])))
+    collection.insert_one({"_id": 3, "name": "Alex", "age": 41})
+    monkeypatch.undo()
+
+    assert docstore.Collection(collection.path).find_one({"_id": 3})["name"] == "Alex"
+
+
+def test_failed_write_is_truncated(collection, monkeypatch):
+    size = os.path.getsize(collection.path)
+    write = os.write
+
+    def failing(fd, data):
+        write(fd, bytes(data[:7]))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "write", failing)
+    with pytest.raises(OSError):
+        collection.insert_one({"_id": 3, "name": "Alex"})
+    monkeypatch.undo()
+
+    assert os.path.getsize(collection.path) == size
+    collection.insert_one({"_id": 4, "name": "Sam"})
+    assert [doc["_id"] for doc in docstore.Collection(collection.path).find()] == [1, 2, 4]
@@ -0,0 +1,14 @@
+import content
+import diagrams
+import export
+
+
+def test_a_diagram_missing_after_warm_up_is_rendered(monkeypatch, tmp_path):
+    monkeypatch.setattr(diagrams, "DIAGRAM_DIR", str(tmp_path))
+    monkeypatch.setattr(diagrams, "_memory", type(diagrams._memory)())
+    monkeypatch.setattr(diagrams, "_warmed", [True])
+    page = content.compile_page("Express")
+    section = next(s for s in page.sections if diagrams.section_diagrams(page.label, s.title))
+
+    assert diagrams.get_svg(diagrams.section_diagrams(page.label, section.title)[0]) is None
+    assert "<svg" in export._section_html(page, section)
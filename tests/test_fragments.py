@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fragments import TOPIC_PAGES, check_fragment_rerun, check_topics_render
+from benchmarks.ws_client import running_server
+
+
+def test_every_topic_renders():
+    check_topics_render()
+
+
+@pytest.fixture(scope="module")
+def server():
+    with running_server() as server:
+        yield server
+
+
+@pytest.mark.parametrize("label", TOPIC_PAGES)
+def test_topic_switch_reruns_only_the_fragment(server, label):
+    asyncio.run(check_fragment_rerun(server.port, label))
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+
+import pytest
+
+import content
+import watcher
+from benchmarks.hot_reload import LABEL, revisions_of, write_revision
+from pages import PAGES
+
+
+@pytest.fixture
+def source_path(lesson_root):
+    return os.path.join(lesson_root, PAGES[LABEL] + ".py")
+
+
+@pytest.fixture
+def store(lesson_root):
+    return content.ContentStore(lesson_root)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def revision(page):
+    seen = revisions_of(page)
+    assert len(seen) == 1, "page mixes revisions %s" % seen
+    return int(seen.pop())
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_readers_see_revisions_in_order_while_pages_are_swapped(lesson_root, source_path, store):
+    source = read(source_path)
+    others = [label for label in PAGES if label != LABEL]
+    content_watcher = watcher.ContentWatcher(store, interval=0.01).start(polling=True)
+    stop = threading.Event()
+    problems = []
+    reads = [0]
+
+    def reader():
+        last = 0
+        while not stop.is_set():
+            try:
+                current = revision(store.get(LABEL))
+            except AssertionError as e:
+                problems.append(str(e))
+                continue
+            if current < last:
+                problems.append("revision went back from %d to %d" % (last, current))
+            last = current
+            reads[0] += 1
+
+    # Swaps of the other pages, and their first compiles, race with the reloads of LABEL
+    def other_swaps():
+        while not stop.is_set():
+            for label in others:
+                store.swap(label, content.compile_page(label, lesson_root))
+
+    threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=other_swaps)]
+    for thread in threads:
+        thread.start()
+    try:
+        for rev in range(1, 21):
+            write_revision(source_path, source, rev)
+            wait_for(lambda: revision(store.get(LABEL)) == rev)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        content_watcher.stop()
+
+    assert not problems, problems[:5]
+    assert reads[0] > 0
+    assert revision(store.get(LABEL)) == 20
+
+
+@pytest.mark.parametrize("cut", ["2. Middleware", "4. Error Handling", "Theoretical Questions"])
+def test_truncated_source_keeps_the_last_good_page(source_path, store, cut):
+    good = store.get(LABEL)
+    source = read(source_path)
+    # Cut the file right after the last statement before `cut`: what is left still parses
+    end = source.rindex(")", 0, source.index(cut)) + 1
+    with open(source_path, "w") as f:
+        f.write(source[:end])
+
+    assert not watcher.ContentWatcher(store).reload(LABEL)
+    assert store.get(LABEL) is good
+
+
+def test_emptied_source_keeps_the_last_good_page(source_path, store):
+    good = store.get(LABEL)
+    open(source_path, "w").close()
+
+    assert not watcher.ContentWatcher(store).reload(LABEL)
+    assert store.get(LABEL) is good
+
+
+def test_slow_writer_never_exposes_a_partial_page(source_path, store):
+    old = store.get(LABEL)
+    new_source = read(source_path).replace('st.header("1. Routing")', 'st.header("1. Routing [rev 1]")')
+    # Chunks end mid-line, and the writer pauses longer than the watcher waits for a file to settle
+    cuts = [new_source.index(marker) + 5 for marker in ("2. Middleware", "4. Error", "Theoretical")]
+    chunks = [new_source[start:end] for start, end in zip([0] + cuts, cuts + [len(new_source)])]
+    content_watcher = watcher.ContentWatcher(store, interval=0.01).start(polling=True)
+    seen = []
+
+    def writer():
+        with open(source_path, "w") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                f.flush()
+                time.sleep(watcher.SETTLE * 4)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while thread.is_alive():
+            page = store.get(LABEL)
+            if page is not old and (not seen or page is not seen[-1]):
+                seen.append(page)
+            time.sleep(0.001)
+        thread.join()
+        wait_for(lambda: store.get(LABEL) is not old)
+    finally:
+        content_watcher.stop()
+
+    final = content.compile_page(LABEL, os.path.dirname(source_path))
+    assert store.get(LABEL) == final
+    assert all(page == final for page in seen), "a partially written file was served"
+
+
+@pytest.mark.parametrize("label", list(PAGES))
+def test_source_cut_at_any_line_boundary_is_rejected(lesson_root, label):
+    path = os.path.join(lesson_root, PAGES[label] + ".py")
+    lines = read(path).splitlines(keepends=True)
+    for end in range(1, len(lines)):
+        with open(path, "w") as f:
+            f.write("".join(lines[:end]))
+        try:
+            content.compile_page(label, lesson_root)
+        except (SyntaxError, ValueError):
+            continue
+        raise AssertionError("%s cut after line %d still compiled" % (label, end))
@@ -0,0 +1,31 @@
+import contextlib
+
+import db_pool
+import indexing_lab
+import lab_data
+import settings
+from benchmarks.common import open_page
+
+
+def test_indexing_lab_reports_a_busy_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LAB_USERS_ROWS", 2000)
+    monkeypatch.setattr(lab_data, "USERS_FILE", str(tmp_path / "users.sqlite"))
+    at = open_page("Indexing Lab")
+    assert not at.exception, at.exception
+    pool = db_pool.for_database(lab_data.users_db())
+    monkeypatch.setattr(pool, "timeout", 0.1)
+
+    with contextlib.ExitStack() as held:
+        for _ in range(pool.max_size):
+            held.enter_context(pool.connection())
+        at.button[0].click().run()
+
+    assert not at.exception, at.exception
+    assert [warning.value for warning in at.warning] == [
+        "Other readers are running this lab right now. Try again in a few seconds."]
+
+
+def test_slower_indexes_are_reported_as_slower():
+    assert indexing_lab.compared_to_scan(10.0, 0.8) == "12.5x faster"
+    assert indexing_lab.compared_to_scan(1.0, 1.0) == "1.0x faster"
+    assert indexing_lab.compared_to_scan(1.0, 1.3) == "1.3x slower"
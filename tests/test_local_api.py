@@ -0,0 +1,51 @@
+import pytest
+
+import lab_data
+import local_api
+import pagination
+import settings
+
+
+@pytest.fixture
+def users(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LAB_USERS_ROWS", 500)
+    monkeypatch.setattr(local_api, "_users_path", lambda: lab_data.users_db(path=str(tmp_path / "users.sqlite")))
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/users", {"limit": 0}),
+    ("/api/users", {"limit": "many"}),
+    ("/api/users", {"paging": "pages"}),
+    ("/api/users", {"paging": "offset", "offset": -1}),
+    ("/api/users", {"cursor": "not a cursor"}),
+    ("/api/users", {"cursor": pagination.encode_cursor({"id": 1})}),
+    ("/api/users", {"cursor": pagination.encode_cursor([[1]])}),
+    ("/api/users", {"city": ["London"]}),
+    ("/api/users", {"sort": "email"}),
+    ("/api/users/abc", {}),
+])
+def test_bad_parameters_are_rejected_before_the_handler_runs(users, path, params):
+    assert local_api.request("GET", path, params).status == 400
+
+
+def test_errors_inside_a_handler_are_raised(users, monkeypatch):
+    def broken(*args, **kwargs):
+        raise TypeError("bug in the handler")
+
+    monkeypatch.setattr(pagination.KeysetPagination, "page", broken)
+    with pytest.raises(TypeError):
+        local_api.request("GET", "/api/users", {"limit": 5})
+
+
+def test_pages_follow_each_other(users):
+    first = local_api.request("GET", "/api/users", {"limit": 5})
+    second = local_api.request("GET", "/api/users", dict(first.body["next"], limit=5))
+
+    assert first.status == second.status == 200
+    assert [row["id"] for row in first.body["data"] + second.body["data"]] == list(range(1, 11))
+    assert local_api.request("GET", "/api/users/7").body["id"] == 7
+
+
+def test_pagination_must_implement_page():
+    with pytest.raises(TypeError):
+        pagination.Pagination("users", ["id"], ["id"])
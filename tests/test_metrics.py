@@ -0,0 +1,27 @@
+import collections
+
+import metrics
+import settings
+
+
+def test_per_session_counts_are_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "_sessions", collections.OrderedDict())
+    monkeypatch.setattr(settings, "METRICS_MAX_SESSIONS", 3)
+    for i in range(10):
+        metrics.record_rerun("session-%d" % i, "Home")
+    metrics.record_rerun("session-7", "Home")  # seen again, so kept over the newer ones
+    metrics.record_rerun("session-10", "Home")
+
+    assert list(metrics._sessions) == ["session-9", "session-7", "session-10"]
+    assert metrics.snapshot()["sessions"] == 3
+
+
+def test_fragment_runs_are_counted(monkeypatch):
+    monkeypatch.setattr(metrics, "_sessions", collections.OrderedDict())
+    metrics.record_rerun("session", "Authentication")
+    metrics.record_fragment_run("session", "topic")
+    metrics.record_fragment_run("session", "topic")
+
+    assert metrics._sessions["session"]["reruns"] == 1
+    assert metrics._sessions["session"]["fragment_runs"] == 2
+    assert 'guide_fragment_runs_total{fragment="topic"}' in metrics.prometheus_text()
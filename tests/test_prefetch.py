@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import content
+import pages
+import prefetch
+
+
+# Warmer that blocks each warm-up until the test releases it, recording how it ended
+class BlockingWarmer:
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.stopped = []
+        self.finished = []
+
+    def __call__(self, store, label, should_stop):
+        self.started.append(label)
+        while not should_stop():
+            if self.release.is_set():
+                self.finished.append(label)
+                return
+            time.sleep(0.002)
+        self.stopped.append(label)
+
+
+def prefetcher(warmer):
+    fetcher = prefetch.Prefetcher(store=None, budget=10)
+    fetcher.warmers = [warmer]
+    return fetcher
+
+
+def test_sessions_do_not_cancel_each_other():
+    warmer = BlockingWarmer()
+    fetcher = prefetcher(warmer)
+    fetcher.schedule("Express", "a")
+    fetcher.schedule("API", "b")
+    warmer.release.set()
+    fetcher.wait(5)
+
+    assert sorted(warmer.finished) == ["API", "Express"]
+    assert not warmer.stopped
+    assert fetcher.warmed == {"API", "Express"}
+
+
+def test_a_session_moving_on_cancels_only_its_own_warm_up():
+    warmer = BlockingWarmer()
+    fetcher = prefetcher(warmer)
+    fetcher.schedule("Express", "a")
+    fetcher.schedule("Express", "b")  # shares the warm-up already in flight
+    fetcher.schedule("API", "c")
+    fetcher.schedule("Testing", "c")  # nobody else waits for API
+    fetcher.schedule("Deployment", "a")  # b still waits for Express
+    warmer.release.set()
+    fetcher.wait(5)
+
+    assert warmer.started.count("Express") == 1
+    assert warmer.stopped == ["API"]
+    assert fetcher.warmed == {"Express", "Testing", "Deployment"}
+
+
+def test_closed_session_cancels_its_warm_up():
+    warmer = BlockingWarmer()
+    fetcher = prefetcher(warmer)
+    fetcher.schedule("Express", "a")
+    fetcher.cancel("a")
+    fetcher.wait(5)
+
+    assert warmer.stopped == ["Express"]
+    assert not fetcher.warmed
+
+
+def test_the_last_lesson_leads_to_the_labs():
+    assert pages.next_label(pages.PAGE_LABELS[-1]) == pages.LAB_LABELS[0]
+    assert pages.next_label(pages.LAB_LABELS[0]) == pages.LAB_LABELS[1]
+    assert pages.next_label(pages.LAB_LABELS[-1]) is None
+
+
+def test_labs_warm_their_own_data(monkeypatch):
+    warmed = []
+    lab = type("Lab", (), {"warm": staticmethod(lambda should_stop: warmed.append("data"))})
+    monkeypatch.setattr(pages, "load_lab", lambda label: lab)
+    fetcher = prefetch.Prefetcher(store=None, budget=10)
+    fetcher.schedule(pages.LAB_LABELS[0], "a")
+    fetcher.wait(5)
+
+    assert warmed == ["data"]
+    assert fetcher.warmed == {pages.LAB_LABELS[0]}
+
+
+@pytest.mark.parametrize("html", [False, True])
+def test_html_fragments_are_only_warmed_for_the_html_modes(monkeypatch, html):
+    rendered = []
+    monkeypatch.setattr(prefetch.html_cache, "get_html", lambda *args: rendered.append(args))
+    store = content.ContentStore()
+    fetcher = prefetch.Prefetcher(store, budget=10, html=html)
+    fetcher.schedule("Express", "a")
+    fetcher.wait(5)
+
+    assert fetcher.warmed == {"Express"}
+    assert "Express" in store._pages
+    assert bool(rendered) == html
@@ -0,0 +1,66 @@
+import asyncio
+import re
+import time
+import urllib.request
+
+from benchmarks.ws_client import Session, running_server
+
+
+# Function to read the runtime's own count of live sessions from the server
+def active_sessions(port):
+    text = urllib.request.urlopen("http://127.0.0.1:%d/_stcore/metrics" % port, timeout=5).read().decode()
+    return int(re.search(r"^active_sessions (\d+)", text, re.M).group(1))
+
+
+async def wait_for_sessions(port, count, timeout=15):
+    deadline = time.time() + timeout
+    while active_sessions(port) != count:
+        assert time.time() < deadline, "%d sessions still open, expected %d" % (active_sessions(port), count)
+        await asyncio.sleep(0.1)
+
+
+async def open_session(port):
+    session = Session(port)
+    await session.connect()
+    result = await session.rerun()
+    assert result.status == "FINISHED_SUCCESSFULLY", result.status
+    return session
+
+
+def test_idle_session_is_closed_by_the_runtime():
+    async def scenario(port):
+        session = await open_session(port)
+        try:
+            assert active_sessions(port) == 1
+            # The tab stays connected but idle past the TTL
+            await wait_for_sessions(port, 0)
+            try:
+                await asyncio.wait_for(session.rerun(), 2)
+            except (asyncio.TimeoutError, ConnectionError):
+                pass
+            else:
+                raise AssertionError("the closed session still answered a rerun")
+        finally:
+            await session.close()
+
+    with running_server(env={"GUIDE_SESSION_TTL": "1", "GUIDE_REAPER_INTERVAL": "0.2"}) as server:
+        asyncio.run(scenario(server.port))
+
+
+def test_least_recently_used_session_is_closed_over_the_cap():
+    async def scenario(port):
+        first = await open_session(port)
+        second = await open_session(port)
+        try:
+            await wait_for_sessions(port, 1)
+            result = await asyncio.wait_for(second.rerun(), 10)
+            assert result.status == "FINISHED_SUCCESSFULLY", result.status
+            time.sleep(1)
+            assert active_sessions(port) == 1
+        finally:
+            await first.close()
+            await second.close()
+
+    env = {"GUIDE_MAX_SESSIONS": "1", "GUIDE_SESSION_TTL": "3600", "GUIDE_REAPER_INTERVAL": "0.2"}
+    with running_server(env=env) as server:
+        asyncio.run(scenario(server.port))
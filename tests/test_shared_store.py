@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import content
+import pages
+import shared_store
+
+
+@pytest.fixture(scope="module")
+def compiled():
+    return content.compile_all()
+
+
+@pytest.fixture
+def shared(compiled, tmp_path):
+    return shared_store.SharedContent(shared_store.build(compiled, str(tmp_path / "content.shm")))
+
+
+def test_pages_round_trip(shared, compiled):
+    assert shared.all() == compiled
+
+
+def test_only_recently_read_pages_stay_decoded(shared, monkeypatch):
+    monkeypatch.setattr(shared_store.settings, "SHARED_PAGE_CACHE_SIZE", 2)
+    assert shared.get("Express") is shared.get("Express")
+
+    shared.all()
+    assert list(shared._decoded) == list(pages.PAGE_LABELS[-2:])
+
+
+def test_only_tagged_values_are_string_references(shared):
+    refs = shared_store._refs({"count": 3, "flag": True, "none": None, "title": "x"}, lambda blob: 0)
+
+    assert refs == {"count": 3, "flag": True, "none": None, "title": {shared_store.STRING: 0}}
+    assert shared._strings({"count": 3, "flag": True, "none": None}) == {"count": 3, "flag": True, "none": None}
+
+
+def test_a_file_in_another_format_counts_as_not_built(tmp_path):
+    path = str(tmp_path / "content.shm")
+    with open(path, "wb") as f:
+        f.write(shared_store.HEADER.pack(b"GUIDESHM", 0))
+
+    assert os.path.exists(path)
+    assert shared_store.SharedContent.open(path) is None
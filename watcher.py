@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+
+import content
+import settings
+from pages import PAGES
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a changed file must stay unchanged before it is recompiled
+SETTLE = 0.05
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Forwards watchdog events (inotify on Linux) to the watcher
+class _Handler:
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def dispatch(self, event):
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.watcher.check(os.path.abspath(path))
+
+
+# Watches the lesson source files of a ContentStore and recompiles only the page whose
+# file changed, then swaps it into the store. Uses watchdog when it is installed and
+# falls back to polling the files every `interval` seconds.
+class ContentWatcher:
+    def __init__(self, store, interval=None, on_swap=None):
+        self.store = store
+        self.interval = settings.HOT_RELOAD_INTERVAL if interval is None else interval
+        self.on_swap = list(on_swap or [])
+        self.paths = {os.path.join(os.path.abspath(store.root), module + ".py"): label
+                      for label, module in PAGES.items()}
+        self._stamps = {path: _stamp(path) for path in self.paths}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    def start(self, polling=False):
+        if Observer is not None and not polling:
+            self._observer = Observer()
+            self._observer.schedule(_Handler(self), os.path.abspath(self.store.root), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._thread = threading.Thread(target=self._poll, name="content-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            for path in self.paths:
+                self.check(path)
+
+    # Function to reload a page if its file changed since it was last seen
+    def check(self, path):
+        label = self.paths.get(path)
+        if label is None:
+            return
+        with self._lock:
+            stamp = _stamp(path)
+            if stamp is None or stamp == self._stamps.get(path):
+                return
+            # Skip files that are still being written; the next event or poll picks them up
+            time.sleep(SETTLE)
+            if _stamp(path) != stamp:
+                return
+            self._stamps[path] = stamp
+            self.reload(label)
+
+    def reload(self, label):
+        try:
+            page = content.compile_page(label, self.store.root)
+        except (SyntaxError, ValueError) as e:
+            # Most likely a half-saved file; keep serving the last good version
+            logger.warning("Not reloading %s: %s", label, e)
+            return False
+        if page == self.store.get(label):
+            return False
+        self.store.swap(label, page)
+        for callback in self.on_swap:
+            callback(label)
+        logger.info("Reloaded %s", label)
+        return True